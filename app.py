@@ -10,6 +10,8 @@ from questionnaire.optional_deductions import render_optional_deductions
 from ui.tax_comparison import render_tax_comparison
 from ui.optimization import render_optimization_tools
 from utils.formatters import format_currency, format_percent
+from calculations.tariff_data import register_data_files
+from calculations.tariff_watcher import start_default_watcher
 import pandas as pd
 
 
@@ -22,6 +24,11 @@ def main():
         initial_sidebar_state="collapsed"
     )
 
+    # Tariff years from data/tariffs (registered once, loaded on first use; the
+    # files replace the in-code tables), corrected files are swapped in without a restart
+    register_data_files()
+    start_default_watcher()
+
     # Initialize wizard state
     init_wizard_state()
 
@@ -308,9 +315,10 @@ def render_bracket_breakdown(tax_result, profile):
             for b in tax_result.cantonal_breakdown:
                 cant_data.append({
                     'Bracket': f"{format_currency(b['range_start'])} - {format_currency(b['range_end']) if b['range_end'] != float('inf') else '∞'}",
-                    'Rate': f"{b['rate']}%",
+                    'Rate': f"{b['rate']:g}%",
                     'Income': format_currency(b['taxable_amount']),
-                    'Einfache': format_currency(b['tax_paid']),
+                    'Einfache': format_currency(b['einfache_tax_paid']),
+                    'Cantonal + Municipal': format_currency(b['total_tax']),
                     'Active': '✓' if b['is_active'] else ''
                 })
             cant_df = pd.DataFrame(cant_data)
@@ -329,12 +337,14 @@ def render_bracket_breakdown(tax_result, profile):
         st.subheader("Wealth Tax Breakdown")
 
         from calculations.wealth_tax import calculate_wealth_tax
+        from calculations.municipalities import profile_steuerfuss
         from models.constants import WEALTH_DEDUCTION_PER_CHILD
 
+        gemeinde_steuerfuss = profile_steuerfuss(profile)
         wealth_result = calculate_wealth_tax(
             profile.total_wealth,
             profile.num_children,
-            profile.gemeinde_steuerfuss,
+            gemeinde_steuerfuss,
             profile.marital_status
         )
 
@@ -365,7 +375,7 @@ def render_bracket_breakdown(tax_result, profile):
 
             with col2:
                 st.metric("Municipal Wealth Tax", format_currency(wealth_result['municipal_wealth_tax']))
-                st.caption(f"Municipal Steuerfuss: {profile.gemeinde_steuerfuss}%")
+                st.caption(f"Municipal Steuerfuss: {gemeinde_steuerfuss:g}%")
 
             with col3:
                 st.metric("Total Wealth Tax", format_currency(wealth_result['wealth_tax']))
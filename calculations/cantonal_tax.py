@@ -2,12 +2,21 @@
 Zurich Cantonal Tax Calculation
 Based on StG § 35 (adjusted for 2024)
 """
-from typing import Dict, List
-from models.constants import ZURICH_TAX_BRACKETS, ZURICH_TAX_BRACKETS_MARRIED, CANTONAL_STEUERFUSS, PERSONALSTEUER
-from models.tax_data import TaxResult
-
-
-def calculate_zurich_tax(income: float, gemeinde_steuerfuss: int = 119, deductions: float = 0.0, marital_status: str = 'single') -> TaxResult:
+from typing import Dict, Tuple
+import numpy as np
+from models.constants import TAXABLE_INCOME_ROUNDING
+from models.tax_data import TaxResult, LazyBreakdown
+from calculations.registry import TariffBundle, get_bundle
+from calculations.tariff import (
+    evaluate_by_marital_status,
+    income_table,
+    round_down,
+    round_down_array,
+)
+
+
+def calculate_zurich_tax(income: float, gemeinde_steuerfuss: int = 119, deductions: float = 0.0, marital_status: str = 'single',
+                         official_rounding: bool = False, tax_year: int = None) -> TaxResult:
     """
     Calculate Zurich cantonal and municipal taxes.
 
@@ -23,6 +32,9 @@ def calculate_zurich_tax(income: float, gemeinde_steuerfuss: int = 119, deductio
         gemeinde_steuerfuss: Municipal tax multiplier (e.g., 119 for Zürich)
         deductions: Total deductions
         marital_status: 'single' or 'married'
+        official_rounding: Round taxable income down to full CHF 100 (like the
+                           official calculator) and read the tax from the dense table
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
 
     Returns:
         TaxResult with cantonal tax details
@@ -31,69 +43,38 @@ def calculate_zurich_tax(income: float, gemeinde_steuerfuss: int = 119, deductio
     result.gross_income = income
     result.total_deductions = deductions
 
-    # Select appropriate brackets based on marital status
-    if marital_status == 'married':
-        brackets = ZURICH_TAX_BRACKETS_MARRIED
-    else:
-        brackets = ZURICH_TAX_BRACKETS
-
     # Calculate taxable income
     taxable_income = max(0, income - deductions)
+    if official_rounding:
+        taxable_income = round_down(taxable_income, TAXABLE_INCOME_ROUNDING)
     result.taxable_income = taxable_income
 
     if taxable_income <= 0:
         return result
 
     # Step 1: Calculate Einfache Staatssteuer (simple state tax)
-    einfache_staatssteuer = 0
-    current_bracket_index = 0
-    breakdown = []
-
-    for i, bracket in enumerate(brackets):
-        next_bracket = brackets[i + 1] if i + 1 < len(brackets) else None
-
-        if taxable_income > bracket['threshold']:
-            current_bracket_index = i
-
-        # Skip the first (0%) bracket for breakdown display
-        if bracket['rate'] == 0:
-            continue
-
-        range_start = bracket['threshold']
-        range_end = next_bracket['threshold'] if next_bracket else float('inf')
-
-        # Calculate taxable amount in this bracket
-        taxable_amount = 0
-        if taxable_income > range_start:
-            if next_bracket and taxable_income >= range_end:
-                taxable_amount = range_end - range_start
-            elif taxable_income > range_start:
-                taxable_amount = taxable_income - range_start
-
-        # Calculate tax for this bracket
-        tax_paid = (taxable_amount * bracket['rate']) / 100
-        einfache_staatssteuer += tax_paid
-
-        if taxable_amount > 0:
-            breakdown.append({
-                'bracket_index': i,
-                'range_start': range_start,
-                'range_end': range_end,
-                'rate': bracket['rate'],
-                'taxable_amount': taxable_amount,
-                'tax_paid': tax_paid,
-                'is_active': i == current_bracket_index
-            })
+    # using the single (§ 35 Abs. 1) or married (§ 35 Abs. 2) tariff
+    bundle = get_bundle(tax_year)
+    tariff = bundle.zurich(marital_status)
+    if official_rounding:
+        # Rounded incomes are served straight from the precomputed CHF 100 table
+        einfache_staatssteuer, current_bracket_index = income_table(tariff).lookup(taxable_income, strict=True)
+    else:
+        einfache_staatssteuer = tariff.evaluate(taxable_income)
+        current_bracket_index = tariff.locate(taxable_income, strict=True)
 
     result.einfache_staatssteuer = einfache_staatssteuer
-    result.cantonal_breakdown = breakdown
+    # Breakdown for each bracket, built only when something reads it (from
+    # this bundle, so a later swap cannot make it disagree with the totals)
+    result.cantonal_breakdown = LazyBreakdown(get_cantonal_bracket_breakdown, taxable_income,
+                                              gemeinde_steuerfuss, marital_status, tax_year, bundle)
 
     # Step 2: Apply Steuerfüsse (tax multipliers)
-    result.cantonal_tax = (einfache_staatssteuer * CANTONAL_STEUERFUSS) / 100
+    result.cantonal_tax = (einfache_staatssteuer * bundle.cantonal_steuerfuss) / 100
     result.municipal_tax = (einfache_staatssteuer * gemeinde_steuerfuss) / 100
 
     # Step 3: Add Personalsteuer (flat CHF 24 personal tax)
-    result.personalsteuer = PERSONALSTEUER if taxable_income > 0 else 0
+    result.personalsteuer = bundle.personalsteuer if taxable_income > 0 else 0
 
     result.total_cantonal_municipal = result.cantonal_tax + result.municipal_tax
 
@@ -102,17 +83,17 @@ def calculate_zurich_tax(income: float, gemeinde_steuerfuss: int = 119, deductio
         result.cantonal_effective_rate = (result.total_cantonal_municipal / income) * 100
 
     # Get current bracket info
-    current_bracket = brackets[current_bracket_index]
     result.cantonal_bracket_index = current_bracket_index
-    result.cantonal_marginal_rate = current_bracket['rate']
+    result.cantonal_marginal_rate = tariff.rates[current_bracket_index]
 
     # Calculate progress within current bracket
-    if current_bracket_index + 1 < len(brackets):
-        next_bracket = brackets[current_bracket_index + 1]
-        bracket_range = next_bracket['threshold'] - current_bracket['threshold']
-        position_in_bracket = taxable_income - current_bracket['threshold']
+    if current_bracket_index + 1 < len(tariff):
+        bracket_start = tariff.thresholds[current_bracket_index]
+        next_threshold = tariff.thresholds[current_bracket_index + 1]
+        bracket_range = next_threshold - bracket_start
+        position_in_bracket = taxable_income - bracket_start
         result.progress_in_bracket = (position_in_bracket / bracket_range) * 100 if bracket_range > 0 else 0
-        result.amount_to_next_bracket = next_bracket['threshold'] - taxable_income
+        result.amount_to_next_bracket = next_threshold - taxable_income
     else:
         result.progress_in_bracket = 100
         result.amount_to_next_bracket = 0
@@ -120,60 +101,164 @@ def calculate_zurich_tax(income: float, gemeinde_steuerfuss: int = 119, deductio
     return result
 
 
-def get_cantonal_bracket_breakdown(income: float, gemeinde_steuerfuss: int = 119) -> List[Dict]:
+# One row per taxed bracket, as returned by get_cantonal_bracket_breakdown
+CANTONAL_BREAKDOWN_DTYPE = np.dtype([
+    ('bracket_index', np.int16),
+    ('range_start', np.float64),
+    ('range_end', np.float64),
+    ('rate', np.float64),
+    ('taxable_amount', np.float64),
+    ('einfache_tax_paid', np.float64),
+    ('cantonal_tax', np.float64),
+    ('municipal_tax', np.float64),
+    ('total_tax', np.float64),
+    ('is_active', np.bool_),
+])
+
+
+def evaluate_zurich_brackets(income: float, gemeinde_steuerfuss: int = 119, marital_status: str = 'single',
+                             tax_year: int = None, bundle: TariffBundle = None) -> Tuple[float, np.ndarray]:
+    """
+    Single-pass evaluation of the Zurich tariff with per-bracket amounts.
+
+    Produces the Einfache Staatssteuer together with the einfache, cantonal
+    and municipal tax paid in each bracket, for the single (§ 35 Abs. 1) or
+    married (§ 35 Abs. 2) tariff.
+
+    Args:
+        income: Taxable income
+        gemeinde_steuerfuss: Municipal tax multiplier
+        marital_status: 'single' or 'married'
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+        bundle: Tariff bundle to evaluate (default: the registry's bundle for tax_year)
+
+    Returns:
+        Tuple of (einfache_staatssteuer, breakdown) where breakdown is a
+        structured array with CANTONAL_BREAKDOWN_DTYPE, one row per bracket
+        with a non-zero rate and a non-zero taxable amount
+    """
+    if bundle is None:
+        bundle = get_bundle(tax_year)
+    tariff = bundle.zurich(marital_status)
+    range_start = tariff.threshold_array
+    range_end = np.nan_to_num(tariff.next_threshold_array, nan=np.inf)
+
+    # Taxable amount in each bracket, all brackets at once
+    taxable_amount = np.clip(income - range_start, 0.0, range_end - range_start)
+    einfache_tax_paid = (taxable_amount * tariff.rate_array) / 100
+    einfache_staatssteuer = float(einfache_tax_paid.sum())
+
+    # Skip the 0% bracket and brackets the income does not reach
+    shown = (tariff.rate_array > 0) & (taxable_amount > 0)
+    current_bracket_index = tariff.locate(income, strict=True)
+
+    breakdown = np.zeros(int(shown.sum()), dtype=CANTONAL_BREAKDOWN_DTYPE)
+    breakdown['bracket_index'] = np.flatnonzero(shown)
+    breakdown['range_start'] = range_start[shown]
+    breakdown['range_end'] = range_end[shown]
+    breakdown['rate'] = tariff.rate_array[shown]
+    breakdown['taxable_amount'] = taxable_amount[shown]
+    breakdown['einfache_tax_paid'] = einfache_tax_paid[shown]
+    breakdown['cantonal_tax'] = (breakdown['einfache_tax_paid'] * bundle.cantonal_steuerfuss) / 100
+    breakdown['municipal_tax'] = (breakdown['einfache_tax_paid'] * gemeinde_steuerfuss) / 100
+    breakdown['total_tax'] = breakdown['cantonal_tax'] + breakdown['municipal_tax']
+    breakdown['is_active'] = breakdown['bracket_index'] == current_bracket_index
+
+    return einfache_staatssteuer, breakdown
+
+
+def get_cantonal_bracket_breakdown(income: float, gemeinde_steuerfuss: int = 119, marital_status: str = 'single',
+                                   tax_year: int = None, bundle: TariffBundle = None) -> np.ndarray:
     """
     Get detailed breakdown of Zurich cantonal tax by bracket.
 
     Args:
         income: Taxable income
         gemeinde_steuerfuss: Municipal tax multiplier
+        marital_status: 'single' or 'married'
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+        bundle: Tariff bundle to evaluate (default: the registry's bundle for tax_year)
+
+    Returns:
+        Structured array (CANTONAL_BREAKDOWN_DTYPE); rows support b['rate'],
+        b['einfache_tax_paid'], b['municipal_tax'] etc.
+    """
+    return evaluate_zurich_brackets(income, gemeinde_steuerfuss, marital_status, tax_year, bundle)[1]
+
+
+def calculate_zurich_tax_batch(incomes, gemeinde_steuerfuss=119, deductions=0.0,
+                               marital_status='single', official_rounding: bool = False,
+                               tax_year: int = None) -> Dict[str, np.ndarray]:
+    """
+    Vectorized version of calculate_zurich_tax for many rows at once.
+
+    Einfache Staatssteuer is read from the compiled cumulative tariffs (one
+    np.searchsorted per tariff), then the cantonal, municipal and
+    Personalsteuer columns are derived in the same pass. No breakdowns
+    are built.
+
+    Args:
+        incomes: Array of gross annual incomes (pass deductions=0 for taxable income)
+        gemeinde_steuerfuss: Array of municipal tax multipliers (or a scalar)
+        deductions: Array of total deductions (or a scalar)
+        marital_status: Array of 'single'/'married' (or a scalar)
+        official_rounding: Round taxable income down to full CHF 100 per row
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
 
     Returns:
-        List of dictionaries with bracket breakdown
+        Dictionary of arrays keyed like the TaxResult fields: taxable_income,
+        einfache_staatssteuer, cantonal_tax, municipal_tax, personalsteuer,
+        total_cantonal_municipal, cantonal_effective_rate, cantonal_marginal_rate,
+        cantonal_bracket_index, progress_in_bracket, amount_to_next_bracket
     """
-    breakdown = []
-    current_bracket_index = 0
-
-    for i, bracket in enumerate(ZURICH_TAX_BRACKETS):
-        next_bracket = ZURICH_TAX_BRACKETS[i + 1] if i + 1 < len(ZURICH_TAX_BRACKETS) else None
-
-        if income > bracket['threshold']:
-            current_bracket_index = i
-
-        # Skip 0% bracket
-        if bracket['rate'] == 0:
-            continue
-
-        range_start = bracket['threshold']
-        range_end = next_bracket['threshold'] if next_bracket else float('inf')
-
-        # Calculate taxable amount in this bracket
-        taxable_amount = 0
-        if income > range_start:
-            if next_bracket and income >= range_end:
-                taxable_amount = range_end - range_start
-            elif income > range_start:
-                taxable_amount = income - range_start
-
-        # Calculate einfache tax for this bracket
-        einfache_tax_paid = (taxable_amount * bracket['rate']) / 100
-
-        # Calculate actual cantonal and municipal tax
-        cantonal_tax = (einfache_tax_paid * CANTONAL_STEUERFUSS) / 100
-        municipal_tax = (einfache_tax_paid * gemeinde_steuerfuss) / 100
-
-        if taxable_amount > 0:
-            breakdown.append({
-                'bracket_index': i,
-                'range_start': range_start,
-                'range_end': range_end,
-                'rate': bracket['rate'],
-                'taxable_amount': taxable_amount,
-                'einfache_tax_paid': einfache_tax_paid,
-                'cantonal_tax': cantonal_tax,
-                'municipal_tax': municipal_tax,
-                'total_tax': cantonal_tax + municipal_tax,
-                'is_active': i == current_bracket_index
-            })
-
-    return breakdown
+    incomes, gemeinde_steuerfuss, deductions, marital_status = np.broadcast_arrays(
+        np.asarray(incomes, dtype=float),
+        np.asarray(gemeinde_steuerfuss, dtype=float),
+        np.asarray(deductions, dtype=float),
+        np.asarray(marital_status),
+    )
+    married = marital_status == 'married'
+
+    taxable_income = np.maximum(0.0, incomes - deductions)
+    if official_rounding:
+        taxable_income = round_down_array(taxable_income, TAXABLE_INCOME_ROUNDING)
+    has_tax = taxable_income > 0
+
+    # Same rule as the scalar path: bracket index reported with taxable > threshold
+    bundle = get_bundle(tax_year)
+    tariffs = evaluate_by_marital_status(bundle.zurich_single, bundle.zurich_married, taxable_income, married,
+                                         strict_index=True)
+    bracket_index = tariffs['bracket_index']
+    thresholds = tariffs['thresholds']
+    rates = tariffs['rates']
+    next_thresholds = tariffs['next_thresholds']
+
+    einfache = np.where(has_tax, tariffs['tax'], 0.0)
+
+    cantonal_tax = (einfache * bundle.cantonal_steuerfuss) / 100
+    municipal_tax = (einfache * gemeinde_steuerfuss) / 100
+    total_cantonal_municipal = cantonal_tax + municipal_tax
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        effective_rate = np.where(incomes > 0, total_cantonal_municipal / incomes * 100, 0.0)
+        bracket_range = next_thresholds - thresholds
+        progress = np.where(bracket_range > 0, (taxable_income - thresholds) / bracket_range * 100, 0.0)
+
+    is_top = np.isnan(next_thresholds)
+    progress = np.where(is_top, 100.0, progress)
+    amount_to_next = np.where(is_top, 0.0, next_thresholds - taxable_income)
+
+    # Zero taxable income keeps the TaxResult defaults, as in the scalar path
+    return {
+        'taxable_income': taxable_income,
+        'einfache_staatssteuer': einfache,
+        'cantonal_tax': cantonal_tax,
+        'municipal_tax': municipal_tax,
+        'personalsteuer': np.where(has_tax, float(bundle.personalsteuer), 0.0),
+        'total_cantonal_municipal': total_cantonal_municipal,
+        'cantonal_effective_rate': np.where(has_tax, effective_rate, 0.0),
+        'cantonal_marginal_rate': np.where(has_tax, rates, 0.0),
+        'cantonal_bracket_index': np.where(has_tax, bracket_index, 0),
+        'progress_in_bracket': np.where(has_tax, progress, 0.0),
+        'amount_to_next_bracket': np.where(has_tax, amount_to_next, 0.0),
+    }
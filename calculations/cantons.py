@@ -0,0 +1,295 @@
+"""
+Canton Plugins and Municipality Comparison
+Pluggable cantonal tariffs and one vectorized comparison of profiles across
+every installed canton and municipality, sharing the federal tax. Only the
+Zurich plugin ships, so until other cantons are installed with
+register_canton this compares the Zurich municipalities.
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+import pandas as pd
+from models.tax_data import UserProfile, DeductionResult
+from calculations.registry import TARIFF_REGISTRY, get_bundle
+from calculations.federal_tax import calculate_federal_tax_batch
+from calculations.complete_tax import batch_incomes, frame_column
+from calculations.municipalities import load_municipalities, municipality_steuerfuesse
+from calculations.church_tax import church_multipliers_batch
+
+# Columns returned by compare_cantons
+COMPARISON_COLUMNS = [
+    'federal_tax',
+    'cantonal_tax',
+    'municipal_tax',
+    'personal_tax',
+    'church_tax',
+    'wealth_tax',
+    'total_tax',
+    'total_tax_incl_federal',
+]
+
+
+class CantonPlugin(ABC):
+    """
+    Tax rules of one canton.
+
+    The base class implements the common structure: a simple (einfache)
+    income and wealth tax from the canton's tariffs, multiplied by the
+    cantonal, municipal and church Steuerfüsse. A canton supplies its
+    tariffs, Steuerfüsse and deduction rules by overriding the hooks below
+    (the abstract ones are required: an incomplete plugin fails when it is
+    instantiated); cantons with another structure override evaluate().
+    """
+
+    code = ''
+    name = ''
+
+    def cantonal_deductions(self, deductions: np.ndarray, commuting: np.ndarray, tax_year: int = None) -> np.ndarray:
+        """Deduction rules hook: cantonal deductions from the total and the raw commuting costs."""
+        return deductions
+
+    @abstractmethod
+    def simple_income_tax(self, taxable_income: np.ndarray, married: np.ndarray, tax_year: int = None) -> np.ndarray:
+        """Simple income tax (100% Steuerfuss) per row."""
+
+    @abstractmethod
+    def simple_wealth_tax(self, total_wealth: np.ndarray, num_children: np.ndarray, married: np.ndarray,
+                          tax_year: int = None) -> np.ndarray:
+        """Simple wealth tax (100% Steuerfuss) per row."""
+
+    @abstractmethod
+    def cantonal_steuerfuss(self, tax_year: int = None) -> float:
+        """Cantonal Steuerfuss in percent."""
+
+    @abstractmethod
+    def municipalities(self, tax_year: int = None) -> Tuple[pd.Index, np.ndarray]:
+        """Municipality names and their Steuerfüsse in percent."""
+
+    def church_steuerfuss(self, religious_affiliation: np.ndarray, spouse2_religious_affiliation: np.ndarray,
+                          married: np.ndarray, municipalities: pd.Index, tax_year: int = None) -> np.ndarray:
+        """Church Steuerfuss in percent per row, or per (row × municipality) for parish Steuerfüsse."""
+        return np.zeros(len(religious_affiliation))
+
+    def personal_tax(self, taxable_income: np.ndarray, tax_year: int = None) -> np.ndarray:
+        """Flat per-person taxes per row."""
+        return np.zeros(len(taxable_income))
+
+    def evaluate(self, income: np.ndarray, deductions: np.ndarray, commuting: np.ndarray, married: np.ndarray,
+                 religious_affiliation: np.ndarray, total_wealth: np.ndarray, num_children: np.ndarray,
+                 tax_year: int = None, spouse2_religious_affiliation: np.ndarray = None
+                 ) -> Tuple[pd.Index, Dict[str, np.ndarray]]:
+        """
+        Cantonal taxes of n rows in all m municipalities.
+
+        The simple taxes are computed once per row and scaled by the
+        Steuerfüsse as one (n × m) outer product.
+
+        Returns:
+            Tuple of (municipality names, dict of (n × m) arrays: cantonal_tax,
+            municipal_tax, personal_tax, church_tax, wealth_tax)
+        """
+        names, steuerfuesse = self.municipalities(tax_year)
+        cantonal_steuerfuss = self.cantonal_steuerfuss(tax_year)
+        shape = (len(income), len(names))
+
+        taxable_income = np.maximum(income - self.cantonal_deductions(deductions, commuting, tax_year), 0.0)
+        simple = self.simple_income_tax(taxable_income, married, tax_year)
+        simple_wealth = self.simple_wealth_tax(total_wealth, num_children, married, tax_year)
+        if spouse2_religious_affiliation is None:
+            spouse2_religious_affiliation = religious_affiliation
+        church = self.church_steuerfuss(religious_affiliation, spouse2_religious_affiliation, married, names, tax_year)
+        church = np.where((income > 0)[:, None], np.reshape(church, (len(income), -1)), 0.0)
+
+        return names, {
+            'cantonal_tax': np.broadcast_to((simple * cantonal_steuerfuss / 100)[:, None], shape),
+            'municipal_tax': simple[:, None] * steuerfuesse[None, :] / 100,
+            'personal_tax': np.broadcast_to(self.personal_tax(taxable_income, tax_year)[:, None], shape),
+            'church_tax': np.broadcast_to(simple[:, None] * church / 100, shape),
+            'wealth_tax': simple_wealth[:, None] * (cantonal_steuerfuss + steuerfuesse[None, :]) / 100,
+        }
+
+
+class ZurichPlugin(CantonPlugin):
+    """Zurich (StG ZH), read from the tariff bundle of the year and data/municipalities.csv."""
+
+    code = 'ZH'
+    name = 'Zürich'
+
+    def __init__(self, municipalities: pd.DataFrame = None):
+        self._municipalities = municipalities
+
+    def cantonal_deductions(self, deductions, commuting, tax_year=None):
+        cap = get_bundle(tax_year).limits['COMMUTING_MAX_CANTONAL']
+        return deductions - commuting + np.minimum(commuting, cap)
+
+    def simple_income_tax(self, taxable_income, married, tax_year=None):
+        bundle = get_bundle(tax_year)
+        return np.where(married, bundle.zurich_married.evaluate_array(taxable_income),
+                        bundle.zurich_single.evaluate_array(taxable_income))
+
+    def simple_wealth_tax(self, total_wealth, num_children, married, tax_year=None):
+        bundle = get_bundle(tax_year)
+        taxable = np.maximum(total_wealth - num_children * bundle.wealth_deduction_per_child, 0.0)
+        simple = np.where(married, bundle.wealth_married.evaluate_array(taxable),
+                          bundle.wealth_single.evaluate_array(taxable))
+        return np.where(total_wealth > 0, simple, 0.0)
+
+    def cantonal_steuerfuss(self, tax_year=None):
+        return get_bundle(tax_year).cantonal_steuerfuss
+
+    def municipalities(self, tax_year=None):
+        municipalities = self._municipalities if self._municipalities is not None else load_municipalities()
+        return municipalities.index, municipality_steuerfuesse(tax_year, municipalities)
+
+    def church_steuerfuss(self, religious_affiliation, spouse2_religious_affiliation, married, municipalities,
+                          tax_year=None):
+        # (n × m) parish table, gathered in one flat church_multipliers_batch call
+        n, m = len(religious_affiliation), len(municipalities)
+        rates = church_multipliers_batch(
+            np.repeat(np.asarray(religious_affiliation, dtype=object), m),
+            np.repeat(np.asarray(spouse2_religious_affiliation, dtype=object), m),
+            np.repeat(np.where(married, 'married', 'single'), m),
+            np.tile(np.asarray(municipalities, dtype=object), n),
+            tax_year,
+            self._municipalities,
+        )
+        return rates.reshape(n, m) * 100
+
+    def personal_tax(self, taxable_income, tax_year=None):
+        return np.where(taxable_income > 0, get_bundle(tax_year).personalsteuer, 0.0)
+
+
+# Installed cantons by code
+CANTON_PLUGINS: Dict[str, CantonPlugin] = {}
+
+
+def register_canton(plugin: CantonPlugin, replace: bool = False):
+    """
+    Install a canton plugin.
+
+    Args:
+        plugin: CantonPlugin instance (keyed by its code)
+        replace: Allow replacing an installed canton
+    """
+    if plugin.code in CANTON_PLUGINS and not replace:
+        raise ValueError(f"Canton {plugin.code} is already installed")
+    CANTON_PLUGINS[plugin.code] = plugin
+
+
+def installed_cantons() -> Tuple[str, ...]:
+    """Codes of the installed cantons."""
+    return tuple(CANTON_PLUGINS)
+
+
+register_canton(ZurichPlugin())
+
+
+def compare_cantons(profile_frame: pd.DataFrame, deduction_frame: pd.DataFrame = None, tax_year: int = None,
+                    cantons: Iterable[str] = None) -> pd.DataFrame:
+    """
+    Taxes of every profile in every municipality of the installed cantons.
+
+    Only ZH is installed by default, which makes this a per-municipality
+    Zurich comparison; cantons added with register_canton join the same pass.
+    The federal tax does not depend on the canton and is computed once per
+    profile; each canton evaluates all profiles and municipalities in one
+    vectorized pass (CantonPlugin.evaluate).
+
+    Args:
+        profile_frame: One row per profile, columns as for calculate_complete_taxes_batch
+        deduction_frame: One row per profile (total_deductions, commuting_pauschal); omit for none
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+        cantons: Canton codes to compare (default: all installed)
+
+    Returns:
+        DataFrame indexed by (profile, canton, municipality) with COMPARISON_COLUMNS;
+        total_tax excludes the federal tax, like TaxResult.total_tax
+    """
+    if deduction_frame is not None and len(deduction_frame) != len(profile_frame):
+        raise ValueError(
+            f"deduction_frame has {len(deduction_frame)} rows, profile_frame has {len(profile_frame)}"
+        )
+    codes = list(cantons) if cantons is not None else list(CANTON_PLUGINS)
+    unknown = [code for code in codes if code not in CANTON_PLUGINS]
+    if unknown:
+        raise KeyError(f"Cantons not installed: {unknown} (installed: {list(CANTON_PLUGINS)})")
+
+    income = batch_incomes(profile_frame)
+    married = frame_column(profile_frame, 'marital_status', 'single') == 'married'
+    religious_affiliation = frame_column(profile_frame, 'religious_affiliation', 'none')
+    spouse2 = pd.Series(frame_column(profile_frame, 'spouse2_religious_affiliation', None))
+    spouse2_religious_affiliation = spouse2.where(spouse2.notna(), pd.Series(religious_affiliation)).to_numpy()
+    total_wealth = frame_column(profile_frame, 'total_wealth', 0.0).astype(float)
+    num_children = frame_column(profile_frame, 'num_children', 0).astype(float)
+    if deduction_frame is None:
+        deductions = np.zeros(len(profile_frame))
+        commuting = np.zeros(len(profile_frame))
+    else:
+        deductions = frame_column(deduction_frame, 'total_deductions', 0.0).astype(float)
+        commuting = frame_column(deduction_frame, 'commuting_pauschal', 0.0).astype(float)
+
+    parts: List[pd.DataFrame] = []
+    with TARIFF_REGISTRY.pinned():
+        # Shared by every canton
+        limits = get_bundle(tax_year).limits
+        federal_deductions = deductions - commuting + np.minimum(commuting, limits['COMMUTING_MAX_FEDERAL'])
+        federal_tax = calculate_federal_tax_batch(income, federal_deductions, np.where(married, 'married', 'single'),
+                                                  tax_year=tax_year)['federal_tax']
+
+        for code in codes:
+            names, taxes = CANTON_PLUGINS[code].evaluate(income, deductions, commuting, married,
+                                                         religious_affiliation, total_wealth, num_children, tax_year,
+                                                         spouse2_religious_affiliation)
+            n, m = len(income), len(names)
+            total_tax = (taxes['cantonal_tax'] + taxes['municipal_tax'] + taxes['personal_tax'] +
+                         taxes['church_tax'] + taxes['wealth_tax'])
+            columns = {name: np.ascontiguousarray(values).reshape(-1) for name, values in taxes.items()}
+            columns['federal_tax'] = np.repeat(federal_tax, m)
+            columns['total_tax'] = total_tax.reshape(-1)
+            columns['total_tax_incl_federal'] = columns['total_tax'] + columns['federal_tax']
+            index = pd.MultiIndex.from_arrays([
+                np.repeat(profile_frame.index.to_numpy(), m),
+                np.full(n * m, code),
+                np.tile(np.asarray(names), n),
+            ], names=['profile', 'canton', 'municipality'])
+            parts.append(pd.DataFrame(columns, index=index, columns=COMPARISON_COLUMNS))
+
+    return pd.concat(parts) if parts else pd.DataFrame(columns=COMPARISON_COLUMNS)
+
+
+def compare_profile(profile: UserProfile, deduction_result: DeductionResult = None, income: float = None,
+                    tax_year: int = None, cantons: Iterable[str] = None) -> pd.DataFrame:
+    """
+    One profile across all installed cantons and municipalities, cheapest first
+    (the Zurich municipalities unless other cantons are installed).
+
+    Args:
+        profile: User profile
+        deduction_result: Deductions (default: none)
+        income: Gross income (default: the profile's salaries)
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+        cantons: Canton codes to compare (default: all installed)
+
+    Returns:
+        DataFrame indexed by (canton, municipality) with COMPARISON_COLUMNS,
+        sorted by total_tax_incl_federal
+    """
+    married = profile.marital_status == 'married'
+    if income is None:
+        income = profile.spouse1_net_salary + profile.spouse2_net_salary if married else profile.net_salary
+    profile_frame = pd.DataFrame({
+        'income': [float(income)],
+        'marital_status': [profile.marital_status],
+        'religious_affiliation': [profile.religious_affiliation],
+        'spouse2_religious_affiliation': [profile.spouse2_religious_affiliation],
+        'total_wealth': [float(profile.total_wealth)],
+        'num_children': [profile.num_children],
+    })
+    deduction_frame = None
+    if deduction_result is not None:
+        deduction_frame = pd.DataFrame({
+            'total_deductions': [deduction_result.total_deductions],
+            'commuting_pauschal': [deduction_result.commuting_pauschal],
+        })
+    comparison = compare_cantons(profile_frame, deduction_frame, tax_year, cantons).droplevel('profile')
+    return comparison.sort_values('total_tax_incl_federal', kind='stable')
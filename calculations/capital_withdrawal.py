@@ -0,0 +1,314 @@
+"""
+Capital Withdrawal Tax (Pillar 2 / Pillar 3a)
+Separate, reduced taxation of capital benefits (Art. 38 DBG, StG § 37) and a
+dynamic-programming optimizer for staggering withdrawals over years
+"""
+from typing import Dict, Iterable
+import numpy as np
+import pandas as pd
+from models.constants import (
+    CAPITAL_BENEFIT_FEDERAL_FRACTION,
+    CAPITAL_BENEFIT_RATE_DIVISOR_ZH,
+    CAPITAL_BENEFIT_MIN_RATE_ZH,
+)
+from calculations.registry import TARIFF_REGISTRY, get_bundle
+from calculations.church_tax import household_church_multiplier
+from calculations.projection import tariff_years
+
+# Account columns and their defaults (one row per account)
+ACCOUNT_DEFAULTS = {
+    'amount': 0.0,           # Capital paid out (CHF)
+    'earliest_year': None,   # First year the account can be withdrawn (default: first year)
+    'latest_year': None,     # Last year the account can be withdrawn (default: last year)
+}
+
+# Accounts the optimizer accepts (the search covers 3^n (done, withdrawn) pairs per year)
+MAX_ACCOUNTS = 12
+
+# Per-year columns of the optimized schedule
+SCHEDULE_COLUMNS = [
+    'amount',
+    'federal_tax',
+    'cantonal_tax',
+    'municipal_tax',
+    'church_tax',
+    'total_tax',
+]
+
+
+def calculate_capital_withdrawal_tax(
+    amount: float,
+    marital_status: str = 'single',
+    gemeinde_steuerfuss: float = 119,
+    religious_affiliation: str = 'none',
+    tax_year: int = None,
+    church_multiplier: float = None
+) -> dict:
+    """
+    Calculate federal and Zurich tax on a capital withdrawal.
+
+    Capital benefits are taxed separately from other income, once per year
+    on the sum of all withdrawals (of both spouses):
+    - Federal: 1/5 of the ordinary tariff on the amount (Art. 38 Abs. 2 DBG)
+    - Zurich: the Einfache Staatssteuer is the amount times the rate of a
+      yearly income of 1/10 of the amount, but at least 2% (StG § 37 Abs. 2);
+      cantonal, municipal and church Steuerfüsse apply as usual, there is
+      no Personalsteuer
+
+    Args:
+        amount: Capital withdrawn in the year (combined for married couples)
+        marital_status: 'single' or 'married'
+        gemeinde_steuerfuss: Municipal tax multiplier
+        religious_affiliation: 'none', 'reformed', 'catholic', 'christian-catholic'
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+        church_multiplier: Household church multiplier (parish / spouse split, see
+                           household_church_multiplier); default: the cantonal multiplier
+
+    Returns:
+        Dictionary with capital withdrawal tax details
+    """
+    if amount <= 0:
+        return {
+            'federal_tax': 0.0,
+            'einfache_tax': 0.0,
+            'cantonal_tax': 0.0,
+            'municipal_tax': 0.0,
+            'church_tax': 0.0,
+            'total_tax': 0.0,
+            'zurich_rate': 0.0,
+            'effective_rate': 0.0,
+        }
+
+    bundle = get_bundle(tax_year)
+    if church_multiplier is None:
+        church_multiplier = bundle.church_tax_multipliers.get(religious_affiliation, 0)
+
+    federal_tax = bundle.federal(marital_status).evaluate(amount) * CAPITAL_BENEFIT_FEDERAL_FRACTION
+
+    # Rate of the yearly income of 1/10 of the capital, with the 2% floor
+    rate_income = amount / CAPITAL_BENEFIT_RATE_DIVISOR_ZH
+    zurich_rate = max(bundle.zurich(marital_status).evaluate(rate_income) / rate_income, CAPITAL_BENEFIT_MIN_RATE_ZH)
+    einfache_tax = amount * zurich_rate
+
+    cantonal_tax = einfache_tax * bundle.cantonal_steuerfuss / 100
+    municipal_tax = einfache_tax * gemeinde_steuerfuss / 100
+    church_tax = einfache_tax * church_multiplier
+    total_tax = federal_tax + cantonal_tax + municipal_tax + church_tax
+
+    return {
+        'federal_tax': federal_tax,
+        'einfache_tax': einfache_tax,
+        'cantonal_tax': cantonal_tax,
+        'municipal_tax': municipal_tax,
+        'church_tax': church_tax,
+        'total_tax': total_tax,
+        'zurich_rate': zurich_rate * 100,
+        'effective_rate': total_tax / amount * 100,
+    }
+
+
+def calculate_capital_withdrawal_tax_batch(amounts, marital_status='single', gemeinde_steuerfuss=119,
+                                           church_multiplier=0.0, tax_year: int = None) -> Dict[str, np.ndarray]:
+    """
+    Vectorized version of calculate_capital_withdrawal_tax.
+
+    Args:
+        amounts: Array of capital amounts
+        marital_status: Array of 'single'/'married' (or a scalar)
+        gemeinde_steuerfuss: Array of municipal tax multipliers (or a scalar)
+        church_multiplier: Array of household church multipliers (or a scalar)
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+
+    Returns:
+        Dictionary of arrays keyed like calculate_capital_withdrawal_tax
+    """
+    amounts, marital_status, gemeinde_steuerfuss, church_multiplier = np.broadcast_arrays(
+        np.asarray(amounts, dtype=float),
+        np.asarray(marital_status),
+        np.asarray(gemeinde_steuerfuss, dtype=float),
+        np.asarray(church_multiplier, dtype=float),
+    )
+    married = marital_status == 'married'
+    has_capital = amounts > 0
+    bundle = get_bundle(tax_year)
+
+    federal_tax = np.where(married, bundle.federal_married.evaluate_array(amounts),
+                           bundle.federal_single.evaluate_array(amounts)) * CAPITAL_BENEFIT_FEDERAL_FRACTION
+
+    rate_income = amounts / CAPITAL_BENEFIT_RATE_DIVISOR_ZH
+    simple = np.where(married, bundle.zurich_married.evaluate_array(rate_income),
+                      bundle.zurich_single.evaluate_array(rate_income))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        zurich_rate = np.maximum(np.where(has_capital, simple / rate_income, 0.0), CAPITAL_BENEFIT_MIN_RATE_ZH)
+    einfache_tax = np.where(has_capital, amounts * zurich_rate, 0.0)
+
+    cantonal_tax = einfache_tax * bundle.cantonal_steuerfuss / 100
+    municipal_tax = einfache_tax * gemeinde_steuerfuss / 100
+    church_tax = einfache_tax * church_multiplier
+    federal_tax = np.where(has_capital, federal_tax, 0.0)
+    total_tax = federal_tax + cantonal_tax + municipal_tax + church_tax
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        effective_rate = np.where(has_capital, total_tax / amounts * 100, 0.0)
+
+    return {
+        'federal_tax': federal_tax,
+        'einfache_tax': einfache_tax,
+        'cantonal_tax': cantonal_tax,
+        'municipal_tax': municipal_tax,
+        'church_tax': church_tax,
+        'total_tax': total_tax,
+        'zurich_rate': np.where(has_capital, zurich_rate * 100, 0.0),
+        'effective_rate': effective_rate,
+    }
+
+
+def _account_column(accounts: pd.DataFrame, name: str, default) -> np.ndarray:
+    """Account column (missing values filled), or the default for every account."""
+    if name in accounts.columns:
+        return accounts[name].fillna(default).to_numpy()
+    return np.full(len(accounts), default)
+
+
+def _submask_pairs(n: int):
+    """
+    All (done, withdrawn) pairs of disjoint account masks, grouped by done | withdrawn.
+
+    Each pair is a base-3 number: digit 1 = withdrawn before, 2 = withdrawn now.
+    """
+    digits = (np.arange(3 ** n)[:, None] // 3 ** np.arange(n)[None, :]) % 3
+    weights = 1 << np.arange(n)
+    done = (digits == 1) @ weights
+    withdrawn = (digits == 2) @ weights
+    order = np.argsort(done | withdrawn, kind='stable')
+    done, withdrawn = done[order], withdrawn[order]
+    starts = np.flatnonzero(np.r_[True, np.diff(done | withdrawn) != 0])
+    return done, withdrawn, starts
+
+
+def optimize_withdrawals(accounts: pd.DataFrame, years: Iterable[int], marital_status: str = 'single',
+                         gemeinde_steuerfuss: float = 119, religious_affiliation: str = 'none',
+                         spouse2_religious_affiliation: str = None, municipality: str = None) -> dict:
+    """
+    Withdrawal year per account with the lowest total capital withdrawal tax.
+
+    Each account is withdrawn in full in one year of its window; all
+    withdrawals of a year are taxed together. Married couples are taxed
+    jointly on the sum of both spouses' withdrawals (Art. 38 DBG, StG § 37),
+    so which spouse owns an account has no tax effect: splitting across
+    spouses only helps through the years each account can be withdrawn,
+    which its window already expresses. Dynamic
+    programming over the years with the set of accounts already withdrawn
+    as the state (a bitmask): the tax of every subset sum is evaluated once
+    per year in one vectorized call, and each year's transition is a
+    segmented minimum over all (done, withdrawn) pairs. Calendar years use
+    the tariff year of calculations.projection.tariff_years.
+
+    Args:
+        accounts: One row per account, columns as in ACCOUNT_DEFAULTS
+                  (at most MAX_ACCOUNTS rows; other columns are carried along)
+        years: Calendar years available for withdrawals (e.g. range(2030, 2040))
+        marital_status: 'single' or 'married'
+        gemeinde_steuerfuss: Municipal tax multiplier
+        religious_affiliation: Denomination of the taxpayer (spouse 1)
+        spouse2_religious_affiliation: Denomination of spouse 2 (None: same as spouse 1)
+        municipality: Municipality of the parishes (None: cantonal church multipliers)
+
+    Returns:
+        Dictionary with:
+        - accounts: the input accounts with a withdrawal_year column
+        - schedule: DataFrame indexed by year with SCHEDULE_COLUMNS
+        - total_tax: tax of the optimal schedule
+        - baseline_tax: tax if every account is withdrawn in its earliest year
+        - savings: baseline_tax - total_tax
+    """
+    years = np.asarray(list(years), dtype=int)
+    n, n_years = len(accounts), len(years)
+    if n > MAX_ACCOUNTS:
+        raise ValueError(f"At most {MAX_ACCOUNTS} accounts can be optimized, got {n}")
+    if not n_years:
+        raise ValueError("No withdrawal years given")
+
+    amounts = _account_column(accounts, 'amount', 0.0).astype(float)
+    earliest = _account_column(accounts, 'earliest_year', years[0]).astype(int)
+    latest = _account_column(accounts, 'latest_year', years[-1]).astype(int)
+    allowed = (years[:, None] >= earliest[None, :]) & (years[:, None] <= latest[None, :])   # years × accounts
+    closed = years[:, None] >= latest[None, :]                                              # must be done by then
+    missing = np.flatnonzero(~allowed.any(axis=0))
+    if len(missing):
+        raise ValueError(f"Accounts without a withdrawal year in {years[0]}-{years[-1]}: "
+                         f"{list(accounts.index[missing])}")
+
+    weights = 1 << np.arange(n)
+    allowed_mask = allowed @ weights
+    closed_mask = closed @ weights
+
+    # Subset sums and their tax in every year: years × 2^n
+    masks = np.arange(1 << n)
+    subset_amounts = ((masks[:, None] & weights[None, :]) > 0) @ amounts
+    row_tariff_years = tariff_years(years)
+    subset_taxes = {}
+    with TARIFF_REGISTRY.pinned():
+        for tariff_year in np.unique(row_tariff_years).tolist():
+            church_multiplier = household_church_multiplier(religious_affiliation, spouse2_religious_affiliation,
+                                                            marital_status, municipality, tariff_year)
+            subset_taxes[tariff_year] = calculate_capital_withdrawal_tax_batch(
+                subset_amounts, marital_status, gemeinde_steuerfuss, church_multiplier, tariff_year
+            )
+    cost = np.stack([subset_taxes[tariff_year]['total_tax'] for tariff_year in row_tariff_years.tolist()])
+
+    # Forward pass: best[u] = lowest tax with exactly the accounts u withdrawn
+    done, withdrawn, starts = _submask_pairs(n)
+    targets = done[starts] | withdrawn[starts]   # == masks
+    positions = np.arange(len(done))
+    best = np.where(masks == 0, 0.0, np.inf)
+    choices = np.empty((n_years, 1 << n), dtype=np.intp)
+    for t in range(n_years):
+        value = best[done] + cost[t, withdrawn]
+        value[(withdrawn & ~allowed_mask[t]) != 0] = np.inf
+        segment_best = np.minimum.reduceat(value, starts)
+        first = np.where(value == np.repeat(segment_best, np.diff(np.r_[starts, len(value)])), positions, len(value))
+        choices[t, targets] = np.minimum.reduceat(first, starts)
+        best = np.empty_like(segment_best)
+        best[targets] = segment_best
+        best[(masks & closed_mask[t]) != closed_mask[t]] = np.inf
+
+    full = (1 << n) - 1
+    if not np.isfinite(best[full]):
+        raise ValueError("No withdrawal schedule satisfies all account windows")
+
+    # Backtrack the withdrawal year of every account
+    withdrawal_year = np.empty(n, dtype=int)
+    year_masks = np.empty(n_years, dtype=np.int64)
+    state = full
+    for t in range(n_years - 1, -1, -1):
+        pair = choices[t, state]
+        year_masks[t] = withdrawn[pair]
+        withdrawal_year[(withdrawn[pair] & weights) != 0] = years[t]
+        state = done[pair]
+
+    result_accounts = accounts.copy()
+    result_accounts['withdrawal_year'] = withdrawal_year
+
+    schedule_taxes = {
+        name: np.array([subset_taxes[tariff_year][name][mask]
+                        for tariff_year, mask in zip(row_tariff_years.tolist(), year_masks)])
+        for name in SCHEDULE_COLUMNS[1:]
+    }
+    schedule = pd.DataFrame({'amount': subset_amounts[year_masks], **schedule_taxes},
+                            index=pd.Index(years, name='year'))[SCHEDULE_COLUMNS]
+
+    # Baseline: every account in its earliest possible year
+    first_year = np.argmax(allowed, axis=0)
+    baseline_masks = np.zeros(n_years, dtype=np.int64)
+    np.add.at(baseline_masks, first_year, weights)
+    baseline_tax = float(cost[np.arange(n_years), baseline_masks].sum())
+    total_tax = float(schedule['total_tax'].sum())
+
+    return {
+        'accounts': result_accounts,
+        'schedule': schedule,
+        'total_tax': total_tax,
+        'baseline_tax': baseline_tax,
+        'savings': baseline_tax - total_tax,
+    }
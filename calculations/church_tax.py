@@ -1,31 +1,47 @@
 """
 Church Tax Calculation for Zurich Canton
 """
-from models.constants import CHURCH_TAX_MULTIPLIERS, CANTONAL_STEUERFUSS
+import numpy as np
+import pandas as pd
+from calculations.registry import get_bundle
+from calculations.tariff_data import load_municipalities
 
 
 def calculate_church_tax(
     einfache_staatssteuer: float,
     gemeinde_steuerfuss: int,
     religious_affiliation: str,
-    income: float
+    income: float,
+    tax_year: int = None,
+    spouse2_religious_affiliation: str = None,
+    marital_status: str = 'single',
+    municipality: str = None
 ) -> dict:
     """
     Calculate church tax for Zurich canton.
 
     Church tax is calculated as a percentage of the Einfache Staatssteuer,
-    similar to how cantonal and municipal taxes are calculated.
+    similar to how cantonal and municipal taxes are calculated. Each parish
+    (Kirchgemeinde) sets its own Steuerfuss; mixed-denomination couples
+    split the tax (see household_church_multiplier).
 
     Args:
         einfache_staatssteuer: Base simple state tax
         gemeinde_steuerfuss: Municipal tax multiplier (not used for church tax)
         religious_affiliation: 'none', 'reformed', 'catholic', 'christian-catholic'
         income: Gross income (for effective rate calculation)
+        tax_year: Tax year of the multipliers (default: DEFAULT_TAX_YEAR)
+        spouse2_religious_affiliation: Denomination of spouse 2 (None: same as spouse 1)
+        marital_status: Only 'married' households are split
+        municipality: Municipality of the parishes (None: cantonal multipliers)
 
     Returns:
         Dictionary with church tax details
     """
-    if religious_affiliation == 'none' or income <= 0:
+    members = {religious_affiliation}
+    if marital_status == 'married' and spouse2_religious_affiliation is not None:
+        members.add(spouse2_religious_affiliation)
+    if members == {'none'} or income <= 0:
         return {
             'church_tax': 0.0,
             'effective_rate': 0.0,
@@ -35,7 +51,8 @@ def calculate_church_tax(
 
     # Church tax is based on Einfache Staatssteuer (just like cantonal and municipal taxes)
     # The multiplier represents the Steuerfuss as a decimal (e.g., 0.11 = 11%)
-    multiplier = CHURCH_TAX_MULTIPLIERS.get(religious_affiliation, 0)
+    multiplier = household_church_multiplier(religious_affiliation, spouse2_religious_affiliation,
+                                             marital_status, municipality, tax_year)
     church_tax = einfache_staatssteuer * multiplier
     effective_rate = (church_tax / income * 100) if income > 0 else 0
 
@@ -45,3 +62,170 @@ def calculate_church_tax(
         'denomination': religious_affiliation,
         'applied': True
     }
+
+
+def calculate_church_tax_batch(einfache_staatssteuer, religious_affiliation, income, tax_year: int = None,
+                               spouse2_religious_affiliation=None, marital_status=None, municipality=None) -> dict:
+    """
+    Vectorized church tax on an already computed Einfache Staatssteuer column.
+
+    The parish multipliers are one more column multiplied onto the shared
+    Einfache Staatssteuer; no tariff is evaluated here.
+
+    Args:
+        einfache_staatssteuer: Array of simple state tax amounts
+        religious_affiliation: Array of denominations (or a scalar)
+        income: Array of gross incomes (for effective rate calculation)
+        tax_year: Tax year of the multipliers (default: DEFAULT_TAX_YEAR)
+        spouse2_religious_affiliation: Array of spouse-2 denominations (None / NaN: same as spouse 1)
+        marital_status: Array of marital statuses (None: no spouse split)
+        municipality: Array of municipality names (None: cantonal multipliers)
+
+    Returns:
+        Dictionary with church_tax and effective_rate arrays
+    """
+    einfache_staatssteuer, religious_affiliation, income = np.broadcast_arrays(
+        np.asarray(einfache_staatssteuer, dtype=float),
+        np.asarray(religious_affiliation),
+        np.asarray(income, dtype=float),
+    )
+
+    # One multiplier per row; unknown denominations pay nothing, like .get(..., 0)
+    multiplier = church_multipliers_batch(religious_affiliation.reshape(-1), spouse2_religious_affiliation,
+                                          marital_status, municipality, tax_year).reshape(income.shape)
+    multiplier[income <= 0] = 0.0
+
+    church_tax = einfache_staatssteuer * multiplier
+    with np.errstate(divide='ignore', invalid='ignore'):
+        effective_rate = np.where(income > 0, church_tax / income * 100, 0.0)
+
+    return {
+        'church_tax': church_tax,
+        'effective_rate': effective_rate,
+    }
+
+
+# ============================================================================
+# PARISH STEUERFÜSSE
+# ============================================================================
+
+def parish_column(denomination: str) -> str:
+    """Column of the municipality dataset holding a denomination's parish Steuerfuss."""
+    return 'church_' + denomination.replace('-', '_')
+
+
+def parish_multiplier(denomination: str, municipality: str = None, tax_year: int = None,
+                      municipalities: pd.DataFrame = None) -> float:
+    """
+    Church multiplier (parish Steuerfuss / 100) of a denomination in a municipality.
+
+    Falls back to the cantonal CHURCH_TAX_MULTIPLIERS where the dataset lists
+    no Steuerfuss for the parish; 'none' and unknown denominations pay nothing.
+
+    Args:
+        denomination: 'none', 'reformed', 'catholic', 'christian-catholic'
+        municipality: Municipality name (None: cantonal multiplier)
+        tax_year: Tax year of the fallback multipliers (default: DEFAULT_TAX_YEAR)
+        municipalities: Dataset as returned by load_municipalities (default: data/municipalities.csv)
+
+    Returns:
+        Multiplier on the Einfache Staatssteuer (e.g. 0.10 = 10%)
+    """
+    default = get_bundle(tax_year).church_tax_multipliers.get(denomination, 0)
+    if municipality is None or not default:
+        return default
+    municipalities = load_municipalities() if municipalities is None else municipalities
+    column = parish_column(denomination)
+    if column in municipalities.columns and municipality in municipalities.index:
+        steuerfuss = municipalities.at[municipality, column]
+        if not pd.isna(steuerfuss):
+            return steuerfuss / 100
+    return default
+
+
+def household_church_multiplier(religious_affiliation: str, spouse2_religious_affiliation: str = None,
+                                marital_status: str = 'single', municipality: str = None,
+                                tax_year: int = None) -> float:
+    """
+    Church multiplier of a household, with the spouse split.
+
+    Married couples in different denominations pay half the church tax to
+    each parish; if only one spouse is a member, only that half is due.
+
+    Args:
+        religious_affiliation: Denomination of the taxpayer (spouse 1)
+        spouse2_religious_affiliation: Denomination of spouse 2 (None: same as spouse 1)
+        marital_status: Only 'married' households are split
+        municipality: Municipality of the parishes (None: cantonal multipliers)
+        tax_year: Tax year of the fallback multipliers (default: DEFAULT_TAX_YEAR)
+
+    Returns:
+        Multiplier on the Einfache Staatssteuer
+    """
+    rate = parish_multiplier(religious_affiliation, municipality, tax_year)
+    if marital_status == 'married' and spouse2_religious_affiliation not in (None, religious_affiliation):
+        rate = (rate + parish_multiplier(spouse2_religious_affiliation, municipality, tax_year)) / 2
+    return rate
+
+
+def profile_church_multiplier(profile, tax_year: int = None) -> float:
+    """household_church_multiplier of a UserProfile."""
+    return household_church_multiplier(profile.religious_affiliation, profile.spouse2_religious_affiliation,
+                                       profile.marital_status, profile.municipality, tax_year)
+
+
+def church_multipliers_batch(religious_affiliation, spouse2_religious_affiliation=None, marital_status=None,
+                             municipality=None, tax_year: int = None, municipalities: pd.DataFrame = None) -> np.ndarray:
+    """
+    Vectorized household_church_multiplier.
+
+    Multipliers are gathered from one (municipality × denomination) table
+    built for the municipalities in the batch, so the cost does not grow
+    with the number of parishes.
+
+    Args:
+        religious_affiliation: Array of denominations (or a scalar)
+        spouse2_religious_affiliation: Array of spouse-2 denominations (None / NaN: same as spouse 1)
+        marital_status: Array of marital statuses (None: no spouse split)
+        municipality: Array of municipality names (None: cantonal multipliers)
+        tax_year: Tax year of the fallback multipliers (default: DEFAULT_TAX_YEAR)
+        municipalities: Dataset as returned by load_municipalities (default: data/municipalities.csv)
+
+    Returns:
+        Array of multipliers
+    """
+    religion = pd.Series(np.atleast_1d(np.asarray(religious_affiliation, dtype=object)))
+    n = len(religion)
+    multipliers = get_bundle(tax_year).church_tax_multipliers
+    denominations = list(multipliers)
+    codes = {denomination: j for j, denomination in enumerate(denominations)}
+    unknown = len(denominations)   # Zero column for unknown denominations
+
+    # Row per municipality in the batch, last row for unknown / no municipality
+    defaults = np.array([multipliers[d] for d in denominations] + [0.0])
+    if municipality is None:
+        rows = np.zeros(n, dtype=np.intp)
+        table = defaults[None, :]
+    else:
+        rows, names = pd.factorize(pd.Series(np.broadcast_to(np.asarray(municipality, dtype=object), (n,))))
+        rows = np.where(rows < 0, len(names), rows)
+        table = np.tile(defaults, (len(names) + 1, 1))
+        municipalities = load_municipalities() if municipalities is None else municipalities
+        for j, denomination in enumerate(denominations):
+            column = parish_column(denomination)
+            if defaults[j] and column in municipalities.columns:
+                parish = municipalities[column].reindex(names).to_numpy(dtype=float) / 100
+                listed = np.flatnonzero(~np.isnan(parish))
+                table[listed, j] = parish[listed]
+
+    rate = table[rows, religion.map(codes).fillna(unknown).to_numpy(dtype=np.intp)]
+
+    if spouse2_religious_affiliation is not None and marital_status is not None:
+        spouse2 = pd.Series(np.broadcast_to(np.asarray(spouse2_religious_affiliation, dtype=object), (n,)))
+        spouse2 = spouse2.where(spouse2.notna(), religion)
+        married = np.broadcast_to(np.asarray(marital_status) == 'married', (n,))
+        split = married & (spouse2 != religion).to_numpy()
+        if split.any():
+            rate2 = table[rows, spouse2.map(codes).fillna(unknown).to_numpy(dtype=np.intp)]
+            rate = np.where(split, (rate + rate2) / 2, rate)
+    return rate
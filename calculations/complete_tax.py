@@ -0,0 +1,290 @@
+"""
+Complete Tax Calculation (federal, cantonal/municipal, church and wealth)
+UI-independent entry points for single profiles and batch runs
+"""
+import numpy as np
+import pandas as pd
+from models.tax_data import TaxResult, DeductionResult, UserProfile
+from calculations.federal_tax import calculate_federal_tax, calculate_federal_tax_batch
+from calculations.cantonal_tax import calculate_zurich_tax, calculate_zurich_tax_batch
+from calculations.church_tax import calculate_church_tax, calculate_church_tax_batch
+from calculations.wealth_tax import calculate_wealth_tax, calculate_wealth_tax_batch
+from calculations.deductions import get_adjusted_deductions_for_tax_type
+from calculations.registry import get_bundle
+from calculations.municipalities import profile_steuerfuss, steuerfuesse_batch
+
+
+# Numeric TaxResult fields returned by calculate_complete_taxes_batch (breakdowns excluded)
+BATCH_RESULT_COLUMNS = [
+    'gross_income',
+    'total_deductions',
+    'taxable_income',
+    'federal_tax',
+    'federal_effective_rate',
+    'federal_marginal_rate',
+    'federal_bracket_index',
+    'einfache_staatssteuer',
+    'cantonal_tax',
+    'municipal_tax',
+    'personalsteuer',
+    'total_cantonal_municipal',
+    'cantonal_effective_rate',
+    'cantonal_marginal_rate',
+    'cantonal_bracket_index',
+    'church_tax',
+    'church_effective_rate',
+    'wealth_tax',
+    'wealth_effective_rate',
+    'total_tax',
+    'total_effective_rate',
+    'progress_in_bracket',
+    'amount_to_next_bracket',
+]
+
+
+def calculate_complete_taxes(income: float, deductions: float, profile: UserProfile,
+                            deduction_result: DeductionResult = None, tax_year: int = None) -> TaxResult:
+    """
+    Calculate all taxes for a given income and deductions.
+
+    Args:
+        income: Gross income
+        deductions: Total deductions (used for display purposes)
+        profile: User profile
+        deduction_result: Optional DeductionResult object for applying different caps
+                         for federal vs cantonal commuting costs
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+
+    Returns:
+        TaxResult with all taxes calculated
+    """
+    result = TaxResult()
+    result.gross_income = income
+    result.total_deductions = deductions
+    gemeinde_steuerfuss = profile_steuerfuss(profile, tax_year)
+
+    # Calculate adjusted deductions for federal vs cantonal if deduction_result provided
+    if deduction_result is not None:
+        federal_deductions = get_adjusted_deductions_for_tax_type(
+            deduction_result, 'federal', total_to_adjust=deductions, tax_year=tax_year
+        )
+        cantonal_deductions = get_adjusted_deductions_for_tax_type(
+            deduction_result, 'cantonal', total_to_adjust=deductions, tax_year=tax_year
+        )
+    else:
+        # Use same deductions for both (e.g., when deductions=0)
+        federal_deductions = deductions
+        cantonal_deductions = deductions
+
+    # Federal tax (with federal commuting cap: CHF 3,200)
+    fed_result = calculate_federal_tax(income, federal_deductions, profile.marital_status, tax_year=tax_year)
+    result.federal_tax = fed_result.federal_tax
+    result.federal_effective_rate = fed_result.federal_effective_rate
+    result.federal_marginal_rate = fed_result.federal_marginal_rate
+    result.federal_bracket_index = fed_result.federal_bracket_index
+    result.federal_breakdown = fed_result.federal_breakdown
+    result.taxable_income = fed_result.taxable_income
+
+    # Cantonal tax (with cantonal commuting cap: CHF 5,000)
+    cant_result = calculate_zurich_tax(income, gemeinde_steuerfuss, cantonal_deductions, profile.marital_status,
+                                       tax_year=tax_year)
+    result.einfache_staatssteuer = cant_result.einfache_staatssteuer
+    result.cantonal_tax = cant_result.cantonal_tax
+    result.municipal_tax = cant_result.municipal_tax
+    result.personalsteuer = cant_result.personalsteuer
+    result.total_cantonal_municipal = cant_result.total_cantonal_municipal
+    result.cantonal_effective_rate = cant_result.cantonal_effective_rate
+    result.cantonal_marginal_rate = cant_result.cantonal_marginal_rate
+    result.cantonal_bracket_index = cant_result.cantonal_bracket_index
+    result.cantonal_breakdown = cant_result.cantonal_breakdown
+    result.progress_in_bracket = cant_result.progress_in_bracket
+    result.amount_to_next_bracket = cant_result.amount_to_next_bracket
+
+    # Church tax
+    church_result = calculate_church_tax(
+        result.einfache_staatssteuer,
+        gemeinde_steuerfuss,
+        profile.religious_affiliation,
+        income,
+        tax_year,
+        profile.spouse2_religious_affiliation,
+        profile.marital_status,
+        profile.municipality
+    )
+    result.church_tax = church_result['church_tax']
+    result.church_effective_rate = church_result['effective_rate']
+
+    # Wealth tax
+    if profile.total_wealth > 0:
+        wealth_result = calculate_wealth_tax(
+            profile.total_wealth,
+            profile.num_children,
+            gemeinde_steuerfuss,
+            profile.marital_status,
+            tax_year=tax_year
+        )
+        result.wealth_tax = wealth_result['wealth_tax']
+        result.wealth_effective_rate = wealth_result['effective_rate']
+
+    # Calculate totals
+    result.calculate_totals()
+
+    return result
+
+
+def frame_column(frame: pd.DataFrame, name: str, default) -> np.ndarray:
+    """
+    A frame column as an array, or the default broadcast to the frame length.
+
+    Shared by the batch calculators (complete_tax, cantons) to read optional
+    profile and deduction columns.
+
+    Args:
+        frame: Profile or deduction frame (None: empty)
+        name: Column name
+        default: Value for every row when the column is missing
+
+    Returns:
+        Array with one value per row
+    """
+    if frame is not None and name in frame.columns:
+        return frame[name].to_numpy()
+    return np.full(len(frame) if frame is not None else 0, default)
+
+
+def batch_incomes(profile_frame: pd.DataFrame) -> np.ndarray:
+    """
+    Gross income per row of a profile frame.
+
+    An explicit 'income' column wins; otherwise married rows use the
+    combined spouse salaries and everyone else net_salary.
+
+    Args:
+        profile_frame: One row per profile
+
+    Returns:
+        Float array of gross incomes
+    """
+    if 'income' in profile_frame.columns:
+        return profile_frame['income'].to_numpy(dtype=float)
+
+    net_salary = frame_column(profile_frame, 'net_salary', 0.0).astype(float)
+    combined = (
+        frame_column(profile_frame, 'spouse1_net_salary', 0.0).astype(float) +
+        frame_column(profile_frame, 'spouse2_net_salary', 0.0).astype(float)
+    )
+    married = frame_column(profile_frame, 'marital_status', 'single') == 'married'
+    return np.where(married, combined, net_salary)
+
+
+def calculate_complete_taxes_batch(profile_frame: pd.DataFrame,
+                                   deduction_frame: pd.DataFrame = None, tax_year: int = None) -> pd.DataFrame:
+    """
+    Calculate all taxes for many profiles at once (batch counterpart of
+    calculate_complete_taxes).
+
+    The federal (CHF 3,200) and cantonal (CHF 5,000) commuting caps are applied
+    per row, exactly like get_adjusted_deductions_for_tax_type. Einfache
+    Staatssteuer is computed once and reused for cantonal, municipal and
+    church tax.
+
+    Args:
+        profile_frame: One row per profile, columns named like UserProfile fields
+                       (marital_status, gemeinde_steuerfuss, religious_affiliation,
+                       total_wealth, num_children, net_salary / spouse salaries;
+                       optionally spouse2_religious_affiliation and municipality).
+                       A missing gemeinde_steuerfuss (column or value) is the
+                       municipality's Steuerfuss in the tariff registry.
+                       An optional 'income' column overrides the salary columns.
+        deduction_frame: One row per profile, columns named like DeductionResult
+                         fields (total_deductions, commuting_pauschal). Omit for
+                         the no-deduction scenario.
+        tax_year: Tariff year for all rows (default: DEFAULT_TAX_YEAR)
+
+    Returns:
+        DataFrame with one column per numeric TaxResult field (BATCH_RESULT_COLUMNS),
+        indexed like profile_frame
+    """
+    if deduction_frame is not None and len(deduction_frame) != len(profile_frame):
+        raise ValueError(
+            f"deduction_frame has {len(deduction_frame)} rows, profile_frame has {len(profile_frame)}"
+        )
+
+    income = batch_incomes(profile_frame)
+    marital_status = frame_column(profile_frame, 'marital_status', 'single')
+    religious_affiliation = frame_column(profile_frame, 'religious_affiliation', 'none')
+    # Parish and spouse-split church tax only where the frame carries the columns
+    spouse2_religious_affiliation = municipality = None
+    if 'spouse2_religious_affiliation' in profile_frame.columns:
+        spouse2_religious_affiliation = profile_frame['spouse2_religious_affiliation'].to_numpy()
+    if 'municipality' in profile_frame.columns:
+        municipality = profile_frame['municipality'].to_numpy()
+    # Steuerfuss overrides, else the municipality's Steuerfuss from the registry
+    gemeinde_steuerfuss = steuerfuesse_batch(frame_column(profile_frame, 'gemeinde_steuerfuss', None),
+                                             frame_column(profile_frame, 'municipality', UserProfile.municipality),
+                                             tax_year)
+    total_wealth = frame_column(profile_frame, 'total_wealth', 0.0).astype(float)
+    num_children = frame_column(profile_frame, 'num_children', 0).astype(float)
+
+    if deduction_frame is None:
+        deductions = np.zeros(len(profile_frame))
+        commuting = np.zeros(len(profile_frame))
+    else:
+        deductions = frame_column(deduction_frame, 'total_deductions', 0.0).astype(float)
+        commuting = frame_column(deduction_frame, 'commuting_pauschal', 0.0).astype(float)
+
+    # Swap raw commuting for the capped amount, per tax type
+    limits = get_bundle(tax_year).limits
+    federal_deductions = deductions - commuting + np.minimum(commuting, limits['COMMUTING_MAX_FEDERAL'])
+    cantonal_deductions = deductions - commuting + np.minimum(commuting, limits['COMMUTING_MAX_CANTONAL'])
+
+    fed = calculate_federal_tax_batch(income, federal_deductions, marital_status, tax_year=tax_year)
+    cant = calculate_zurich_tax_batch(income, gemeinde_steuerfuss, cantonal_deductions, marital_status,
+                                      tax_year=tax_year)
+    church = calculate_church_tax_batch(cant['einfache_staatssteuer'], religious_affiliation, income, tax_year,
+                                        spouse2_religious_affiliation, marital_status, municipality)
+    wealth = calculate_wealth_tax_batch(total_wealth, num_children, gemeinde_steuerfuss, marital_status,
+                                        tax_year=tax_year)
+
+    total_cantonal_municipal = cant['cantonal_tax'] + cant['municipal_tax']
+    total_tax = (
+        cant['cantonal_tax'] +
+        cant['municipal_tax'] +
+        cant['personalsteuer'] +
+        church['church_tax'] +
+        wealth['wealth_tax']
+    )
+
+    has_income = income > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total_effective_rate = np.where(has_income, total_tax / income * 100, 0.0)
+        federal_effective_rate = np.where(has_income, fed['federal_tax'] / income * 100, 0.0)
+        cantonal_effective_rate = np.where(has_income, total_cantonal_municipal / income * 100, 0.0)
+
+    columns = {
+        'gross_income': income,
+        'total_deductions': deductions,
+        'taxable_income': fed['taxable_income'],
+        'federal_tax': fed['federal_tax'],
+        'federal_effective_rate': federal_effective_rate,
+        'federal_marginal_rate': fed['federal_marginal_rate'],
+        'federal_bracket_index': fed['federal_bracket_index'],
+        'einfache_staatssteuer': cant['einfache_staatssteuer'],
+        'cantonal_tax': cant['cantonal_tax'],
+        'municipal_tax': cant['municipal_tax'],
+        'personalsteuer': cant['personalsteuer'],
+        'total_cantonal_municipal': total_cantonal_municipal,
+        'cantonal_effective_rate': cantonal_effective_rate,
+        'cantonal_marginal_rate': cant['cantonal_marginal_rate'],
+        'cantonal_bracket_index': cant['cantonal_bracket_index'],
+        'church_tax': church['church_tax'],
+        'church_effective_rate': church['effective_rate'],
+        'wealth_tax': wealth['wealth_tax'],
+        'wealth_effective_rate': wealth['effective_rate'],
+        'total_tax': total_tax,
+        'total_effective_rate': total_effective_rate,
+        'progress_in_bracket': cant['progress_in_bracket'],
+        'amount_to_next_bracket': cant['amount_to_next_bracket'],
+    }
+
+    return pd.DataFrame(columns, index=profile_frame.index, columns=BATCH_RESULT_COLUMNS)
@@ -0,0 +1,219 @@
+"""
+Tax Engine
+Memoizing facade over the complete tax calculation with a size-bounded LRU
+"""
+import copy
+import threading
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
+import pandas as pd
+from models.tax_data import TaxResult, DeductionResult, UserProfile
+from models.constants import TARIFF_VERSION
+from calculations.registry import TARIFF_REGISTRY, TariffBundle, get_bundle
+from calculations.complete_tax import calculate_complete_taxes, calculate_complete_taxes_batch
+from calculations.fixed_point import calculate_complete_taxes_fixed
+from calculations.deductions import get_adjusted_deductions_for_tax_type
+from calculations.municipalities import profile_steuerfuss
+
+DEFAULT_CACHE_SIZE = 1024
+
+
+class CacheKey(NamedTuple):
+    """Everything a cached result depends on (see TaxEngine.cache_key)."""
+    income: float
+    deductions: float
+    federal_deductions: float
+    cantonal_deductions: float
+    marital_status: str
+    gemeinde_steuerfuss: float
+    religious_affiliation: str
+    spouse2_religious_affiliation: Optional[str]
+    municipality: Optional[str]
+    total_wealth: float
+    num_children: int
+    tax_year: int
+    version: str
+    tariff_version: str
+    mode: str = 'float'   # 'float' (TaxResult) or 'centimes' (fixed point)
+
+
+class TaxEngine:
+    """
+    Caches complete tax results for any tax year in the tariff registry.
+
+    Results are keyed on everything calculate_complete_taxes reads: income,
+    federal and cantonal deductions (after the commuting caps), marital
+    status, Steuerfuss, both spouses' religion, municipality (parish church
+    Steuerfuss), wealth, children, the tax year with its
+    bundle version and the engine's tariff version. The least recently used
+    entry is evicted once maxsize is reached.
+
+    When a tax year is hot-swapped in the tariff registry, only the entries
+    of the replaced bundle version are dropped. Each calculation runs on
+    one pinned bundle per year, so a swap never mixes two versions.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE, tariff_version: str = TARIFF_VERSION):
+        if maxsize < 1:
+            raise ValueError("TaxEngine cache size must be at least 1")
+        self.maxsize = maxsize
+        self.tariff_version = tariff_version
+
+        self._cache: 'OrderedDict[CacheKey, TaxResult]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        TARIFF_REGISTRY.add_listener(self._on_tariff_swap)
+
+    def cache_key(self, income: float, deductions: float, profile: UserProfile,
+                  deduction_result: DeductionResult = None, tax_year: int = None) -> CacheKey:
+        """Key of one calculation (total deductions included, as TaxResult reports them)."""
+        bundle = get_bundle(tax_year)
+        if deduction_result is not None:
+            federal_deductions = get_adjusted_deductions_for_tax_type(deduction_result, 'federal',
+                                                                      total_to_adjust=deductions, tax_year=tax_year)
+            cantonal_deductions = get_adjusted_deductions_for_tax_type(deduction_result, 'cantonal',
+                                                                       total_to_adjust=deductions, tax_year=tax_year)
+        else:
+            federal_deductions = cantonal_deductions = deductions
+
+        return CacheKey(
+            income=float(income),
+            deductions=float(deductions),
+            federal_deductions=float(federal_deductions),
+            cantonal_deductions=float(cantonal_deductions),
+            marital_status=profile.marital_status,
+            gemeinde_steuerfuss=profile_steuerfuss(profile, tax_year),
+            religious_affiliation=profile.religious_affiliation,
+            spouse2_religious_affiliation=profile.spouse2_religious_affiliation,
+            municipality=profile.municipality,
+            total_wealth=float(profile.total_wealth),
+            num_children=profile.num_children,
+            tax_year=bundle.tax_year,
+            version=bundle.version,
+            tariff_version=self.tariff_version,
+        )
+
+    def calculate(self, income: float, deductions: float, profile: UserProfile,
+                  deduction_result: DeductionResult = None, tax_year: int = None) -> TaxResult:
+        """
+        Calculate all taxes, served from the cache when the inputs repeat.
+
+        Args:
+            income: Gross income
+            deductions: Total deductions
+            profile: User profile
+            deduction_result: Optional DeductionResult for the federal/cantonal commuting caps
+            tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+
+        Returns:
+            TaxResult (a copy, so callers may modify it freely)
+        """
+        with TARIFF_REGISTRY.pinned():
+            key = self.cache_key(income, deductions, profile, deduction_result, tax_year)
+            result = self._lookup(key)
+            if result is not None:
+                return copy.copy(result)
+
+            result = calculate_complete_taxes(income, deductions, profile, deduction_result, tax_year)
+        self._store(key, result)
+        return copy.copy(result)
+
+    def calculate_fixed(self, income: float, deductions: float, profile: UserProfile,
+                        deduction_result: DeductionResult = None, tax_year: int = None) -> Dict[str, int]:
+        """
+        Fixed-point mode: all taxes in integer centimes with official rounding.
+
+        Cached like calculate(); see calculate_complete_taxes_fixed.
+        """
+        with TARIFF_REGISTRY.pinned():
+            key = self.cache_key(income, deductions, profile, deduction_result, tax_year)._replace(mode='centimes')
+            result = self._lookup(key)
+            if result is not None:
+                return dict(result)
+
+            result = calculate_complete_taxes_fixed(income, deductions, profile, deduction_result, tax_year)
+        self._store(key, result)
+        return dict(result)
+
+    def _lookup(self, key: CacheKey):
+        """Cached result for key (marked most recently used), or None; counts the hit or miss."""
+        with self._lock:
+            result = self._cache.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def _store(self, key: CacheKey, result):
+        """Insert a result, evicting the least recently used entry when full."""
+        with self._lock:
+            self._cache[key] = result
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tax_year: int, version: str) -> int:
+        """
+        Drop the entries computed with one bundle version of a tax year.
+
+        Returns:
+            Number of entries dropped
+        """
+        with self._lock:
+            stale = [key for key in self._cache if key.tax_year == tax_year and key.version == version]
+            for key in stale:
+                del self._cache[key]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def _on_tariff_swap(self, tax_year: int, old: TariffBundle, new: TariffBundle):
+        """Registry listener: entries of the replaced bundle can no longer be served."""
+        if old is not None and old.version != new.version:
+            self.invalidate(tax_year, old.version)
+
+    def calculate_batch(self, profile_frame: pd.DataFrame, deduction_frame: pd.DataFrame = None,
+                        tax_year: int = None) -> pd.DataFrame:
+        """Vectorized complete taxes for many profiles (see calculate_complete_taxes_batch); not cached."""
+        with TARIFF_REGISTRY.pinned():
+            return calculate_complete_taxes_batch(profile_frame, deduction_frame, tax_year)
+
+    def stats(self) -> Dict:
+        """Cache counters: hits, misses, evictions, invalidations, size, maxsize and hit rate (%)."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'size': len(self._cache),
+            'maxsize': self.maxsize,
+            'hit_rate': (self.hits / lookups * 100) if lookups > 0 else 0,
+        }
+
+    def clear(self):
+        """Drop all cached results (counters are kept)."""
+        with self._lock:
+            self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+_default_engine = None
+_default_engine_lock = threading.Lock()
+
+
+def get_default_engine() -> TaxEngine:
+    """Process-wide engine shared by the UI (survives Streamlit reruns)."""
+    global _default_engine
+    if _default_engine is None:
+        with _default_engine_lock:
+            if _default_engine is None:   # Another thread may have created it meanwhile
+                _default_engine = TaxEngine()
+    return _default_engine
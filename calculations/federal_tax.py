@@ -2,12 +2,21 @@
 Swiss Federal Income Tax Calculation (DBG - Direct Federal Tax)
 Based on Art. 36 DBG
 """
-from typing import Dict, List
-from models.constants import FEDERAL_TAX_BRACKETS, FEDERAL_TAX_BRACKETS_MARRIED
-from models.tax_data import TaxResult
-
-
-def calculate_federal_tax(income: float, deductions: float = 0.0, marital_status: str = 'single') -> TaxResult:
+from typing import Dict, List, Sequence
+import numpy as np
+from models.constants import TAXABLE_INCOME_ROUNDING
+from models.tax_data import TaxResult, LazyBreakdown
+from calculations.registry import get_bundle
+from calculations.tariff import (
+    evaluate_by_marital_status,
+    income_table,
+    round_down,
+    round_down_array,
+)
+
+
+def calculate_federal_tax(income: float, deductions: float = 0.0, marital_status: str = 'single',
+                          official_rounding: bool = False, tax_year: int = None) -> TaxResult:
     """
     Calculate Swiss federal income tax (DBG).
 
@@ -20,6 +29,9 @@ def calculate_federal_tax(income: float, deductions: float = 0.0, marital_status
         income: Gross annual income (combined for married couples)
         deductions: Total deductions
         marital_status: 'single' or 'married'
+        official_rounding: Round taxable income down to full CHF 100 (like the
+                           official calculator) and read the tax from the dense table
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
 
     Returns:
         TaxResult with federal tax details
@@ -28,34 +40,31 @@ def calculate_federal_tax(income: float, deductions: float = 0.0, marital_status
     result.gross_income = income
     result.total_deductions = deductions
 
-    # Select appropriate brackets based on marital status
-    if marital_status == 'married':
-        brackets = FEDERAL_TAX_BRACKETS_MARRIED
-    else:
-        brackets = FEDERAL_TAX_BRACKETS
+    # Select appropriate brackets based on marital status and tax year
+    bundle = get_bundle(tax_year)
+    brackets = bundle.federal_brackets(marital_status)
+    tariff = bundle.federal(marital_status)
 
     # Calculate taxable income
     taxable_income = max(0, income - deductions)
+    if official_rounding:
+        taxable_income = round_down(taxable_income, TAXABLE_INCOME_ROUNDING)
     result.taxable_income = taxable_income
 
     if taxable_income <= 0:
         return result
 
-    # Find current bracket
-    current_bracket_index = 0
-    for i in range(len(brackets) - 1, -1, -1):
-        if taxable_income >= brackets[i]['threshold']:
-            current_bracket_index = i
-            break
+    if official_rounding:
+        # Rounded incomes are served straight from the precomputed CHF 100 table
+        federal_tax, current_bracket_index = income_table(tariff).lookup(taxable_income)
+    else:
+        # Find current bracket (last threshold <= taxable income), then apply
+        # base_tax + (excess_income / 100) × rate_per_hundred
+        current_bracket_index = tariff.locate(taxable_income)
+        federal_tax = tariff.evaluate(taxable_income, current_bracket_index)
 
-    current_bracket = brackets[current_bracket_index]
     result.federal_bracket_index = current_bracket_index
 
-    # Calculate total tax using Swiss federal formula
-    excess_income = taxable_income - current_bracket['threshold']
-    tax_on_excess = (excess_income / 100) * current_bracket['rate_per_hundred']
-    federal_tax = current_bracket['base_tax'] + tax_on_excess
-
     result.federal_tax = federal_tax
 
     # Calculate effective rate (based on ORIGINAL income, not taxable income)
@@ -63,26 +72,28 @@ def calculate_federal_tax(income: float, deductions: float = 0.0, marital_status
         result.federal_effective_rate = (federal_tax / income) * 100
 
     # Marginal rate is the rate per hundred at current bracket
-    result.federal_marginal_rate = current_bracket['rate_per_hundred']
+    result.federal_marginal_rate = tariff.rates[current_bracket_index]
 
     # Calculate progress within current bracket
-    if current_bracket_index + 1 < len(brackets):
-        next_bracket = brackets[current_bracket_index + 1]
-        bracket_range = next_bracket['threshold'] - current_bracket['threshold']
-        position_in_bracket = taxable_income - current_bracket['threshold']
+    if current_bracket_index + 1 < len(tariff):
+        bracket_start = tariff.thresholds[current_bracket_index]
+        next_threshold = tariff.thresholds[current_bracket_index + 1]
+        bracket_range = next_threshold - bracket_start
+        position_in_bracket = taxable_income - bracket_start
         result.progress_in_bracket = (position_in_bracket / bracket_range) * 100 if bracket_range > 0 else 0
-        result.amount_to_next_bracket = next_bracket['threshold'] - taxable_income
+        result.amount_to_next_bracket = next_threshold - taxable_income
     else:
         result.progress_in_bracket = 100  # At top bracket
         result.amount_to_next_bracket = 0
 
-    # Calculate breakdown for each bracket
-    result.federal_breakdown = get_federal_bracket_breakdown(taxable_income, current_bracket_index, brackets)
+    # Breakdown for each bracket, built only when something reads it (from
+    # this bundle's brackets, so a later swap cannot make it disagree with the totals)
+    result.federal_breakdown = LazyBreakdown(get_federal_bracket_breakdown, taxable_income, current_bracket_index, brackets)
 
     return result
 
 
-def get_federal_bracket_breakdown(income: float, current_bracket_index: int, brackets: List[Dict]) -> List[Dict]:
+def get_federal_bracket_breakdown(income: float, current_bracket_index: int, brackets: Sequence[Dict]) -> List[Dict]:
     """
     Calculate how much tax is paid in each bracket.
 
@@ -129,3 +140,66 @@ def get_federal_bracket_breakdown(income: float, current_bracket_index: int, bra
             })
 
     return breakdown
+
+
+def calculate_federal_tax_batch(incomes, deductions=0.0, marital_status='single',
+                                official_rounding: bool = False, tax_year: int = None) -> Dict[str, np.ndarray]:
+    """
+    Vectorized version of calculate_federal_tax for many incomes at once.
+
+    Brackets are located with np.searchsorted on both the single and married
+    compiled tariffs; each row then picks the one matching its marital status. The
+    numbers are identical to calling calculate_federal_tax row by row.
+
+    Args:
+        incomes: Array of gross annual incomes
+        deductions: Array of total deductions (or a scalar applied to all rows)
+        marital_status: Array of 'single'/'married' (or a scalar for all rows)
+        official_rounding: Round taxable income down to full CHF 100 per row
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+
+    Returns:
+        Dictionary of arrays keyed like the TaxResult fields: taxable_income,
+        federal_tax, federal_effective_rate, federal_marginal_rate,
+        federal_bracket_index, progress_in_bracket, amount_to_next_bracket
+    """
+    incomes, deductions, marital_status = np.broadcast_arrays(
+        np.asarray(incomes, dtype=float),
+        np.asarray(deductions, dtype=float),
+        np.asarray(marital_status),
+    )
+    married = marital_status == 'married'
+
+    taxable_income = np.maximum(0.0, incomes - deductions)
+    if official_rounding:
+        taxable_income = round_down_array(taxable_income, TAXABLE_INCOME_ROUNDING)
+    has_tax = taxable_income > 0
+
+    # Same rule as the scalar path: last bracket with taxable >= threshold
+    bundle = get_bundle(tax_year)
+    tariffs = evaluate_by_marital_status(bundle.federal_single, bundle.federal_married, taxable_income, married)
+    bracket_index = tariffs['bracket_index']
+    thresholds = tariffs['thresholds']
+    rates = tariffs['rates']
+    next_thresholds = tariffs['next_thresholds']
+    federal_tax = tariffs['tax']
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        effective_rate = np.where(incomes > 0, federal_tax / incomes * 100, 0.0)
+        bracket_range = next_thresholds - thresholds
+        progress = np.where(bracket_range > 0, (taxable_income - thresholds) / bracket_range * 100, 0.0)
+
+    is_top = np.isnan(next_thresholds)
+    progress = np.where(is_top, 100.0, progress)
+    amount_to_next = np.where(is_top, 0.0, next_thresholds - taxable_income)
+
+    # Zero taxable income keeps the TaxResult defaults, as in the scalar path
+    return {
+        'taxable_income': taxable_income,
+        'federal_tax': np.where(has_tax, federal_tax, 0.0),
+        'federal_effective_rate': np.where(has_tax, effective_rate, 0.0),
+        'federal_marginal_rate': np.where(has_tax, rates, 0.0),
+        'federal_bracket_index': np.where(has_tax, bracket_index, 0),
+        'progress_in_bracket': np.where(has_tax, progress, 0.0),
+        'amount_to_next_bracket': np.where(has_tax, amount_to_next, 0.0),
+    }
@@ -0,0 +1,353 @@
+"""
+Fixed-Point Tax Calculation
+Integer centimes (Rappen) and rates in parts per 10,000, with the official
+rounding steps, for results that reconcile exactly with official assessments
+"""
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict
+import numpy as np
+from models.constants import (
+    TAXABLE_INCOME_ROUNDING,
+    TAXABLE_WEALTH_ROUNDING,
+    TAX_AMOUNT_ROUNDING_RAPPEN,
+)
+from models.tax_data import UserProfile, DeductionResult
+from calculations import tariff as compiled
+from calculations.deductions import get_adjusted_deductions_for_tax_type
+from calculations.registry import TARIFF_REGISTRY, TariffBundle, get_bundle
+from calculations.church_tax import church_multipliers_batch, profile_church_multiplier
+from calculations.municipalities import profile_steuerfuss
+
+RATE_SCALE = 10_000    # Rates are stored as integer parts per 10,000
+BASIS_POINTS_PER_PERCENT = 100   # Church Steuerfüsse are carried in basis points (0.01%)
+CENTIMES_PER_CHF = 100
+
+INCOME_ROUNDING_CENTIMES = TAXABLE_INCOME_ROUNDING * CENTIMES_PER_CHF
+WEALTH_ROUNDING_CENTIMES = TAXABLE_WEALTH_ROUNDING * CENTIMES_PER_CHF
+
+
+def to_centimes(amount) -> int:
+    """CHF amount to integer centimes (nearest centime)."""
+    return int(round(amount * CENTIMES_PER_CHF))
+
+
+def to_centimes_array(amounts) -> np.ndarray:
+    """Vectorized to_centimes() returning int64."""
+    return np.rint(np.asarray(amounts, dtype=float) * CENTIMES_PER_CHF).astype(np.int64)
+
+
+def steuerfuss_percent(steuerfuss: float) -> int:
+    """Steuerfuss in percent as an integer (fixed-point mode needs whole percents)."""
+    percent = round(steuerfuss)
+    if abs(steuerfuss - percent) > 1e-9:
+        raise ValueError(f"Steuerfuss {steuerfuss} is not a whole percent")
+    return int(percent)
+
+
+def steuerfuss_basis_points(steuerfuss: float) -> int:
+    """
+    Steuerfuss in basis points (0.01%) as an integer.
+
+    Household church Steuerfüsse are not whole percents: a mixed-denomination
+    couple pays the mean of two parishes, e.g. (10 + 11) / 2 = 10.5%.
+    """
+    basis_points = round(steuerfuss * BASIS_POINTS_PER_PERCENT)
+    if abs(steuerfuss * BASIS_POINTS_PER_PERCENT - basis_points) > 1e-6:
+        raise ValueError(f"Steuerfuss {steuerfuss} is not a multiple of 0.01%")
+    return int(basis_points)
+
+
+def steuerfuss_basis_points_array(steuerfuss) -> np.ndarray:
+    """Vectorized steuerfuss_basis_points() returning int64."""
+    scaled = np.asarray(steuerfuss, dtype=float) * BASIS_POINTS_PER_PERCENT
+    basis_points = np.rint(scaled)
+    if np.any(np.abs(scaled - basis_points) > 1e-6):
+        raise ValueError("Steuerfuss is not a multiple of 0.01%")
+    return basis_points.astype(np.int64)
+
+
+def apply_steuerfuss_basis_points(einfache_centimes, basis_points):
+    """
+    einfache × Steuerfuss (in basis points) / 10,000, rounded to the nearest 5 Rappen (half up).
+
+    Works on Python ints and int64 arrays alike.
+    """
+    step = TAX_AMOUNT_ROUNDING_RAPPEN * CENTIMES_PER_CHF * BASIS_POINTS_PER_PERCENT   # basis point × 5 Rappen
+    return (einfache_centimes * basis_points + step // 2) // step * TAX_AMOUNT_ROUNDING_RAPPEN
+
+
+def apply_steuerfuss(einfache_centimes, percent):
+    """
+    einfache × Steuerfuss / 100, rounded to the nearest 5 Rappen (half up).
+
+    Works on Python ints and int64 arrays alike.
+    """
+    return apply_steuerfuss_basis_points(einfache_centimes, percent * BASIS_POINTS_PER_PERCENT)
+
+
+class FixedPointTariff:
+    """
+    CompiledTariff converted to integers.
+
+    Thresholds and base tax in centimes, rates in parts per 10,000:
+    tax = base_tax[i] + (amount - thresholds[i]) × rates[i] // 10,000
+    Conversion is checked to be exact (every tariff in constants.py is).
+    """
+
+    __slots__ = ('name', 'thresholds', 'base_tax', 'rates', 'threshold_array', 'base_tax_array', 'rate_array')
+
+    def __init__(self, tariff: 'compiled.CompiledTariff'):
+        self.name = tariff.name
+        self.thresholds = tuple(self._exact(t * CENTIMES_PER_CHF, 'threshold') for t in tariff.thresholds)
+        self.base_tax = tuple(self._exact(b * CENTIMES_PER_CHF, 'base tax') for b in tariff.base_tax)
+        self.rates = tuple(self._exact(r * RATE_SCALE / tariff.divisor, 'rate') for r in tariff.rates)
+
+        self.threshold_array = np.array(self.thresholds, dtype=np.int64)
+        self.base_tax_array = np.array(self.base_tax, dtype=np.int64)
+        self.rate_array = np.array(self.rates, dtype=np.int64)
+        for array in (self.threshold_array, self.base_tax_array, self.rate_array):
+            array.flags.writeable = False
+
+    def _exact(self, value: float, what: str) -> int:
+        integer = round(value)
+        if abs(value - integer) > 1e-6:
+            raise ValueError(f"Tariff '{self.name}': {what} {value} is not an integer in fixed-point units")
+        return int(integer)
+
+    def evaluate(self, amount: int) -> int:
+        """Tax in centimes on an amount in centimes."""
+        i = max(bisect_right(self.thresholds, amount) - 1, 0)
+        return self.base_tax[i] + (amount - self.thresholds[i]) * self.rates[i] // RATE_SCALE
+
+    def evaluate_array(self, amounts: np.ndarray) -> np.ndarray:
+        """Vectorized evaluate() on int64 arrays."""
+        i = np.maximum(np.searchsorted(self.threshold_array, amounts, side='right') - 1, 0)
+        return self.base_tax_array[i] + (amounts - self.threshold_array[i]) * self.rate_array[i] // RATE_SCALE
+
+    def __repr__(self) -> str:
+        return f"FixedPointTariff({self.name!r}, {len(self.thresholds)} brackets)"
+
+
+FEDERAL_SINGLE = FixedPointTariff(compiled.FEDERAL_SINGLE)
+FEDERAL_MARRIED = FixedPointTariff(compiled.FEDERAL_MARRIED)
+ZURICH_SINGLE = FixedPointTariff(compiled.ZURICH_SINGLE)
+ZURICH_MARRIED = FixedPointTariff(compiled.ZURICH_MARRIED)
+WEALTH_SINGLE = FixedPointTariff(compiled.WEALTH_SINGLE)
+WEALTH_MARRIED = FixedPointTariff(compiled.WEALTH_MARRIED)
+
+_TARIFF_NAMES = ('federal_single', 'federal_married', 'zurich_single', 'zurich_married',
+                 'wealth_single', 'wealth_married')
+
+
+@lru_cache(maxsize=16)
+def fixed_tariffs(bundle: TariffBundle) -> Dict[str, FixedPointTariff]:
+    """The six tariffs of a bundle in fixed point, keyed like the bundle fields (converted once per bundle)."""
+    defaults = dict(zip(_TARIFF_NAMES, (FEDERAL_SINGLE, FEDERAL_MARRIED, ZURICH_SINGLE, ZURICH_MARRIED,
+                                        WEALTH_SINGLE, WEALTH_MARRIED)))
+    tariffs = {}
+    for name in _TARIFF_NAMES:
+        source = getattr(bundle, name)
+        default = defaults[name]
+        tariffs[name] = default if source is getattr(compiled, name.upper()) else FixedPointTariff(source)
+    return tariffs
+
+
+def _on_tariff_swap(tax_year: int, old: TariffBundle, new: TariffBundle):
+    """Registry listener: drop converted tariffs, whose keys would keep replaced bundles alive."""
+    fixed_tariffs.cache_clear()
+
+
+TARIFF_REGISTRY.add_listener(_on_tariff_swap)
+
+
+def _round_down(amount: int, step: int) -> int:
+    return amount // step * step
+
+
+def calculate_taxes_fixed(income: int, federal_deductions: int = 0, cantonal_deductions: int = 0,
+                          marital_status: str = 'single', gemeinde_steuerfuss: int = 119,
+                          religious_affiliation: str = 'none', total_wealth: int = 0,
+                          number_of_children: int = 0, tax_year: int = None,
+                          church_multiplier: float = None) -> Dict[str, int]:
+    """
+    All taxes in integer centimes, following the official rounding steps.
+
+    1. Taxable income rounded down to CHF 100, taxable wealth to CHF 1,000
+    2. Einfache Steuer / federal tax from the integer tariffs (exact in centimes)
+    3. Every Steuerfuss application (canton, municipality, church) rounded to 5 Rappen;
+       the church Steuerfuss is carried in basis points (spouse split: e.g. 10.5%)
+
+    Args:
+        income: Gross income in centimes
+        federal_deductions: Deductions for federal taxable income in centimes
+        cantonal_deductions: Deductions for cantonal taxable income in centimes
+        marital_status: 'single' or 'married'
+        gemeinde_steuerfuss: Municipal tax multiplier (integer percent)
+        religious_affiliation: 'none', 'reformed', 'catholic', 'christian-catholic'
+        total_wealth: Net wealth in centimes
+        number_of_children: Number of children (wealth deduction)
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+        church_multiplier: Household church multiplier (parish / spouse split, see
+                           household_church_multiplier); default: the cantonal multiplier
+
+    Returns:
+        Dictionary of integer centime amounts, keyed like the TaxResult fields
+        (total_tax excludes federal tax, as in TaxResult)
+    """
+    bundle = get_bundle(tax_year)
+    tariffs = fixed_tariffs(bundle)
+    status = 'married' if marital_status == 'married' else 'single'
+    cantonal_percent = steuerfuss_percent(bundle.cantonal_steuerfuss)
+    municipal_percent = steuerfuss_percent(gemeinde_steuerfuss)
+    if church_multiplier is None:
+        church_multiplier = bundle.church_tax_multipliers.get(religious_affiliation, 0)
+    church_basis_points = steuerfuss_basis_points(church_multiplier * 100)
+
+    federal_taxable = _round_down(max(0, income - federal_deductions), INCOME_ROUNDING_CENTIMES)
+    federal_tax = tariffs['federal_' + status].evaluate(federal_taxable)
+
+    taxable_income = _round_down(max(0, income - cantonal_deductions), INCOME_ROUNDING_CENTIMES)
+    einfache = tariffs['zurich_' + status].evaluate(taxable_income)
+    cantonal_tax = apply_steuerfuss(einfache, cantonal_percent)
+    municipal_tax = apply_steuerfuss(einfache, municipal_percent)
+    church_tax = apply_steuerfuss_basis_points(einfache, church_basis_points) if income > 0 else 0
+    personalsteuer = to_centimes(bundle.personalsteuer) if taxable_income > 0 else 0
+
+    wealth_tax = 0
+    if total_wealth > 0:
+        deductions = number_of_children * to_centimes(bundle.wealth_deduction_per_child)
+        taxable_wealth = _round_down(max(0, total_wealth - deductions), WEALTH_ROUNDING_CENTIMES)
+        einfache_wealth = tariffs['wealth_' + status].evaluate(taxable_wealth)
+        wealth_tax = apply_steuerfuss(einfache_wealth, cantonal_percent) + apply_steuerfuss(einfache_wealth, municipal_percent)
+
+    return {
+        'taxable_income': taxable_income,
+        'federal_tax': federal_tax,
+        'einfache_staatssteuer': einfache,
+        'cantonal_tax': cantonal_tax,
+        'municipal_tax': municipal_tax,
+        'personalsteuer': personalsteuer,
+        'church_tax': church_tax,
+        'wealth_tax': wealth_tax,
+        'total_tax': cantonal_tax + municipal_tax + personalsteuer + church_tax + wealth_tax,
+    }
+
+
+def calculate_complete_taxes_fixed(income: float, deductions: float, profile: UserProfile,
+                                   deduction_result: DeductionResult = None, tax_year: int = None) -> Dict[str, int]:
+    """
+    Fixed-point counterpart of calculate_complete_taxes (CHF inputs, centime outputs).
+
+    Args:
+        income: Gross income in CHF
+        deductions: Total deductions in CHF
+        profile: User profile
+        deduction_result: Optional DeductionResult for the federal/cantonal commuting caps
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+
+    Returns:
+        Dictionary of integer centime amounts (see calculate_taxes_fixed)
+    """
+    if deduction_result is not None:
+        federal_deductions = get_adjusted_deductions_for_tax_type(deduction_result, 'federal',
+                                                                  total_to_adjust=deductions, tax_year=tax_year)
+        cantonal_deductions = get_adjusted_deductions_for_tax_type(deduction_result, 'cantonal',
+                                                                   total_to_adjust=deductions, tax_year=tax_year)
+    else:
+        federal_deductions = cantonal_deductions = deductions
+
+    return calculate_taxes_fixed(
+        to_centimes(income),
+        to_centimes(federal_deductions),
+        to_centimes(cantonal_deductions),
+        profile.marital_status,
+        profile_steuerfuss(profile, tax_year),
+        profile.religious_affiliation,
+        to_centimes(profile.total_wealth),
+        profile.num_children,
+        tax_year,
+        profile_church_multiplier(profile, tax_year),
+    )
+
+
+def calculate_taxes_fixed_batch(income, federal_deductions=0, cantonal_deductions=0, marital_status='single',
+                                gemeinde_steuerfuss=119, religious_affiliation='none', total_wealth=0,
+                                number_of_children=0, tax_year: int = None, spouse2_religious_affiliation=None,
+                                municipality=None) -> Dict[str, np.ndarray]:
+    """
+    Vectorized calculate_taxes_fixed on int64 centime arrays.
+
+    Args:
+        income: Array of gross incomes in centimes
+        federal_deductions: Federal deductions in centimes (array or scalar)
+        cantonal_deductions: Cantonal deductions in centimes (array or scalar)
+        marital_status: Array of marital statuses (or a scalar)
+        gemeinde_steuerfuss: Municipal tax multipliers as integer percent (array or scalar)
+        religious_affiliation: Array of denominations (or a scalar)
+        total_wealth: Net wealth in centimes (array or scalar)
+        number_of_children: Number of children (array or scalar)
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+        spouse2_religious_affiliation: Array of spouse-2 denominations (None / NaN: same as spouse 1)
+        municipality: Array of municipality names for the parish Steuerfüsse (None: cantonal multipliers)
+
+    Returns:
+        Dictionary of int64 arrays, same keys as calculate_taxes_fixed
+    """
+    income, federal_deductions, cantonal_deductions, total_wealth, number_of_children, gemeinde_steuerfuss = (
+        np.broadcast_arrays(
+            np.asarray(income, dtype=np.int64),
+            np.asarray(federal_deductions, dtype=np.int64),
+            np.asarray(cantonal_deductions, dtype=np.int64),
+            np.asarray(total_wealth, dtype=np.int64),
+            np.asarray(number_of_children, dtype=np.int64),
+            np.asarray(gemeinde_steuerfuss, dtype=np.int64),
+        )
+    )
+    is_married = np.broadcast_to(np.asarray(marital_status) == 'married', income.shape)
+    religion = np.broadcast_to(np.asarray(religious_affiliation, dtype=object), income.shape)
+    bundle = get_bundle(tax_year)
+    tariffs = fixed_tariffs(bundle)
+    cantonal_percent = steuerfuss_percent(bundle.cantonal_steuerfuss)
+    church_multiplier = church_multipliers_batch(
+        religion.reshape(-1),
+        spouse2_religious_affiliation,
+        np.broadcast_to(np.asarray(marital_status), income.shape).reshape(-1),
+        municipality,
+        tax_year,
+    ).reshape(income.shape)
+    church_basis_points = steuerfuss_basis_points_array(church_multiplier * 100)
+
+    federal_taxable = np.maximum(income - federal_deductions, 0) // INCOME_ROUNDING_CENTIMES * INCOME_ROUNDING_CENTIMES
+    federal_tax = np.where(is_married, tariffs['federal_married'].evaluate_array(federal_taxable),
+                           tariffs['federal_single'].evaluate_array(federal_taxable))
+
+    taxable_income = np.maximum(income - cantonal_deductions, 0) // INCOME_ROUNDING_CENTIMES * INCOME_ROUNDING_CENTIMES
+    einfache = np.where(is_married, tariffs['zurich_married'].evaluate_array(taxable_income),
+                        tariffs['zurich_single'].evaluate_array(taxable_income))
+    cantonal_tax = apply_steuerfuss(einfache, cantonal_percent)
+    municipal_tax = apply_steuerfuss(einfache, gemeinde_steuerfuss)
+    church_tax = np.where(income > 0, apply_steuerfuss_basis_points(einfache, church_basis_points), 0)
+    personalsteuer = np.where(taxable_income > 0, to_centimes(bundle.personalsteuer), 0)
+
+    wealth_deductions = number_of_children * to_centimes(bundle.wealth_deduction_per_child)
+    taxable_wealth = np.maximum(total_wealth - wealth_deductions, 0) // WEALTH_ROUNDING_CENTIMES * WEALTH_ROUNDING_CENTIMES
+    einfache_wealth = np.where(is_married, tariffs['wealth_married'].evaluate_array(taxable_wealth),
+                               tariffs['wealth_single'].evaluate_array(taxable_wealth))
+    wealth_tax = np.where(
+        total_wealth > 0,
+        apply_steuerfuss(einfache_wealth, cantonal_percent) + apply_steuerfuss(einfache_wealth, gemeinde_steuerfuss),
+        0,
+    )
+
+    return {
+        'taxable_income': taxable_income,
+        'federal_tax': federal_tax,
+        'einfache_staatssteuer': einfache,
+        'cantonal_tax': cantonal_tax,
+        'municipal_tax': municipal_tax,
+        'personalsteuer': personalsteuer,
+        'church_tax': church_tax,
+        'wealth_tax': wealth_tax,
+        'total_tax': cantonal_tax + municipal_tax + personalsteuer + church_tax + wealth_tax,
+    }
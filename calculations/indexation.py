@@ -0,0 +1,197 @@
+"""
+Cold Progression Indexation
+Derives the tariff tables of a future tax year from a base year and an index
+factor, with the legal rounding of the thresholds
+"""
+import math
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
+from models.constants import (
+    INDEXED_INCOME_THRESHOLD_ROUNDING,
+    INDEXED_WEALTH_THRESHOLD_ROUNDING,
+    FEDERAL_BASE_TAX_ROUNDING_RAPPEN,
+)
+from calculations.tariff import CompiledTariff
+from calculations.registry import TariffBundle, TariffRegistry, TARIFF_REGISTRY, bundle_from_source
+
+
+def round_threshold(amount: float, step: int) -> int:
+    """Round an indexed threshold to the nearest multiple of step (halves up)."""
+    return int(math.floor(amount / step + 0.5)) * step
+
+
+def index_thresholds(thresholds: Sequence[float], factor: float, step: int) -> List[int]:
+    """
+    Index bracket thresholds by factor, each rounded to step.
+
+    Args:
+        thresholds: Ascending thresholds (the first, usually 0, stays in place if 0)
+        factor: Index factor (new index / base index, e.g. 1.02)
+        step: Rounding step (CHF 100 for income, CHF 1,000 for wealth)
+
+    Returns:
+        List of indexed thresholds
+    """
+    indexed = [round_threshold(t * factor, step) for t in thresholds]
+    if any(b <= a for a, b in zip(indexed, indexed[1:])):
+        raise ValueError(f"Index factor {factor} collapses two brackets at CHF {step} rounding")
+    return indexed
+
+
+def index_federal_brackets(brackets: Sequence[Mapping], factor: float) -> List[Dict]:
+    """
+    Index a federal (DBG Art. 36) tariff.
+
+    The progressive thresholds are indexed and rounded to CHF 100, and the
+    base tax at each threshold is recomputed from the unchanged rates
+    (rounded down to 5 Rappen, as in the published tables). The last two
+    brackets keep their meaning: a 0% cap bracket where the progressive tax
+    reaches the flat top rate (rounded down to CHF 100), and the flat top
+    bracket CHF 100 later, taxing the whole income at the top rate.
+
+    Args:
+        brackets: Federal brackets (threshold, base_tax, rate_per_hundred)
+        factor: Index factor
+
+    Returns:
+        New bracket list in the same format
+    """
+    progressive, top = brackets[:-2], brackets[-1]
+    top_rate = top['rate_per_hundred']
+    step = INDEXED_INCOME_THRESHOLD_ROUNDING
+    rounding = FEDERAL_BASE_TAX_ROUNDING_RAPPEN
+
+    thresholds = index_thresholds([b['threshold'] for b in progressive], factor, step)
+    # Rates in hundredths of a percent so base taxes accumulate in exact centimes
+    rates = [round(b['rate_per_hundred'] * 100) for b in progressive]
+
+    def accumulate(base_centimes: int, width: int, rate: int) -> int:
+        return (base_centimes + width * rate // 100) // rounding * rounding
+
+    base = [round(progressive[0]['base_tax'] * 100)]
+    for i in range(1, len(thresholds)):
+        base.append(accumulate(base[-1], thresholds[i] - thresholds[i - 1], rates[i - 1]))
+
+    # Cap: where base + (x - t) × rate equals x × top_rate
+    last_rate, last_threshold = rates[-1], thresholds[-1]
+    crossover = (last_rate * last_threshold - base[-1] * 100) / (last_rate - round(top_rate * 100))
+    cap = max(int(crossover // step) * step, last_threshold + step)
+
+    result = [
+        {'threshold': t, 'base_tax': b / 100, 'rate_per_hundred': r / 100}
+        for t, b, r in zip(thresholds, base, rates)
+    ]
+    result.append({'threshold': cap, 'base_tax': accumulate(base[-1], cap - last_threshold, last_rate) / 100,
+                   'rate_per_hundred': 0})
+    result.append({'threshold': cap + step, 'base_tax': round((cap + step) * top_rate) / 100,
+                   'rate_per_hundred': top_rate})
+    return result
+
+
+def index_rate_brackets(tariff: CompiledTariff, rate_key: str, factor: float, step: int) -> List[Dict]:
+    """
+    Index a rate-only tariff (Zurich income or wealth), returned as source brackets.
+
+    Args:
+        tariff: Compiled tariff of the base year
+        rate_key: Rate key of the source format ('rate' or 'rate_per_thousand')
+        factor: Index factor
+        step: Threshold rounding step
+
+    Returns:
+        Bracket list with indexed thresholds and unchanged rates
+    """
+    thresholds = index_thresholds(tariff.thresholds, factor, step)
+    return [{'threshold': t, rate_key: r} for t, r in zip(thresholds, tariff.rates)]
+
+
+def indexed_source(base: TariffBundle, factor: float) -> Dict:
+    """
+    Source tables of an indexed year (names as in models/constants.py).
+
+    Only the tariffs move; Steuerfuss, Personalsteuer, church multipliers
+    and deduction limits are carried over from the base year.
+    """
+    income_step = INDEXED_INCOME_THRESHOLD_ROUNDING
+    wealth_step = INDEXED_WEALTH_THRESHOLD_ROUNDING
+    return {
+        'FEDERAL_TAX_BRACKETS': index_federal_brackets(base.federal_brackets_single, factor),
+        'FEDERAL_TAX_BRACKETS_MARRIED': index_federal_brackets(base.federal_brackets_married, factor),
+        'ZURICH_TAX_BRACKETS': index_rate_brackets(base.zurich_single, 'rate', factor, income_step),
+        'ZURICH_TAX_BRACKETS_MARRIED': index_rate_brackets(base.zurich_married, 'rate', factor, income_step),
+        'WEALTH_TAX_BRACKETS_SINGLE': index_rate_brackets(base.wealth_single, 'rate_per_thousand', factor, wealth_step),
+        'WEALTH_TAX_BRACKETS_MARRIED': index_rate_brackets(base.wealth_married, 'rate_per_thousand', factor, wealth_step),
+        'CANTONAL_STEUERFUSS': base.cantonal_steuerfuss,
+        'PERSONALSTEUER': base.personalsteuer,
+        'WEALTH_DEDUCTION_PER_CHILD': base.wealth_deduction_per_child,
+        'CHURCH_TAX_MULTIPLIERS': base.church_tax_multipliers,
+        **base.limits,
+    }
+
+
+@lru_cache(maxsize=128)
+def indexed_bundle(base: TariffBundle, factor: float, tax_year: int) -> TariffBundle:
+    """
+    Compiled bundle for tax_year, indexed from base by factor (built once per input).
+
+    Args:
+        base: Bundle of the base year
+        factor: Index factor (new index / base index)
+        tax_year: Tax year of the new bundle
+
+    Returns:
+        TariffBundle
+    """
+    version = f'{base.version}+idx{factor:.6g}'
+    return bundle_from_source(tax_year, version, indexed_source(base, factor))
+
+
+def _on_tariff_swap(tax_year: int, old: TariffBundle, new: TariffBundle):
+    """Registry listener: drop cached indexed bundles, whose keys would keep replaced base bundles alive."""
+    indexed_bundle.cache_clear()
+
+
+TARIFF_REGISTRY.add_listener(_on_tariff_swap)
+
+
+def register_indexed_year(tax_year: int, factor: float, base_year: int = None,
+                          registry: TariffRegistry = TARIFF_REGISTRY, replace: bool = False):
+    """
+    Register tax_year as base_year indexed by factor; compiled on first use.
+
+    Args:
+        tax_year: Tax year to register
+        factor: Index factor relative to base_year
+        base_year: Tax year to index from (default: DEFAULT_TAX_YEAR)
+        registry: Registry to register in
+        replace: Allow replacing an existing year
+    """
+    registry.register(tax_year, lambda: indexed_bundle(registry.get(base_year), factor, tax_year), replace)
+
+
+def register_projection(annual_index: float, years: Iterable[int], base_year: int = None,
+                        registry: TariffRegistry = TARIFF_REGISTRY, replace: bool = False) -> Tuple[int, ...]:
+    """
+    Register future years with a constant annual index change.
+
+    Every year is indexed straight from base_year by the compounded factor
+    (1 + annual_index) ** (year - base_year), so rounding does not accumulate.
+
+    Args:
+        annual_index: Yearly index change (e.g. 0.015 for 1.5%)
+        years: Tax years to register (after base_year)
+        base_year: Tax year to index from (default: DEFAULT_TAX_YEAR)
+        registry: Registry to register in
+        replace: Allow replacing existing years
+
+    Returns:
+        The registered tax years
+    """
+    base_year = base_year if base_year is not None else registry.get().tax_year
+    registered = []
+    for year in years:
+        if year <= base_year:
+            raise ValueError(f"Projected year {year} is not after base year {base_year}")
+        register_indexed_year(year, (1 + annual_index) ** (year - base_year), base_year, registry, replace)
+        registered.append(year)
+    return tuple(registered)
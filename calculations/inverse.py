@@ -0,0 +1,96 @@
+"""
+Inverse Tax Solver
+Gross income for a target tax or target net income, solved exactly on the
+piecewise-linear tariff curves (no bisection loops)
+"""
+from typing import Union
+import numpy as np
+from models.tax_data import UserProfile, DeductionResult
+from calculations.tariff_curve import TariffCurve, build_profile_tax_curve
+
+
+def solve_curve(curve: TariffCurve, targets, lower: float = 0.0) -> Union[float, np.ndarray]:
+    """
+    Smallest x >= lower with curve(x) >= target, for one or many targets.
+
+    Each segment's maximum is known in closed form (its start value or the
+    limit at its end), so a running maximum over segments plus one
+    searchsorted finds the first segment that reaches each target; the
+    crossing point inside it is a single division. This stays exact on
+    non-monotone curves such as net income, which drops at the jump into
+    the flat 11.5% federal top bracket.
+
+    Args:
+        curve: Piecewise-linear curve to invert
+        targets: Target value(s)
+        lower: Start of the search domain (income cannot be negative)
+
+    Returns:
+        Solution(s); NaN where no x reaches the target
+    """
+    target_array = np.asarray(targets, dtype=float)
+
+    # Restrict the curve to [lower, inf)
+    starts = np.concatenate([[lower], curve.breakpoints[curve.breakpoints > lower]])
+    values = curve.evaluate_array(starts)
+    slopes = np.asarray(curve.slope_at(starts))
+
+    # Segment maxima: start value or left limit at the next breakpoint
+    widths = np.diff(starts)
+    end_limits = np.append(values[:-1] + slopes[:-1] * widths, np.inf if slopes[-1] > 0 else values[-1])
+    reached = np.maximum.accumulate(np.maximum(values, end_limits))
+
+    segment = np.searchsorted(reached, target_array, side='left')
+    reachable = segment < len(starts)
+    segment = np.minimum(segment, len(starts) - 1)
+
+    start_values = values[segment]
+    segment_slopes = slopes[segment]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crossing = starts[segment] + (target_array - start_values) / segment_slopes
+    solution = np.where(start_values >= target_array, starts[segment], crossing)
+    solution = np.where(reachable, solution, np.nan)
+
+    return float(solution) if np.ndim(targets) == 0 else solution
+
+
+def gross_income_for_tax(target_tax, profile: UserProfile, deductions: float = 0.0,
+                         deduction_result: DeductionResult = None,
+                         include_federal: bool = True, tax_year: int = None) -> Union[float, np.ndarray]:
+    """
+    Lowest gross income at which the total tax reaches target_tax.
+
+    Args:
+        target_tax: Target tax (scalar or array)
+        profile: User profile (marital status, Steuerfuss, religion, wealth)
+        deductions: Total deductions
+        deduction_result: Optional DeductionResult for the federal/cantonal commuting caps
+        include_federal: Count federal tax towards the target
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+
+    Returns:
+        Gross income(s); NaN where the target cannot be reached
+    """
+    curve = build_profile_tax_curve(profile, deductions, deduction_result, include_federal, tax_year)
+    return solve_curve(curve, target_tax)
+
+
+def gross_income_for_net_income(target_net, profile: UserProfile, deductions: float = 0.0,
+                                deduction_result: DeductionResult = None,
+                                include_federal: bool = True, tax_year: int = None) -> Union[float, np.ndarray]:
+    """
+    Lowest gross income that leaves target_net after tax (gross - total tax).
+
+    Args:
+        target_net: Target income after tax (scalar or array)
+        profile: User profile (marital status, Steuerfuss, religion, wealth)
+        deductions: Total deductions
+        deduction_result: Optional DeductionResult for the federal/cantonal commuting caps
+        include_federal: Subtract federal tax as well
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+
+    Returns:
+        Gross income(s); NaN where the target cannot be reached
+    """
+    tax_curve = build_profile_tax_curve(profile, deductions, deduction_result, include_federal, tax_year)
+    return solve_curve(TariffCurve.identity() - tax_curve, target_net)
@@ -0,0 +1,195 @@
+"""
+Municipality Ranking
+Zurich municipalities with Steuerfüsse, church Steuerfüsse and postal codes,
+ranked by total Zurich tax for one profile in a single vectorized step
+"""
+import numpy as np
+import pandas as pd
+from models.tax_data import UserProfile, DeductionResult
+from calculations.registry import TARIFF_REGISTRY
+from calculations.tariff_data import load_municipalities
+from calculations.church_tax import church_multipliers_batch
+from calculations.cantonal_tax import calculate_zurich_tax
+from calculations.wealth_tax import calculate_wealth_tax
+from calculations.deductions import get_adjusted_deductions_for_tax_type
+
+# Columns returned by rank_municipalities (indexed by municipality)
+RANKING_COLUMNS = [
+    'rank',
+    'postal_code',
+    'steuerfuss',
+    'church_steuerfuss',
+    'municipal_tax',
+    'church_tax',
+    'wealth_tax',
+    'total_tax',
+    'savings',
+]
+
+
+def municipality_steuerfuesse(tax_year: int = None, municipalities: pd.DataFrame = None) -> np.ndarray:
+    """
+    Steuerfuss per dataset row, with the tax year's MUNICIPALITY_STEUERFUESSE taking precedence.
+
+    Args:
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+        municipalities: Dataset as returned by load_municipalities (default: data/municipalities.csv)
+
+    Returns:
+        Array of Steuerfüsse in dataset order
+    """
+    municipalities = load_municipalities() if municipalities is None else municipalities
+    listed = TARIFF_REGISTRY.get(tax_year).limits.get('MUNICIPALITY_STEUERFUESSE', {})
+    return np.array([listed.get(name, sf) for name, sf in zip(municipalities.index, municipalities['steuerfuss'])],
+                    dtype=float)
+
+
+def municipal_steuerfuss(municipality: str, tax_year: int = None, municipalities: pd.DataFrame = None) -> float:
+    """
+    Steuerfuss of one municipality, read from the tariff registry at call time.
+
+    The tax year's MUNICIPALITY_STEUERFUESSE takes precedence over the
+    dataset, so a hot-swapped correction applies from the next call on.
+
+    Args:
+        municipality: Municipality name
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+        municipalities: Dataset as returned by load_municipalities (default: data/municipalities.csv)
+
+    Returns:
+        Steuerfuss in percent
+
+    Raises:
+        KeyError: If the municipality is neither listed nor in the dataset
+    """
+    listed = TARIFF_REGISTRY.get(tax_year).limits.get('MUNICIPALITY_STEUERFUESSE', {})
+    if municipality in listed:
+        return float(listed[municipality])
+    municipalities = load_municipalities() if municipalities is None else municipalities
+    if municipality in municipalities.index:
+        return float(municipalities.at[municipality, 'steuerfuss'])
+    raise KeyError(f"Unknown municipality {municipality!r}")
+
+
+def profile_steuerfuss(profile, tax_year: int = None) -> float:
+    """The profile's gemeinde_steuerfuss override, else the Steuerfuss of its municipality."""
+    if profile.gemeinde_steuerfuss is not None:
+        return float(profile.gemeinde_steuerfuss)
+    return municipal_steuerfuss(profile.municipality, tax_year)
+
+
+def steuerfuesse_batch(gemeinde_steuerfuss, municipality=None, tax_year: int = None) -> np.ndarray:
+    """
+    Vectorized profile_steuerfuss.
+
+    Args:
+        gemeinde_steuerfuss: Array of Steuerfuss overrides (None / NaN: the municipality's)
+        municipality: Array of municipality names (None: overrides must all be set)
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+
+    Returns:
+        Array of Steuerfüsse
+    """
+    steuerfuss = np.array(gemeinde_steuerfuss, dtype=float)
+    missing = np.isnan(steuerfuss)
+    if missing.any():
+        if municipality is None:
+            raise ValueError("gemeinde_steuerfuss is missing and no municipality is given")
+        names, inverse = np.unique(np.asarray(municipality, dtype=object)[missing].astype(str), return_inverse=True)
+        steuerfuss[missing] = np.array([municipal_steuerfuss(name, tax_year) for name in names])[inverse]
+    return steuerfuss
+
+
+def rank_municipalities(profile: UserProfile, deduction_result: DeductionResult = None, income: float = None,
+                        tax_year: int = None, municipalities: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Total Zurich tax of a profile in every municipality, cheapest first.
+
+    Einfache Staatssteuer and einfache wealth tax do not depend on the
+    municipality, so they are computed once; each municipality only scales
+    them by its Steuerfüsse:
+    - municipal tax = einfache × Steuerfuss / 100
+    - church tax = einfache × church Steuerfuss / 100 (the parish Steuerfuss
+      of the dataset, else the cantonal CHURCH_TAX_MULTIPLIERS; split between
+      the parishes of a mixed-denomination couple)
+    - wealth tax = einfache wealth tax × (cantonal + municipal Steuerfuss) / 100
+    Cantonal tax and Personalsteuer are the same everywhere. The Steuerfüsse
+    of the tax year's MUNICIPALITY_STEUERFUESSE take precedence over the dataset.
+
+    Args:
+        profile: User profile (household, religion, wealth, current municipality)
+        deduction_result: Deductions (cantonal commuting cap applied; default: none)
+        income: Gross income (default: the profile's salaries)
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+        municipalities: Dataset as returned by load_municipalities (default: data/municipalities.csv)
+
+    Returns:
+        DataFrame indexed by municipality with RANKING_COLUMNS, sorted by
+        total_tax; savings is relative to the profile's gemeinde_steuerfuss
+        (positive = cheaper than today)
+    """
+    married = profile.marital_status == 'married'
+    if income is None:
+        income = profile.spouse1_net_salary + profile.spouse2_net_salary if married else profile.net_salary
+    municipalities = load_municipalities() if municipalities is None else municipalities
+
+    with TARIFF_REGISTRY.pinned():
+        bundle = TARIFF_REGISTRY.get(tax_year)
+        deductions = 0.0
+        if deduction_result is not None:
+            deductions = get_adjusted_deductions_for_tax_type(deduction_result, 'cantonal', tax_year=tax_year)
+
+        # Municipality-independent parts, computed once
+        zurich = calculate_zurich_tax(income, 0, deductions, profile.marital_status, tax_year=tax_year)
+        einfache = zurich.einfache_staatssteuer
+        einfache_wealth = 0.0
+        if profile.total_wealth > 0:
+            einfache_wealth = calculate_wealth_tax(profile.total_wealth, profile.num_children, 0,
+                                                   profile.marital_status, tax_year=tax_year)['einfache_wealth_tax']
+        fixed_tax = zurich.cantonal_tax + zurich.personalsteuer
+
+        steuerfuss = municipality_steuerfuesse(tax_year, municipalities)
+
+        # Household church multiplier per municipality (parish Steuerfuss, spouse split)
+        n = len(municipalities)
+        church_steuerfuss = church_multipliers_batch(
+            np.full(n, profile.religious_affiliation, dtype=object),
+            np.full(n, profile.spouse2_religious_affiliation, dtype=object),
+            np.full(n, profile.marital_status, dtype=object),
+            municipalities.index.to_numpy(dtype=object),
+            tax_year, municipalities,
+        )
+        church_steuerfuss = np.round(church_steuerfuss * 100, 10)   # Back to the listed percent
+        if income <= 0:
+            church_steuerfuss = np.zeros(n)
+
+        # One vectorized step over all municipalities
+        municipal_tax = einfache * steuerfuss / 100
+        church_tax = einfache * church_steuerfuss / 100
+        wealth_tax = einfache_wealth * (bundle.cantonal_steuerfuss + steuerfuss) / 100
+        total_tax = fixed_tax + municipal_tax + church_tax + wealth_tax
+
+        # Today's total, at the profile's own Steuerfuss
+        current_church = 0.0
+        if income > 0:
+            current_church = church_multipliers_batch(
+                [profile.religious_affiliation], [profile.spouse2_religious_affiliation], [profile.marital_status],
+                [profile.municipality], tax_year, municipalities,
+            )[0] * 100
+        current_steuerfuss = profile_steuerfuss(profile, tax_year)
+        current = (fixed_tax + einfache * current_steuerfuss / 100 + einfache * current_church / 100 +
+                   einfache_wealth * (bundle.cantonal_steuerfuss + current_steuerfuss) / 100)
+
+    order = np.argsort(total_tax, kind='stable')
+    ranking = pd.DataFrame({
+        'rank': np.arange(1, len(order) + 1),
+        'postal_code': municipalities['postal_code'].to_numpy()[order],
+        'steuerfuss': steuerfuss[order],
+        'church_steuerfuss': church_steuerfuss[order],
+        'municipal_tax': municipal_tax[order],
+        'church_tax': church_tax[order],
+        'wealth_tax': wealth_tax[order],
+        'total_tax': total_tax[order],
+        'savings': current - total_tax[order],
+    }, index=municipalities.index[order])
+    return ranking[RANKING_COLUMNS]
@@ -0,0 +1,245 @@
+"""
+Multi-Year Tax Projection
+Grows scenarios over a span of years and evaluates the whole (years × scenarios)
+grid with the batch calculator, one pass per tariff year
+"""
+from typing import Dict, Iterable, Sequence
+import numpy as np
+import pandas as pd
+from models.tax_data import UserProfile, DeductionResult
+from calculations.registry import TARIFF_REGISTRY, get_bundle
+from calculations.complete_tax import calculate_complete_taxes_batch
+from calculations.municipalities import profile_steuerfuss
+
+# Scenario columns and their defaults (one row per scenario)
+SCENARIO_DEFAULTS = {
+    'income': 0.0,                # Gross income in the first year
+    'salary_growth': 0.0,         # Yearly salary growth (0.02 = 2%)
+    'marital_status': 'single',
+    'gemeinde_steuerfuss': 119,
+    'religious_affiliation': 'none',
+    'spouse2_religious_affiliation': None,   # None: same as spouse 1
+    'municipality': 'Zürich',     # Selects the parish church Steuerfuss
+    'employment_type': 'employed',
+    'total_wealth': 0.0,          # Net wealth in the first year
+    'wealth_return': 0.0,         # Yearly return on wealth
+    'annual_savings': 0.0,        # Added to wealth at the end of every year
+    'pillar_3a': 0.0,             # Yearly Pillar 3a contribution (capped per tax year)
+    'other_deductions': 0.0,      # All other deductions, held constant
+    'commuting_pauschal': 0.0,    # Part of other_deductions subject to the commuting caps
+    'num_children': 0,            # Used when children_ages is empty (children never age out)
+    'children_ages': (),          # Ages in the first year
+}
+
+# Per-year columns returned by project_taxes
+PROJECTION_COLUMNS = [
+    'tax_year',
+    'gross_income',
+    'num_children',
+    'pillar_3a',
+    'pillar_3a_balance',
+    'total_deductions',
+    'total_wealth',
+    'federal_tax',
+    'cantonal_tax',
+    'municipal_tax',
+    'church_tax',
+    'wealth_tax',
+    'total_tax',
+    'total_tax_incl_federal',
+    'net_income',
+    'total_effective_rate',
+]
+
+
+def scenario_from_profile(profile: UserProfile, deduction_result: DeductionResult = None, **assumptions) -> Dict:
+    """
+    One scenario row from a profile and its deductions.
+
+    Child deductions and Pillar 3a are taken out of the deduction total so
+    the projection can age the children out and cap Pillar 3a per year.
+
+    Args:
+        profile: User profile (income, household, wealth, children_ages)
+        deduction_result: Deductions of the first year (optional)
+        **assumptions: Any SCENARIO_DEFAULTS key (salary_growth, wealth_return, ...)
+
+    Returns:
+        Dictionary with the SCENARIO_DEFAULTS keys
+    """
+    married = profile.marital_status == 'married'
+    scenario = dict(SCENARIO_DEFAULTS)
+    scenario.update({
+        'income': profile.spouse1_net_salary + profile.spouse2_net_salary if married else profile.net_salary,
+        'marital_status': profile.marital_status,
+        'gemeinde_steuerfuss': profile_steuerfuss(profile),
+        'religious_affiliation': profile.religious_affiliation,
+        'spouse2_religious_affiliation': profile.spouse2_religious_affiliation,
+        'municipality': profile.municipality,
+        'employment_type': profile.spouse1_employment_type if married else profile.employment_type,
+        'total_wealth': profile.total_wealth,
+        'num_children': profile.num_children,
+        'children_ages': tuple(profile.children_ages),
+    })
+    if deduction_result is not None:
+        scenario.update({
+            'pillar_3a': deduction_result.pillar_3a,
+            'other_deductions': (deduction_result.total_deductions - deduction_result.child_deductions -
+                                 deduction_result.pillar_3a),
+            'commuting_pauschal': deduction_result.commuting_pauschal,
+        })
+    scenario.update(assumptions)
+    return scenario
+
+
+def _scenario_column(scenarios: pd.DataFrame, name: str) -> np.ndarray:
+    """Scenario column (missing values filled), or its default for every scenario."""
+    default = SCENARIO_DEFAULTS[name]
+    if name in scenarios.columns:
+        column = scenarios[name]
+        return (column if default is None else column.fillna(default)).to_numpy()
+    return np.full(len(scenarios), default)
+
+
+def _children_in_year(scenarios: pd.DataFrame, offsets: np.ndarray, age_limits: np.ndarray) -> np.ndarray:
+    """(years × scenarios) number of children still below the age limit of each year."""
+    if 'children_ages' in scenarios.columns:
+        ages = [tuple(a) if isinstance(a, (list, tuple, np.ndarray)) else () for a in scenarios['children_ages']]
+    else:
+        ages = [()] * len(scenarios)
+    width = max((len(a) for a in ages), default=0)
+    age_matrix = np.full((len(ages), max(width, 1)), np.nan)
+    for i, child_ages in enumerate(ages):
+        age_matrix[i, :len(child_ages)] = child_ages
+
+    # years × scenarios × children
+    aged = age_matrix[None, :, :] + offsets[:, None, None]
+    counted = np.sum(aged < age_limits[:, None, None], axis=2)
+
+    # Scenarios without ages keep their child count
+    has_ages = np.array([len(a) > 0 for a in ages])
+    fixed = _scenario_column(scenarios, 'num_children').astype(float)
+    return np.where(has_ages[None, :], counted, fixed[None, :])
+
+
+def tariff_years(years: Sequence[int]) -> np.ndarray:
+    """
+    Tariff year used for each calendar year.
+
+    The latest registered year not after the calendar year (tariffs stay
+    frozen after the last registered year, so register indexed future years
+    first, see calculations.indexation.register_projection); years before the
+    first registered year use the first one.
+    """
+    registered = np.array(TARIFF_REGISTRY.years())
+    if not len(registered):
+        raise KeyError("No tariff years registered")
+    years = np.asarray(years)
+    index = np.searchsorted(registered, years, side='right') - 1
+    return registered[np.maximum(index, 0)]
+
+
+def project_taxes(scenarios: pd.DataFrame, years: Iterable[int]) -> pd.DataFrame:
+    """
+    Project taxes, net income and wealth for every scenario and year.
+
+    Per scenario and year k (0 = first year):
+    - income = income × (1 + salary_growth)^k
+    - wealth = W × (1 + r)^k + annual_savings × ((1 + r)^k - 1) / r
+    - children count while below CHILD_DEDUCTION_MAX_AGE
+    - deductions = other_deductions + children × CHILD_DEDUCTION_ZH + Pillar 3a
+      (capped at the year's employed / self-employed maximum)
+
+    The grid is evaluated with calculate_complete_taxes_batch once per
+    distinct tariff year (see tariff_years), not row by row.
+
+    Args:
+        scenarios: One row per scenario, columns as in SCENARIO_DEFAULTS
+                   (missing columns take the defaults)
+        years: Calendar years to project (e.g. range(2025, 2051))
+
+    Returns:
+        DataFrame indexed by (year, scenario) with PROJECTION_COLUMNS;
+        net_income = gross_income - total_tax_incl_federal
+    """
+    years = np.asarray(list(years), dtype=int)
+    n_years, n_scenarios = len(years), len(scenarios)
+    offsets = (years - years[0]).astype(float)
+    row_tariff_years = tariff_years(years)
+    bundles = {int(y): get_bundle(int(y)) for y in np.unique(row_tariff_years)}
+    year_limits = [bundles[int(y)].limits for y in row_tariff_years]
+
+    # Growth paths, years × scenarios
+    income = _scenario_column(scenarios, 'income').astype(float)
+    growth = _scenario_column(scenarios, 'salary_growth').astype(float)
+    gross_income = income[None, :] * (1 + growth[None, :]) ** offsets[:, None]
+
+    wealth = _scenario_column(scenarios, 'total_wealth').astype(float)
+    rate = _scenario_column(scenarios, 'wealth_return').astype(float)
+    savings = _scenario_column(scenarios, 'annual_savings').astype(float)
+    compound = (1 + rate[None, :]) ** offsets[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annuity = np.where(rate[None, :] != 0, (compound - 1) / rate[None, :], offsets[:, None])
+    total_wealth = wealth[None, :] * compound + savings[None, :] * annuity
+
+    age_limits = np.array([limits['CHILD_DEDUCTION_MAX_AGE'] for limits in year_limits], dtype=float)
+    child_deduction = np.array([limits['CHILD_DEDUCTION_ZH'] for limits in year_limits], dtype=float)
+    num_children = _children_in_year(scenarios, offsets, age_limits)
+
+    self_employed = _scenario_column(scenarios, 'employment_type') == 'self_employed'
+    max_3a = np.where(
+        self_employed[None, :],
+        np.array([limits['PILLAR_3A_MAX_SELF_EMPLOYED'] for limits in year_limits], dtype=float)[:, None],
+        np.array([limits['PILLAR_3A_MAX_EMPLOYED'] for limits in year_limits], dtype=float)[:, None],
+    )
+    pillar_3a = np.minimum(_scenario_column(scenarios, 'pillar_3a').astype(float)[None, :], max_3a)
+    total_deductions = (
+        _scenario_column(scenarios, 'other_deductions').astype(float)[None, :] +
+        num_children * child_deduction[:, None] +
+        pillar_3a
+    )
+
+    def flat(values) -> np.ndarray:
+        """years × scenarios (or per-scenario) values as one row per (year, scenario)."""
+        return np.broadcast_to(values, (n_years, n_scenarios)).reshape(-1)
+
+    index = pd.MultiIndex.from_product([years, scenarios.index], names=['year', 'scenario'])
+    profile_frame = pd.DataFrame({
+        'income': flat(gross_income),
+        'marital_status': flat(_scenario_column(scenarios, 'marital_status')[None, :]),
+        'gemeinde_steuerfuss': flat(_scenario_column(scenarios, 'gemeinde_steuerfuss').astype(float)[None, :]),
+        'religious_affiliation': flat(_scenario_column(scenarios, 'religious_affiliation')[None, :]),
+        'spouse2_religious_affiliation': flat(_scenario_column(scenarios, 'spouse2_religious_affiliation')[None, :]),
+        'municipality': flat(_scenario_column(scenarios, 'municipality')[None, :]),
+        'total_wealth': flat(total_wealth),
+        'num_children': flat(num_children),
+    }, index=index)
+    deduction_frame = pd.DataFrame({
+        'total_deductions': flat(total_deductions),
+        'commuting_pauschal': flat(_scenario_column(scenarios, 'commuting_pauschal').astype(float)[None, :]),
+    }, index=index)
+    row_years = flat(row_tariff_years[:, None])
+
+    # One batch pass per tariff year
+    parts = []
+    for tax_year in bundles:
+        rows = row_years == tax_year
+        parts.append(calculate_complete_taxes_batch(profile_frame[rows], deduction_frame[rows], tax_year))
+    taxes = pd.concat(parts).reindex(index)
+
+    result = pd.DataFrame({
+        'tax_year': row_years,
+        'gross_income': profile_frame['income'].to_numpy(),
+        'num_children': flat(num_children).astype(int),
+        'pillar_3a': flat(pillar_3a),
+        'pillar_3a_balance': flat(np.cumsum(pillar_3a, axis=0)),
+        'total_deductions': deduction_frame['total_deductions'].to_numpy(),
+        'total_wealth': profile_frame['total_wealth'].to_numpy(),
+    }, index=index)
+    for column in ('federal_tax', 'cantonal_tax', 'municipal_tax', 'church_tax', 'wealth_tax',
+                   'total_tax', 'total_effective_rate'):
+        result[column] = taxes[column].to_numpy()
+    result['total_tax_incl_federal'] = result['total_tax'] + result['federal_tax']
+    result['net_income'] = result['gross_income'] - result['total_tax_incl_federal']
+
+    return result[PROJECTION_COLUMNS]
@@ -0,0 +1,324 @@
+"""
+Tariff Registry
+Compiled, read-only tariff and limit bundles per tax year, built once on first use
+"""
+import contextvars
+import threading
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+from models import constants
+from calculations import tariff as compiled
+from calculations.tariff import CompiledTariff
+
+
+# Deduction limits and multipliers carried per year (names as in models/constants.py)
+LIMIT_NAMES = (
+    'MUNICIPALITY_STEUERFUESSE',
+    'PILLAR_3A_MAX_EMPLOYED',
+    'PILLAR_3A_MAX_SELF_EMPLOYED',
+    'COMMUTING_PAUSCHAL',
+    'COMMUTING_MAX_FEDERAL',
+    'COMMUTING_MAX_CANTONAL',
+    'MEAL_COSTS_WITH_SUBSIDY',
+    'MEAL_COSTS_WITHOUT_SUBSIDY',
+    'PROFESSIONAL_EXPENSES_RATE',
+    'PROFESSIONAL_EXPENSES_MAX',
+    'SIDE_INCOME_DEDUCTION_MIN',
+    'SIDE_INCOME_DEDUCTION_RATE',
+    'SIDE_INCOME_DEDUCTION_MAX',
+    'PROPERTY_MAINTENANCE_PAUSCHAL',
+    'ASSET_MANAGEMENT_RATE',
+    'ASSET_MANAGEMENT_MAX',
+    'CHILD_DEDUCTION_ZH',
+    'CHILD_DEDUCTION_MAX_AGE',
+    'DUAL_INCOME_DEDUCTION_ZH',
+    'CHILDCARE_MAX',
+    'INSURANCE_LIMITS_ZH',
+    'DEBT_INTEREST_MAX',
+    'DONATIONS_MAX_RATE',
+    'POLITICAL_CONTRIB_MAX_SINGLE',
+    'POLITICAL_CONTRIB_MAX_MARRIED',
+    'SUPPORT_PAYMENT_MIN',
+    'SUPPORT_PAYMENT_MIN_ZH',
+    'MEDICAL_COSTS_DEDUCTIBLE_RATE',
+)
+
+
+def _freeze(value: Any) -> Any:
+    """Read-only copy of bracket lists and limit dicts."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+@dataclass(frozen=True, eq=False)
+class TariffBundle:
+    """
+    Everything the calculators read for one tax year.
+
+    Tariffs are compiled once; bracket lists and limits are read-only
+    (tuples and mapping proxies), so a bundle can be shared between
+    threads and batch shards. Bundles compare and hash by identity, so
+    they can key caches of derived data.
+    """
+    tax_year: int
+    version: str
+
+    federal_single: CompiledTariff
+    federal_married: CompiledTariff
+    zurich_single: CompiledTariff
+    zurich_married: CompiledTariff
+    wealth_single: CompiledTariff
+    wealth_married: CompiledTariff
+
+    # Source brackets (for the federal per-bracket breakdown)
+    federal_brackets_single: Tuple[Mapping, ...]
+    federal_brackets_married: Tuple[Mapping, ...]
+
+    cantonal_steuerfuss: float
+    personalsteuer: float
+    wealth_deduction_per_child: float
+    church_tax_multipliers: Mapping[str, float]
+    limits: Mapping[str, Any]
+
+    def federal(self, marital_status: str) -> CompiledTariff:
+        """Federal tariff (Art. 36 Abs. 1 or 2 DBG) for a marital status."""
+        return self.federal_married if marital_status == 'married' else self.federal_single
+
+    def federal_brackets(self, marital_status: str) -> Tuple[Mapping, ...]:
+        """Federal source brackets for a marital status."""
+        return self.federal_brackets_married if marital_status == 'married' else self.federal_brackets_single
+
+    def zurich(self, marital_status: str) -> CompiledTariff:
+        """Zurich income tariff (StG § 35 Abs. 1 or 2) for a marital status."""
+        return self.zurich_married if marital_status == 'married' else self.zurich_single
+
+    def wealth(self, marital_status: str) -> CompiledTariff:
+        """Zurich wealth tariff for a marital status."""
+        return self.wealth_married if marital_status == 'married' else self.wealth_single
+
+
+def bundle_from_source(tax_year: int, version: str, source: Dict[str, Any]) -> TariffBundle:
+    """
+    Compile a bundle from raw tables named like the constants in models/constants.py.
+
+    Args:
+        tax_year: Tax year of the tables
+        version: Version tag (part of every cache key)
+        source: Mapping with FEDERAL_TAX_BRACKETS(_MARRIED), ZURICH_TAX_BRACKETS(_MARRIED),
+                WEALTH_TAX_BRACKETS_SINGLE/MARRIED, CANTONAL_STEUERFUSS, PERSONALSTEUER,
+                WEALTH_DEDUCTION_PER_CHILD, CHURCH_TAX_MULTIPLIERS and the LIMIT_NAMES entries
+
+    Returns:
+        TariffBundle
+    """
+    suffix = f'_{tax_year}'
+    return TariffBundle(
+        tax_year=tax_year,
+        version=version,
+        federal_single=CompiledTariff.from_base_tax_brackets('federal_single' + suffix, source['FEDERAL_TAX_BRACKETS']),
+        federal_married=CompiledTariff.from_base_tax_brackets('federal_married' + suffix, source['FEDERAL_TAX_BRACKETS_MARRIED']),
+        zurich_single=CompiledTariff.from_rate_brackets('zurich_single' + suffix, source['ZURICH_TAX_BRACKETS'], 'rate', 100),
+        zurich_married=CompiledTariff.from_rate_brackets('zurich_married' + suffix, source['ZURICH_TAX_BRACKETS_MARRIED'], 'rate', 100),
+        wealth_single=CompiledTariff.from_rate_brackets('wealth_single' + suffix, source['WEALTH_TAX_BRACKETS_SINGLE'],
+                                                        'rate_per_thousand', 1000),
+        wealth_married=CompiledTariff.from_rate_brackets('wealth_married' + suffix, source['WEALTH_TAX_BRACKETS_MARRIED'],
+                                                         'rate_per_thousand', 1000),
+        **_bundle_fields(source),
+    )
+
+
+def _bundle_fields(source: Dict[str, Any]) -> Dict[str, Any]:
+    """Non-tariff bundle fields from a source mapping."""
+    return {
+        'federal_brackets_single': _freeze(source['FEDERAL_TAX_BRACKETS']),
+        'federal_brackets_married': _freeze(source['FEDERAL_TAX_BRACKETS_MARRIED']),
+        'cantonal_steuerfuss': source['CANTONAL_STEUERFUSS'],
+        'personalsteuer': source['PERSONALSTEUER'],
+        'wealth_deduction_per_child': source['WEALTH_DEDUCTION_PER_CHILD'],
+        'church_tax_multipliers': _freeze(source['CHURCH_TAX_MULTIPLIERS']),
+        'limits': _freeze({name: source[name] for name in LIMIT_NAMES if name in source}),
+    }
+
+
+def constants_source() -> Dict[str, Any]:
+    """The tables in models/constants.py as a source mapping."""
+    return {name: getattr(constants, name) for name in dir(constants) if name.isupper()}
+
+
+def _constants_bundle() -> TariffBundle:
+    """Bundle for DEFAULT_TAX_YEAR, reusing the tariffs compiled at import in calculations/tariff.py."""
+    return TariffBundle(
+        tax_year=constants.DEFAULT_TAX_YEAR,
+        version=constants.TARIFF_VERSION,
+        federal_single=compiled.FEDERAL_SINGLE,
+        federal_married=compiled.FEDERAL_MARRIED,
+        zurich_single=compiled.ZURICH_SINGLE,
+        zurich_married=compiled.ZURICH_MARRIED,
+        wealth_single=compiled.WEALTH_SINGLE,
+        wealth_married=compiled.WEALTH_MARRIED,
+        **_bundle_fields(constants_source()),
+    )
+
+
+class TariffRegistry:
+    """
+    Tariff bundles keyed by tax year.
+
+    Years are registered with a builder; the bundle is built on first use
+    (thread-safe) and then served as is. Several years can be evaluated
+    side by side in one process. A built year can be replaced atomically
+    with swap(); code that reads a year several times per request runs
+    inside pinned() so it never mixes two versions.
+    """
+
+    def __init__(self):
+        self._builders: Dict[int, Callable[[], TariffBundle]] = {}
+        self._fallbacks = set()   # Years whose builder gives way to any later registration
+        self._bundles: Dict[int, TariffBundle] = {}
+        self._lock = threading.RLock()   # builders may read other years
+        self._listeners: List[Callable[[], Optional[Callable]]] = []
+        self._pins = contextvars.ContextVar(f'tariff_pins_{id(self)}', default=None)
+
+    def register(self, tax_year: int, builder: Callable[[], TariffBundle], replace: bool = False,
+                 fallback: bool = False):
+        """
+        Register how to build the bundle of a tax year.
+
+        Args:
+            tax_year: Tax year
+            builder: Zero-argument callable returning the TariffBundle
+            replace: Allow replacing an existing year (drops its built bundle)
+            fallback: Builder used only until another one is registered for the
+                      year (which then needs no replace)
+        """
+        with self._lock:
+            if tax_year in self._builders and not replace and tax_year not in self._fallbacks:
+                raise ValueError(f"Tax year {tax_year} is already registered")
+            self._builders[tax_year] = builder
+            self._bundles.pop(tax_year, None)
+            if fallback:
+                self._fallbacks.add(tax_year)
+            else:
+                self._fallbacks.discard(tax_year)
+
+    def register_source(self, tax_year: int, source: Dict[str, Any], version: str = None, replace: bool = False):
+        """Register raw tables (see bundle_from_source), compiled on first use."""
+        version = version or f'{tax_year}.1'
+        self.register(tax_year, lambda: bundle_from_source(tax_year, version, source), replace)
+
+    def get(self, tax_year: Optional[int] = None) -> TariffBundle:
+        """Bundle of a tax year (DEFAULT_TAX_YEAR if None), built on first use."""
+        if tax_year is None:
+            tax_year = constants.DEFAULT_TAX_YEAR
+        pins = self._pins.get()
+        if pins is not None:
+            bundle = pins.get(tax_year)
+            if bundle is None:
+                bundle = pins[tax_year] = self._get(tax_year)
+            return bundle
+        return self._get(tax_year)
+
+    def _get(self, tax_year: int) -> TariffBundle:
+        bundle = self._bundles.get(tax_year)
+        if bundle is not None:
+            return bundle
+
+        with self._lock:
+            bundle = self._bundles.get(tax_year)
+            if bundle is None:
+                builder = self._builders.get(tax_year)
+                if builder is None:
+                    raise KeyError(f"No tariffs registered for tax year {tax_year} "
+                                   f"(available: {sorted(self._builders)})")
+                bundle = builder()
+                self._bundles[tax_year] = bundle
+            return bundle
+
+    @contextmanager
+    def pinned(self) -> Iterator[None]:
+        """
+        Serve every get() in the block (same thread or task) from the bundle it first returned per year.
+
+        A swap() during the block takes effect for the next block; nested
+        blocks share the outer pins.
+        """
+        if self._pins.get() is not None:
+            yield
+            return
+        token = self._pins.set({})
+        try:
+            yield
+        finally:
+            self._pins.reset(token)
+
+    def swap(self, tax_year: int, bundle: TariffBundle) -> Optional[TariffBundle]:
+        """
+        Replace the bundle of a tax year with an already compiled one.
+
+        The new bundle is served from the next get() on (a single dict
+        assignment, so readers see either the old or the new bundle).
+        Listeners are then called with (tax_year, old, new).
+
+        Args:
+            tax_year: Tax year (registered if new)
+            bundle: Compiled bundle for the year
+
+        Returns:
+            The bundle that was served before (None if the year was not built)
+        """
+        with self._lock:
+            old = self._bundles.get(tax_year)
+            self._builders[tax_year] = lambda: bundle
+            self._fallbacks.discard(tax_year)
+            self._bundles[tax_year] = bundle
+            listeners = [ref() for ref in self._listeners]
+            self._listeners = [ref for ref, listener in zip(self._listeners, listeners) if listener is not None]
+        for listener in listeners:
+            if listener is not None:
+                listener(tax_year, old, bundle)
+        return old
+
+    def add_listener(self, listener: Callable[[int, Optional[TariffBundle], TariffBundle], None]):
+        """
+        Call listener(tax_year, old, new) after every swap().
+
+        Bound methods are held weakly, so an object (e.g. a TaxEngine)
+        stops listening once it is garbage collected.
+        """
+        if hasattr(listener, '__self__'):
+            ref = weakref.WeakMethod(listener)
+        else:
+            ref = lambda: listener   # noqa: E731
+        with self._lock:
+            self._listeners.append(ref)
+
+    def years(self) -> Tuple[int, ...]:
+        """Registered tax years, sorted."""
+        return tuple(sorted(self._builders))
+
+    def is_fallback(self, tax_year: int) -> bool:
+        """True while tax_year is served by a fallback builder (see register)."""
+        return tax_year in self._fallbacks
+
+    def is_built(self, tax_year: int) -> bool:
+        """True once the bundle of tax_year has been compiled."""
+        return tax_year in self._bundles
+
+    def __contains__(self, tax_year: int) -> bool:
+        return tax_year in self._builders
+
+
+TARIFF_REGISTRY = TariffRegistry()
+# In-code tables until data/tariffs/<year>.toml is registered (see register_data_files)
+TARIFF_REGISTRY.register(constants.DEFAULT_TAX_YEAR, _constants_bundle, fallback=True)
+
+
+def get_bundle(tax_year: Optional[int] = None) -> TariffBundle:
+    """Bundle of a tax year from the default registry (DEFAULT_TAX_YEAR if None)."""
+    return TARIFF_REGISTRY.get(tax_year)
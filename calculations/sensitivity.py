@@ -0,0 +1,143 @@
+"""
+Marginal Rates and Deduction Sensitivity
+Exact derivatives of total tax read from the active tariff segments, and the
+value of another CHF 100 of every deduction lever in one call
+"""
+from dataclasses import fields
+from typing import Dict
+import numpy as np
+from models.tax_data import UserProfile, DeductionResult
+from calculations.tariff_curve import build_component_curves
+from calculations.church_tax import profile_church_multiplier
+from calculations.municipalities import profile_steuerfuss
+from calculations.deductions import get_adjusted_deductions_for_tax_type
+from calculations.registry import get_bundle
+
+# DeductionResult fields that are totals of other fields, not levers
+_TOTAL_FIELDS = ('total_automatic', 'total_optional', 'total_deductions')
+
+# Every DeductionResult field that can be changed on its own
+DEDUCTION_LEVERS = tuple(f.name for f in fields(DeductionResult) if f.name not in _TOTAL_FIELDS)
+
+# Levers with caps or thresholds
+_COMMUTING = DEDUCTION_LEVERS.index('commuting_pauschal')
+_MEDICAL = DEDUCTION_LEVERS.index('medical_costs')
+
+
+def _lever_increments(deduction_result: DeductionResult, income: float, step: float, limits):
+    """
+    Change of federal and cantonal deductions when each lever grows by step.
+
+    Commuting costs only count up to the federal/cantonal caps; raw medical
+    costs only count above 5% of income. Every other lever counts in full.
+    The caps and the threshold rate are read from the tax year's limits.
+
+    Returns:
+        Tuple of (federal increments, cantonal increments) arrays aligned with DEDUCTION_LEVERS
+    """
+    federal = np.full(len(DEDUCTION_LEVERS), float(step))
+    cantonal = np.full(len(DEDUCTION_LEVERS), float(step))
+
+    federal_cap = limits['COMMUTING_MAX_FEDERAL']
+    cantonal_cap = limits['COMMUTING_MAX_CANTONAL']
+    raw_commuting = deduction_result.commuting_pauschal if deduction_result is not None else 0.0
+    federal[_COMMUTING] = min(raw_commuting + step, federal_cap) - min(raw_commuting, federal_cap)
+    cantonal[_COMMUTING] = min(raw_commuting + step, cantonal_cap) - min(raw_commuting, cantonal_cap)
+
+    medical_costs = deduction_result.medical_costs if deduction_result is not None else 0.0
+    threshold = income * limits['MEDICAL_COSTS_DEDUCTIBLE_RATE']
+    medical_increment = max(0.0, medical_costs + step - threshold) - max(0.0, medical_costs - threshold)
+    federal[_MEDICAL] = cantonal[_MEDICAL] = medical_increment
+
+    return federal, cantonal
+
+
+def calculate_tax_sensitivity(income: float, deductions: float, profile: UserProfile,
+                              deduction_result: DeductionResult = None, include_federal: bool = True,
+                              step: float = 100.0, tax_year: int = None) -> Dict:
+    """
+    Marginal rates and the effect of every deduction lever on total tax.
+
+    Derivatives are right derivatives read from the active tariff segments
+    (no recalculation); the step values evaluate the merged tariff curves
+    once for all levers, so they stay exact across bracket boundaries.
+    Deductions are held fixed except for the medical 5% threshold, which
+    moves with income while medical costs are above it.
+
+    Args:
+        income: Gross income
+        deductions: Total deductions
+        profile: User profile
+        deduction_result: Optional DeductionResult (commuting caps, medical costs)
+        include_federal: Count federal tax (TaxResult.total_tax excludes it)
+        step: Lever increment for the savings figures (default: another CHF 100)
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+
+    Returns:
+        Dictionary with:
+        - federal_marginal_rate / cantonal_marginal_rate / combined_marginal_rate:
+          percent of the next franc of taxable income (cantonal includes
+          municipal and church tax)
+        - income_derivative: d total tax / d gross income
+        - deduction_derivatives: {lever: d total tax / d lever} (negative = saves tax)
+        - savings_per_step: {lever: tax saved by another step of the lever}
+        - tax_per_step_income: extra tax on another step of gross income
+    """
+    limits = get_bundle(tax_year).limits
+    medical_rate = limits['MEDICAL_COSTS_DEDUCTIBLE_RATE']
+
+    if deduction_result is not None:
+        federal_deductions = get_adjusted_deductions_for_tax_type(deduction_result, 'federal',
+                                                                  total_to_adjust=deductions, tax_year=tax_year)
+        cantonal_deductions = get_adjusted_deductions_for_tax_type(deduction_result, 'cantonal',
+                                                                   total_to_adjust=deductions, tax_year=tax_year)
+    else:
+        federal_deductions = cantonal_deductions = deductions
+
+    federal, zurich = build_component_curves(
+        profile.marital_status, profile_steuerfuss(profile, tax_year), profile.religious_affiliation,
+        federal_deductions, cantonal_deductions, tax_year, profile_church_multiplier(profile, tax_year)
+    )
+    federal_weight = 1.0 if include_federal else 0.0
+
+    # Active segment slopes at the current income
+    federal_slope = federal.slope_at(income) * federal_weight
+    cantonal_slope = zurich.slope_at(income)
+
+    # The medical threshold moves with income while it binds
+    medical_costs = deduction_result.medical_costs if deduction_result is not None else 0.0
+    medical_binds = medical_costs > income * medical_rate
+    income_factor = 1.0 + (medical_rate if medical_binds else 0.0)
+
+    # Right derivatives: a capped lever stops counting once it reaches its cap
+    unit_federal = np.ones(len(DEDUCTION_LEVERS))
+    unit_cantonal = np.ones(len(DEDUCTION_LEVERS))
+    raw_commuting = deduction_result.commuting_pauschal if deduction_result is not None else 0.0
+    unit_federal[_COMMUTING] = float(raw_commuting < limits['COMMUTING_MAX_FEDERAL'])
+    unit_cantonal[_COMMUTING] = float(raw_commuting < limits['COMMUTING_MAX_CANTONAL'])
+    unit_federal[_MEDICAL] = unit_cantonal[_MEDICAL] = float(medical_costs >= income * medical_rate)
+    derivatives = -(unit_federal * federal_slope + unit_cantonal * cantonal_slope)
+
+    # Another step of every lever: one vectorized evaluation per curve
+    step_federal, step_cantonal = _lever_increments(deduction_result, income, step, limits)
+    base_tax = federal(income) * federal_weight + zurich(income)
+    stepped_tax = federal.evaluate_array(income - step_federal) * federal_weight + zurich.evaluate_array(income - step_cantonal)
+    savings = base_tax - stepped_tax
+
+    # A higher income also shrinks the deductible medical costs
+    medical_lost = (
+        max(0.0, medical_costs - income * medical_rate) -
+        max(0.0, medical_costs - (income + step) * medical_rate)
+    )
+    stepped_income = income + step + medical_lost
+    income_step_tax = federal(stepped_income) * federal_weight + zurich(stepped_income) - base_tax
+
+    return {
+        'federal_marginal_rate': federal_slope * 100,
+        'cantonal_marginal_rate': cantonal_slope * 100,
+        'combined_marginal_rate': (federal_slope + cantonal_slope) * 100,
+        'income_derivative': (federal_slope + cantonal_slope) * income_factor,
+        'deduction_derivatives': dict(zip(DEDUCTION_LEVERS, derivatives.tolist())),
+        'savings_per_step': dict(zip(DEDUCTION_LEVERS, savings.tolist())),
+        'tax_per_step_income': income_step_tax,
+    }
@@ -0,0 +1,276 @@
+"""
+Compiled Tax Tariffs
+Bracket lists from models/constants.py compiled once into sorted thresholds,
+cumulative base tax and marginal rates
+"""
+import math
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from models.constants import (
+    FEDERAL_TAX_BRACKETS,
+    FEDERAL_TAX_BRACKETS_MARRIED,
+    ZURICH_TAX_BRACKETS,
+    ZURICH_TAX_BRACKETS_MARRIED,
+    WEALTH_TAX_BRACKETS_SINGLE,
+    WEALTH_TAX_BRACKETS_MARRIED,
+    TAXABLE_INCOME_ROUNDING,
+    TAXABLE_WEALTH_ROUNDING,
+)
+
+# Dense lookup tables cover amounts up to these limits; above them the
+# linear formula of the top brackets is used
+DENSE_INCOME_TABLE_LIMIT = 1_000_000    # ~10k entries at CHF 100 steps
+DENSE_WEALTH_TABLE_LIMIT = 10_000_000   # ~10k entries at CHF 1,000 steps
+
+
+def _read_only(values: Sequence[float]) -> np.ndarray:
+    """Float64 array that cannot be modified after compilation."""
+    array = np.array(values, dtype=float)
+    array.flags.writeable = False
+    return array
+
+
+class CompiledTariff:
+    """
+    Progressive tariff evaluated with one bisect plus one multiply-add.
+
+    Formula: tax = base_tax[i] + (amount - thresholds[i]) / divisor × rates[i]
+    where i is the last bracket with amount >= thresholds[i].
+
+    Rates are kept in the unit of the source brackets (per hundred for the
+    federal tariff, percent for Zurich, per mille for wealth) so they can be
+    reported as marginal rates unchanged.
+    """
+
+    __slots__ = (
+        'name', 'thresholds', 'base_tax', 'rates', 'divisor',
+        'threshold_array', 'base_tax_array', 'rate_array', 'next_threshold_array',
+        '_dense_tables',
+    )
+
+    def __init__(self, name: str, thresholds: Sequence[float], base_tax: Sequence[float],
+                 rates: Sequence[float], divisor: float):
+        if not (len(thresholds) == len(base_tax) == len(rates)):
+            raise ValueError(f"Tariff '{name}': thresholds, base_tax and rates must have the same length")
+        if list(thresholds) != sorted(thresholds):
+            raise ValueError(f"Tariff '{name}': thresholds must be sorted")
+
+        self.name = name
+        self.thresholds = tuple(float(t) for t in thresholds)
+        self.base_tax = tuple(float(b) for b in base_tax)
+        self.rates = tuple(float(r) for r in rates)
+        self.divisor = float(divisor)
+
+        # Array views for the vectorized batch path
+        self.threshold_array = _read_only(self.thresholds)
+        self.base_tax_array = _read_only(self.base_tax)
+        self.rate_array = _read_only(self.rates)
+        # Threshold of the following bracket (NaN for the top bracket)
+        self.next_threshold_array = _read_only(self.thresholds[1:] + (np.nan,))
+
+        # Dense tables are built on first use, keyed by (step, limit)
+        self._dense_tables = {}
+
+    @classmethod
+    def from_base_tax_brackets(cls, name: str, brackets: List[Dict], rate_key: str = 'rate_per_hundred',
+                               divisor: float = 100) -> 'CompiledTariff':
+        """Compile brackets that already state the base tax at each threshold (federal DBG tables)."""
+        return cls(
+            name,
+            [b['threshold'] for b in brackets],
+            [b['base_tax'] for b in brackets],
+            [b[rate_key] for b in brackets],
+            divisor,
+        )
+
+    @classmethod
+    def from_rate_brackets(cls, name: str, brackets: List[Dict], rate_key: str,
+                           divisor: float) -> 'CompiledTariff':
+        """Compile rate-only brackets, accumulating the base tax owed below each threshold."""
+        thresholds = [b['threshold'] for b in brackets]
+        rates = [b[rate_key] for b in brackets]
+        base_tax = [0.0]
+        for i in range(1, len(brackets)):
+            base_tax.append(base_tax[-1] + (thresholds[i] - thresholds[i - 1]) / divisor * rates[i - 1])
+        return cls(name, thresholds, base_tax, rates, divisor)
+
+    @classmethod
+    def from_arrays(cls, name: str, thresholds: np.ndarray, base_tax: np.ndarray, rates: np.ndarray,
+                    divisor: float) -> 'CompiledTariff':
+        """Tariff over existing read-only float64 arrays (e.g. a memory-mapped snapshot), kept as the batch arrays."""
+        tariff = cls(name, thresholds.tolist(), base_tax.tolist(), rates.tolist(), divisor)
+        tariff.threshold_array, tariff.base_tax_array, tariff.rate_array = thresholds, base_tax, rates
+        return tariff
+
+    def __len__(self) -> int:
+        return len(self.thresholds)
+
+    def __repr__(self) -> str:
+        return f"CompiledTariff({self.name!r}, {len(self)} brackets)"
+
+    def locate(self, amount: float, strict: bool = False) -> int:
+        """
+        Index of the bracket containing amount.
+
+        Args:
+            amount: Taxable amount
+            strict: If True, an amount exactly on a threshold belongs to the
+                    bracket below it (amount > threshold), as in the cantonal display
+
+        Returns:
+            Bracket index (0 for amounts at or below the first threshold)
+        """
+        if strict:
+            return max(bisect_left(self.thresholds, amount) - 1, 0)
+        return max(bisect_right(self.thresholds, amount) - 1, 0)
+
+    def evaluate(self, amount: float, index: int = None) -> float:
+        """Tax on amount: one bisect plus one multiply-add (pass a non-strict index to skip the bisect)."""
+        i = self.locate(amount) if index is None else index
+        return self.base_tax[i] + ((amount - self.thresholds[i]) / self.divisor) * self.rates[i]
+
+    def locate_array(self, amounts: np.ndarray, strict: bool = False) -> np.ndarray:
+        """Vectorized locate() using np.searchsorted."""
+        side = 'left' if strict else 'right'
+        return np.maximum(np.searchsorted(self.threshold_array, amounts, side=side) - 1, 0)
+
+    def evaluate_array(self, amounts: np.ndarray, index: np.ndarray = None) -> np.ndarray:
+        """Vectorized evaluate(); pass a precomputed non-strict index to skip the search."""
+        if index is None:
+            index = self.locate_array(amounts)
+        return self.base_tax_array[index] + ((amounts - self.threshold_array[index]) / self.divisor) * self.rate_array[index]
+
+    def dense_table(self, step: int, limit: int) -> 'DenseTariffTable':
+        """Dense lookup table for amounts rounded down to multiples of step (built once, then cached)."""
+        key = (step, limit)
+        table = self._dense_tables.get(key)
+        if table is None:
+            table = DenseTariffTable(self, step, limit)
+            self._dense_tables[key] = table
+        return table
+
+
+class DenseTariffTable:
+    """
+    Tariff precomputed at every multiple of step up to limit.
+
+    Only valid for amounts that are already rounded down to a multiple of
+    step (official rounding); those are served with one O(1) array index.
+    Amounts above limit fall back to the tariff's linear formula.
+    """
+
+    __slots__ = ('tariff', 'step', 'limit', 'tax', 'bracket_index', 'strict_bracket_index')
+
+    def __init__(self, tariff: CompiledTariff, step: int, limit: int):
+        self.tariff = tariff
+        self.step = step
+        self.limit = limit
+
+        amounts = np.arange(0, limit + step, step, dtype=float)
+        index = tariff.locate_array(amounts)
+        self.tax = _read_only(tariff.evaluate_array(amounts, index))
+        self.bracket_index = index.astype(np.int16)
+        self.bracket_index.flags.writeable = False
+        self.strict_bracket_index = tariff.locate_array(amounts, strict=True).astype(np.int16)
+        self.strict_bracket_index.flags.writeable = False
+
+    def lookup(self, amount: float, strict: bool = False) -> Tuple[float, int]:
+        """
+        Tax and bracket index for an amount rounded to a multiple of step.
+
+        Args:
+            amount: Rounded taxable amount
+            strict: Report the bracket index like CompiledTariff.locate(strict=True)
+
+        Returns:
+            Tuple of (tax, bracket_index)
+        """
+        k = int(amount // self.step)
+        if k < len(self.tax):
+            index = self.strict_bracket_index[k] if strict else self.bracket_index[k]
+            return float(self.tax[k]), int(index)
+        return self.tariff.evaluate(amount), self.tariff.locate(amount, strict=strict)
+
+
+def round_down(amount: float, step: int) -> float:
+    """Round an amount down to a full multiple of step (e.g. CHF 100)."""
+    return float(math.floor(amount / step) * step)
+
+
+def round_down_array(amounts: np.ndarray, step: int) -> np.ndarray:
+    """Vectorized round_down()."""
+    return np.floor(amounts / step) * step
+
+
+# ============================================================================
+# COMPILED TARIFFS (built once at import)
+# ============================================================================
+
+FEDERAL_SINGLE = CompiledTariff.from_base_tax_brackets('federal_single', FEDERAL_TAX_BRACKETS)
+FEDERAL_MARRIED = CompiledTariff.from_base_tax_brackets('federal_married', FEDERAL_TAX_BRACKETS_MARRIED)
+
+ZURICH_SINGLE = CompiledTariff.from_rate_brackets('zurich_single', ZURICH_TAX_BRACKETS, 'rate', 100)
+ZURICH_MARRIED = CompiledTariff.from_rate_brackets('zurich_married', ZURICH_TAX_BRACKETS_MARRIED, 'rate', 100)
+
+WEALTH_SINGLE = CompiledTariff.from_rate_brackets('wealth_single', WEALTH_TAX_BRACKETS_SINGLE, 'rate_per_thousand', 1000)
+WEALTH_MARRIED = CompiledTariff.from_rate_brackets('wealth_married', WEALTH_TAX_BRACKETS_MARRIED, 'rate_per_thousand', 1000)
+
+
+def income_table(tariff: CompiledTariff) -> DenseTariffTable:
+    """Dense CHF 100 table for an income tariff (official taxable income rounding)."""
+    return tariff.dense_table(TAXABLE_INCOME_ROUNDING, DENSE_INCOME_TABLE_LIMIT)
+
+
+def wealth_table(tariff: CompiledTariff) -> DenseTariffTable:
+    """Dense CHF 1,000 table for a wealth tariff (official taxable wealth rounding)."""
+    return tariff.dense_table(TAXABLE_WEALTH_ROUNDING, DENSE_WEALTH_TABLE_LIMIT)
+
+
+def federal_tariff(marital_status: str) -> CompiledTariff:
+    """Compiled federal tariff (Art. 36 Abs. 1 or 2 DBG) for a marital status."""
+    return FEDERAL_MARRIED if marital_status == 'married' else FEDERAL_SINGLE
+
+
+def zurich_tariff(marital_status: str) -> CompiledTariff:
+    """Compiled Zurich income tariff (StG § 35 Abs. 1 or 2) for a marital status."""
+    return ZURICH_MARRIED if marital_status == 'married' else ZURICH_SINGLE
+
+
+def wealth_tariff(marital_status: str) -> CompiledTariff:
+    """Compiled Zurich wealth tariff for a marital status."""
+    return WEALTH_MARRIED if marital_status == 'married' else WEALTH_SINGLE
+
+
+def evaluate_by_marital_status(single: CompiledTariff, married: CompiledTariff, amounts: np.ndarray,
+                               is_married: np.ndarray, strict_index: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Evaluate a single/married tariff pair row by row.
+
+    Args:
+        single: Tariff for rows where is_married is False
+        married: Tariff for rows where is_married is True
+        amounts: Array of taxable amounts
+        is_married: Boolean array selecting the tariff per row
+        strict_index: Report bracket indices with locate(strict=True)
+
+    Returns:
+        Dictionary of arrays: tax, bracket_index, thresholds, rates, next_thresholds
+        (thresholds/rates/next_thresholds belong to the reported bracket)
+    """
+    single_idx = single.locate_array(amounts)
+    married_idx = married.locate_array(amounts)
+    tax = np.where(is_married, married.evaluate_array(amounts, married_idx), single.evaluate_array(amounts, single_idx))
+
+    if strict_index:
+        single_idx = single.locate_array(amounts, strict=True)
+        married_idx = married.locate_array(amounts, strict=True)
+
+    return {
+        'tax': tax,
+        'bracket_index': np.where(is_married, married_idx, single_idx),
+        'thresholds': np.where(is_married, married.threshold_array[married_idx], single.threshold_array[single_idx]),
+        'rates': np.where(is_married, married.rate_array[married_idx], single.rate_array[single_idx]),
+        'next_thresholds': np.where(is_married, married.next_threshold_array[married_idx],
+                                    single.next_threshold_array[single_idx]),
+    }
@@ -0,0 +1,310 @@
+"""
+Piecewise-Linear Tariff Curves
+Total tax as one merged piecewise-linear function of income, built from the
+compiled tariffs by addition, scaling and shifting
+"""
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Sequence, Tuple, Union
+import numpy as np
+from models.tax_data import UserProfile, DeductionResult
+from calculations.tariff import CompiledTariff
+from calculations.registry import TARIFF_REGISTRY, TariffBundle, get_bundle
+from calculations.deductions import get_adjusted_deductions_for_tax_type
+from calculations.wealth_tax import calculate_wealth_tax
+from calculations.church_tax import profile_church_multiplier
+from calculations.municipalities import profile_steuerfuss
+
+
+class TariffCurve:
+    """
+    Right-continuous piecewise-linear function.
+
+    f(x) = values[i] + slopes[i] × (x - breakpoints[i])  for breakpoints[i] <= x < breakpoints[i+1]
+    f(x) = left_value                                      for x < breakpoints[0]
+
+    Jumps are allowed at breakpoints (e.g. the federal cap bracket, the
+    Personalsteuer), so sums of tariffs stay exact. Curves are immutable;
+    every operation returns a new curve.
+    """
+
+    __slots__ = ('breakpoints', 'values', 'slopes', 'left_value', '_breakpoint_list')
+
+    def __init__(self, breakpoints: Sequence[float], values: Sequence[float],
+                 slopes: Sequence[float], left_value: float = None):
+        breakpoints = np.array(breakpoints, dtype=float)
+        values = np.array(values, dtype=float)
+        slopes = np.array(slopes, dtype=float)
+        if not (breakpoints.shape == values.shape == slopes.shape) or breakpoints.ndim != 1 or not len(breakpoints):
+            raise ValueError("TariffCurve needs equally long, non-empty breakpoints, values and slopes")
+        if np.any(np.diff(breakpoints) <= 0):
+            raise ValueError("TariffCurve breakpoints must be strictly increasing")
+
+        for array in (breakpoints, values, slopes):
+            array.flags.writeable = False
+        self.breakpoints = breakpoints
+        self.values = values
+        self.slopes = slopes
+        self.left_value = float(values[0] if left_value is None else left_value)
+        # Plain list for the scalar bisect path
+        self._breakpoint_list = breakpoints.tolist()
+
+    # ------------------------------------------------------------------
+    # Constructors
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_tariff(cls, tariff: CompiledTariff) -> 'TariffCurve':
+        """Curve of a compiled tariff (tax as a function of the taxable amount)."""
+        return cls(tariff.threshold_array, tariff.base_tax_array, tariff.rate_array / tariff.divisor, 0.0)
+
+    @classmethod
+    def constant(cls, value: float) -> 'TariffCurve':
+        """Flat curve f(x) = value."""
+        return cls([0.0], [value], [0.0], value)
+
+    @classmethod
+    def step(cls, at: float, height: float) -> 'TariffCurve':
+        """0 below at, height from at onwards."""
+        return cls([at], [height], [0.0], 0.0)
+
+    @classmethod
+    def identity(cls) -> 'TariffCurve':
+        """f(x) = x for x >= 0 (gross income itself, e.g. for net income = identity - tax)."""
+        return cls([0.0], [0.0], [1.0], 0.0)
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+
+    def __call__(self, x: float) -> float:
+        """Evaluate at one point: one bisect plus one multiply-add."""
+        i = bisect_right(self._breakpoint_list, x) - 1
+        if i < 0:
+            return self.left_value
+        return float(self.values[i] + self.slopes[i] * (x - self.breakpoints[i]))
+
+    def evaluate_array(self, x) -> np.ndarray:
+        """Vectorized evaluation."""
+        x = np.asarray(x, dtype=float)
+        i = np.searchsorted(self.breakpoints, x, side='right') - 1
+        safe = np.maximum(i, 0)
+        result = self.values[safe] + self.slopes[safe] * (x - self.breakpoints[safe])
+        return np.where(i < 0, self.left_value, result)
+
+    def slope_at(self, x) -> Union[float, np.ndarray]:
+        """Marginal rate (derivative from the right) at x."""
+        x_array = np.asarray(x, dtype=float)
+        i = np.searchsorted(self.breakpoints, x_array, side='right') - 1
+        slope = np.where(i < 0, 0.0, self.slopes[np.maximum(i, 0)])
+        return float(slope) if np.ndim(x) == 0 else slope
+
+    def __len__(self) -> int:
+        return len(self.breakpoints)
+
+    def __repr__(self) -> str:
+        return f"TariffCurve({len(self)} breakpoints)"
+
+    # ------------------------------------------------------------------
+    # Algebra
+    # ------------------------------------------------------------------
+
+    def __add__(self, other) -> 'TariffCurve':
+        if isinstance(other, (int, float)):
+            return TariffCurve(self.breakpoints, self.values + other, self.slopes, self.left_value + other)
+        if not isinstance(other, TariffCurve):
+            return NotImplemented
+
+        # Union of breakpoints; both curves evaluated right-continuously there
+        merged = np.union1d(self.breakpoints, other.breakpoints)
+        return TariffCurve(
+            merged,
+            self.evaluate_array(merged) + other.evaluate_array(merged),
+            self.slope_at(merged) + other.slope_at(merged),
+            self.left_value + other.left_value,
+        )
+
+    __radd__ = __add__
+
+    def scale(self, factor: float) -> 'TariffCurve':
+        """factor × f(x), e.g. einfache tax × Steuerfuss / 100."""
+        return TariffCurve(self.breakpoints, self.values * factor, self.slopes * factor, self.left_value * factor)
+
+    def __mul__(self, factor: float) -> 'TariffCurve':
+        if not isinstance(factor, (int, float)):
+            return NotImplemented
+        return self.scale(factor)
+
+    __rmul__ = __mul__
+
+    def __neg__(self) -> 'TariffCurve':
+        return self.scale(-1.0)
+
+    def __sub__(self, other) -> 'TariffCurve':
+        return self + (-other)
+
+    def shift(self, offset: float) -> 'TariffCurve':
+        """g(x) = f(x - offset): a tariff on taxable income becomes a curve in gross income."""
+        return TariffCurve(self.breakpoints + offset, self.values, self.slopes, self.left_value)
+
+    def merge_breakpoints(self, tolerance: float = 1e-9) -> 'TariffCurve':
+        """Drop breakpoints where the curve neither jumps nor changes slope."""
+        if len(self) < 2:
+            return self
+        widths = np.diff(self.breakpoints)
+        left_limits = self.values[:-1] + self.slopes[:-1] * widths
+        redundant = (
+            (np.abs(self.values[1:] - left_limits) <= tolerance) &
+            (np.abs(self.slopes[1:] - self.slopes[:-1]) <= tolerance)
+        )
+        keep = np.concatenate([[True], ~redundant])
+        return TariffCurve(self.breakpoints[keep], self.values[keep], self.slopes[keep], self.left_value)
+
+
+# ============================================================================
+# PROFILE CURVES
+# ============================================================================
+
+@lru_cache(maxsize=256)
+def _base_curves(bundle: TariffBundle, marital_status: str, gemeinde_steuerfuss: float, church_multiplier: float):
+    """
+    Federal and Zurich curves on taxable income (no deductions) for a profile skeleton.
+
+    The Zurich curve combines cantonal, municipal and church tax as one
+    scaling of the einfache Staatssteuer curve.
+    """
+    federal = TariffCurve.from_tariff(bundle.federal(marital_status)).merge_breakpoints()
+    multiplier = (bundle.cantonal_steuerfuss + gemeinde_steuerfuss) / 100 + church_multiplier
+    zurich = TariffCurve.from_tariff(bundle.zurich(marital_status)).scale(multiplier).merge_breakpoints()
+    return federal, zurich
+
+
+def _on_tariff_swap(tax_year: int, old: TariffBundle, new: TariffBundle):
+    """Registry listener: drop cached curves, whose keys would keep replaced bundles alive."""
+    _base_curves.cache_clear()
+
+
+TARIFF_REGISTRY.add_listener(_on_tariff_swap)
+
+
+def build_component_curves(marital_status: str = 'single', gemeinde_steuerfuss: float = 119,
+                           religious_affiliation: str = 'none', federal_deductions: float = 0.0,
+                           cantonal_deductions: float = 0.0, tax_year: int = None,
+                           church_multiplier: float = None) -> Tuple[TariffCurve, TariffCurve]:
+    """
+    Federal and Zurich tax curves in gross income, kept apart.
+
+    The Zurich curve covers cantonal, municipal and church tax plus the
+    Personalsteuer. Keeping the two separate lets callers shift them by
+    different amounts (e.g. commuting costs above the federal cap).
+
+    Args:
+        marital_status: 'single' or 'married'
+        gemeinde_steuerfuss: Municipal tax multiplier
+        religious_affiliation: 'none', 'reformed', 'catholic', 'christian-catholic'
+        federal_deductions: Deductions for federal taxable income
+        cantonal_deductions: Deductions for cantonal taxable income
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+        church_multiplier: Household church multiplier (parish / spouse split);
+                           default: the cantonal multiplier of religious_affiliation
+
+    Returns:
+        Tuple of (federal curve, Zurich curve)
+    """
+    bundle = get_bundle(tax_year)
+    if church_multiplier is None:
+        church_multiplier = bundle.church_tax_multipliers.get(religious_affiliation, 0)
+    federal, zurich = _base_curves(bundle, marital_status, float(gemeinde_steuerfuss), float(church_multiplier))
+
+    # Personalsteuer applies from the first franc of taxable income (income > deductions)
+    personalsteuer = TariffCurve.step(np.nextafter(float(cantonal_deductions), np.inf), bundle.personalsteuer)
+    return federal.shift(federal_deductions), zurich.shift(cantonal_deductions) + personalsteuer
+
+
+def build_tax_curve(marital_status: str = 'single', gemeinde_steuerfuss: float = 119,
+                    religious_affiliation: str = 'none', federal_deductions: float = 0.0,
+                    cantonal_deductions: float = 0.0, include_federal: bool = True,
+                    wealth_tax: float = 0.0, tax_year: int = None, church_multiplier: float = None) -> TariffCurve:
+    """
+    One merged curve of total tax as a function of gross income.
+
+    Zurich part: (einfache tariff × (cantonal + municipal Steuerfuss + church
+    multiplier)) shifted by the cantonal deductions, plus the Personalsteuer
+    once taxable income is positive. Federal part (optional): the federal
+    tariff shifted by the federal deductions. Wealth tax does not depend on
+    income and is added as a constant.
+
+    An additional deduction that applies to both federal and cantonal taxable
+    income (Pillar 3a, Pillar 2 buy-ins, ...) of X is evaluated as curve(income - X).
+
+    Args:
+        marital_status: 'single' or 'married'
+        gemeinde_steuerfuss: Municipal tax multiplier
+        religious_affiliation: 'none', 'reformed', 'catholic', 'christian-catholic'
+        federal_deductions: Deductions for federal taxable income
+        cantonal_deductions: Deductions for cantonal taxable income
+        include_federal: Add the federal tax curve (TaxResult.total_tax excludes it)
+        wealth_tax: Wealth tax to add as a constant
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+        church_multiplier: Household church multiplier (default: cantonal multiplier)
+
+    Returns:
+        TariffCurve in gross income
+    """
+    federal, curve = build_component_curves(
+        marital_status, gemeinde_steuerfuss, religious_affiliation, federal_deductions, cantonal_deductions,
+        tax_year, church_multiplier
+    )
+    if include_federal:
+        curve = curve + federal
+    if wealth_tax:
+        curve = curve + wealth_tax
+    return curve
+
+
+def build_profile_tax_curve(profile: UserProfile, deductions: float = 0.0,
+                            deduction_result: DeductionResult = None,
+                            include_federal: bool = True, tax_year: int = None) -> TariffCurve:
+    """
+    Total tax curve for a profile, consistent with calculate_complete_taxes.
+
+    curve(income) equals calculate_complete_taxes(income, deductions, profile,
+    deduction_result).total_tax (plus federal tax when include_federal is set).
+
+    Args:
+        profile: User profile (marital status, Steuerfuss, religion, wealth)
+        deductions: Total deductions
+        deduction_result: Optional DeductionResult for the federal/cantonal commuting caps
+        include_federal: Add the federal tax curve
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+
+    Returns:
+        TariffCurve in gross income
+    """
+    if deduction_result is not None:
+        federal_deductions = get_adjusted_deductions_for_tax_type(deduction_result, 'federal',
+                                                                  total_to_adjust=deductions, tax_year=tax_year)
+        cantonal_deductions = get_adjusted_deductions_for_tax_type(deduction_result, 'cantonal',
+                                                                   total_to_adjust=deductions, tax_year=tax_year)
+    else:
+        federal_deductions = cantonal_deductions = deductions
+
+    gemeinde_steuerfuss = profile_steuerfuss(profile, tax_year)
+    wealth_tax = 0.0
+    if profile.total_wealth > 0:
+        wealth_tax = calculate_wealth_tax(
+            profile.total_wealth, profile.num_children, gemeinde_steuerfuss, profile.marital_status,
+            tax_year=tax_year
+        )['wealth_tax']
+
+    return build_tax_curve(
+        profile.marital_status,
+        gemeinde_steuerfuss,
+        profile.religious_affiliation,
+        federal_deductions,
+        cantonal_deductions,
+        include_federal,
+        wealth_tax,
+        tax_year,
+        profile_church_multiplier(profile, tax_year),
+    )
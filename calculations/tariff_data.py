@@ -0,0 +1,289 @@
+"""
+Tariff Data Files
+Tariffs, Steuerfüsse and limits per tax year in data/tariffs/<year>.toml,
+compiled once into a flat array snapshot that later processes memory-map
+"""
+import hashlib
+import json
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Mapping, Optional, Tuple
+import numpy as np
+import pandas as pd
+from calculations.tariff import CompiledTariff
+from calculations.registry import (
+    LIMIT_NAMES,
+    TariffBundle,
+    TariffRegistry,
+    TARIFF_REGISTRY,
+    bundle_from_source,
+    _bundle_fields,
+)
+
+try:
+    import tomllib
+except ImportError:   # Python < 3.11: same API from the tomli backport
+    import tomli as tomllib
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data' / 'tariffs'
+CACHE_DIR = DATA_DIR / '.compiled'
+MUNICIPALITIES_FILE = DATA_DIR.parent / 'municipalities.csv'
+SNAPSHOT_FORMAT = 1
+
+# Bracket tables in a data file, with the compiled tariff they become
+BRACKET_TABLES = {
+    'FEDERAL_TAX_BRACKETS': 'federal_single',
+    'FEDERAL_TAX_BRACKETS_MARRIED': 'federal_married',
+    'ZURICH_TAX_BRACKETS': 'zurich_single',
+    'ZURICH_TAX_BRACKETS_MARRIED': 'zurich_married',
+    'WEALTH_TAX_BRACKETS_SINGLE': 'wealth_single',
+    'WEALTH_TAX_BRACKETS_MARRIED': 'wealth_married',
+}
+SCALAR_NAMES = ('CANTONAL_STEUERFUSS', 'PERSONALSTEUER', 'WEALTH_DEDUCTION_PER_CHILD')
+TABLE_NAMES = ('CHURCH_TAX_MULTIPLIERS',)
+
+
+# ============================================================================
+# DATA FILES (TOML)
+# ============================================================================
+
+def parse_tariff_toml(text: str) -> Tuple[int, str, Dict[str, Any]]:
+    """
+    Parse a tariff data file.
+
+    Returns:
+        Tuple of (tax_year, version, source) where source is keyed like
+        models/constants.py (see bundle_from_source)
+    """
+    data = tomllib.loads(text)
+    meta = data.pop('meta')
+    return int(meta['tax_year']), str(meta['version']), data
+
+
+def load_tariff_file(path) -> Tuple[int, str, Dict[str, Any]]:
+    """Read and parse a tariff data file (see parse_tariff_toml)."""
+    return parse_tariff_toml(Path(path).read_text(encoding='utf-8'))
+
+
+def _toml_value(value) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _toml_key(key: str) -> str:
+    return key if key.replace('_', '').isalnum() and key.isascii() else json.dumps(key, ensure_ascii=False)
+
+
+def dump_tariff_source(tax_year: int, version: str, source: Dict[str, Any]) -> str:
+    """
+    Tariff data file text for a source mapping (the inverse of parse_tariff_toml).
+
+    Only the names a bundle reads are written: the bracket tables, Steuerfuss,
+    Personalsteuer, per-child wealth deduction, church multipliers and LIMIT_NAMES.
+    """
+    names = [name for name in SCALAR_NAMES + TABLE_NAMES + LIMIT_NAMES if name in source]
+    scalars = [name for name in names if not isinstance(source[name], Mapping)]
+    tables = [name for name in names if isinstance(source[name], Mapping)]
+
+    # Top-level keys must precede every table
+    lines = [f'# Tariffs, Steuerfuesse and limits for tax year {tax_year}', '']
+    lines.extend(f'{name} = {_toml_value(source[name])}' for name in scalars)
+    lines.extend(['', '[meta]', f'tax_year = {tax_year}', f'version = {_toml_value(version)}'])
+    for name in tables:
+        lines.extend(['', f'[{name}]'])
+        lines.extend(f'{_toml_key(k)} = {_toml_value(v)}' for k, v in source[name].items())
+    for name in BRACKET_TABLES:
+        for bracket in source[name]:
+            lines.extend(['', f'[[{name}]]'])
+            lines.extend(f'{k} = {_toml_value(v)}' for k, v in bracket.items())
+    return '\n'.join(lines) + '\n'
+
+
+# ============================================================================
+# COMPILED SNAPSHOTS (flat float64 array + JSON index)
+# ============================================================================
+
+def write_atomic(path, write: Callable[[IO], None], binary: bool = True):
+    """
+    Write a file through a uniquely named temporary file in the same directory.
+
+    The temporary file is moved into place with os.replace once write() has
+    finished, so readers and concurrent writers never see a partial file.
+
+    Args:
+        path: Target file
+        write: Called with the open temporary file
+        binary: Open the temporary file in binary mode (else UTF-8 text)
+    """
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with (os.fdopen(fd, 'wb') if binary else os.fdopen(fd, 'w', encoding='utf-8', newline='')) as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_snapshot(bundle: TariffBundle, stem, source_hash: str):
+    """
+    Write a bundle as <stem>.npy (all tariff arrays back to back) and <stem>.json.
+
+    Both files are written through unique temporary files (write_atomic),
+    the index last, so readers never see a half-written snapshot and
+    processes compiling the same file at once do not collide.
+    """
+    stem = Path(stem)
+    stem.parent.mkdir(parents=True, exist_ok=True)
+
+    layout, parts, offset = {}, [], 0
+    for name in BRACKET_TABLES.values():
+        tariff = getattr(bundle, name)
+        layout[name] = {'offset': offset, 'length': len(tariff), 'divisor': tariff.divisor}
+        parts.extend((tariff.threshold_array, tariff.base_tax_array, tariff.rate_array))
+        offset += 3 * len(tariff)
+
+    index = {
+        'format': SNAPSHOT_FORMAT,
+        'source_hash': source_hash,
+        'tax_year': bundle.tax_year,
+        'version': bundle.version,
+        'tariffs': layout,
+        'cantonal_steuerfuss': bundle.cantonal_steuerfuss,
+        'personalsteuer': bundle.personalsteuer,
+        'wealth_deduction_per_child': bundle.wealth_deduction_per_child,
+        'church_tax_multipliers': dict(bundle.church_tax_multipliers),
+        'limits': {k: dict(v) if isinstance(v, Mapping) else v for k, v in bundle.limits.items()},
+    }
+
+    array_path = stem.with_suffix('.npy')
+    index_path = stem.with_suffix('.json')
+    write_atomic(array_path, lambda f: np.save(f, np.concatenate(parts).astype(np.float64)))
+    write_atomic(index_path, lambda f: json.dump(index, f, ensure_ascii=False), binary=False)
+
+
+def load_snapshot(stem, source_hash: str = None) -> Optional[TariffBundle]:
+    """
+    Bundle from a snapshot, with the tariff arrays memory-mapped.
+
+    Returns None if the snapshot is missing, of another format, or was
+    compiled from a different source file than source_hash.
+    """
+    stem = Path(stem)
+    try:
+        with open(stem.with_suffix('.json'), encoding='utf-8') as f:
+            index = json.load(f)
+        flat = np.load(stem.with_suffix('.npy'), mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    if index.get('format') != SNAPSHOT_FORMAT or (source_hash is not None and index['source_hash'] != source_hash):
+        return None
+
+    tariffs = {}
+    for name, entry in index['tariffs'].items():
+        start, length = entry['offset'], entry['length']
+        thresholds, base_tax, rates = (flat[start + i * length:start + (i + 1) * length] for i in range(3))
+        tariffs[name] = CompiledTariff.from_arrays(f"{name}_{index['tax_year']}", thresholds, base_tax, rates,
+                                                   entry['divisor'])
+
+    source = {
+        'FEDERAL_TAX_BRACKETS': _federal_brackets(tariffs['federal_single']),
+        'FEDERAL_TAX_BRACKETS_MARRIED': _federal_brackets(tariffs['federal_married']),
+        'CANTONAL_STEUERFUSS': index['cantonal_steuerfuss'],
+        'PERSONALSTEUER': index['personalsteuer'],
+        'WEALTH_DEDUCTION_PER_CHILD': index['wealth_deduction_per_child'],
+        'CHURCH_TAX_MULTIPLIERS': index['church_tax_multipliers'],
+        **index['limits'],
+    }
+    return TariffBundle(tax_year=index['tax_year'], version=index['version'], **tariffs, **_bundle_fields(source))
+
+
+def _federal_brackets(tariff: CompiledTariff):
+    """Federal source brackets back from a compiled federal tariff."""
+    return [
+        {'threshold': t, 'base_tax': b, 'rate_per_hundred': r}
+        for t, b, r in zip(tariff.thresholds, tariff.base_tax, tariff.rates)
+    ]
+
+
+def load_bundle(path, cache_dir=CACHE_DIR) -> TariffBundle:
+    """
+    Bundle for a tariff data file, from its snapshot when it is current.
+
+    A missing or stale snapshot (source file changed) is rebuilt: the file
+    is parsed and compiled once and the snapshot written for the next process.
+
+    Args:
+        path: Tariff data file (<year>.toml)
+        cache_dir: Snapshot directory (None: always parse, write nothing)
+
+    Returns:
+        TariffBundle
+    """
+    path = Path(path)
+    raw = path.read_bytes()
+    source_hash = hashlib.sha256(raw).hexdigest()
+    stem = Path(cache_dir) / path.stem if cache_dir is not None else None
+
+    if stem is not None:
+        bundle = load_snapshot(stem, source_hash)
+        if bundle is not None:
+            return bundle
+
+    tax_year, version, source = parse_tariff_toml(raw.decode('utf-8'))
+    bundle = bundle_from_source(tax_year, version, source)
+    if stem is not None:
+        try:
+            write_snapshot(bundle, stem, source_hash)
+        except OSError:
+            pass   # Read-only deployment: serve the parsed bundle without caching
+    return bundle
+
+
+def register_data_files(directory=DATA_DIR, registry: TariffRegistry = TARIFF_REGISTRY,
+                        cache_dir=CACHE_DIR, replace: bool = False) -> Tuple[int, ...]:
+    """
+    Register every <year>.toml in directory; each is loaded on first use.
+
+    The data file is the source of truth for its year: it takes over from
+    the fallback tables of models/constants.py. Other years already
+    registered are skipped unless replace is set.
+
+    Returns:
+        The tax years registered from files
+    """
+    registered = []
+    for path in sorted(Path(directory).glob('*.toml')):
+        if not path.stem.isdigit():
+            continue
+        year = int(path.stem)
+        if year in registry and not replace and not registry.is_fallback(year):
+            continue
+        registry.register(year, lambda path=path: load_bundle(path, cache_dir), replace)
+        registered.append(year)
+    return tuple(registered)
+
+
+# ============================================================================
+# MUNICIPALITY DATASET
+# ============================================================================
+
+@lru_cache(maxsize=8)
+def load_municipalities(path=MUNICIPALITIES_FILE) -> pd.DataFrame:
+    """
+    Municipality dataset, indexed by name (read once per path; treat as read-only).
+
+    Columns: postal_code, steuerfuss and the parish (Kirchgemeinde)
+    Steuerfüsse church_<denomination> in percent (NaN where not listed).
+    """
+    frame = pd.read_csv(path, index_col='municipality', encoding='utf-8', dtype={'postal_code': str})
+    return frame.astype({name: float for name in frame.columns if name != 'postal_code'})
@@ -0,0 +1,135 @@
+"""
+Tariff Hot Reload
+Watches data/tariffs for changed files, compiles them in the background and
+swaps the new bundles into the registry atomically
+"""
+import dataclasses
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from calculations.registry import TariffRegistry, TARIFF_REGISTRY
+from calculations.tariff_data import DATA_DIR, CACHE_DIR, load_bundle
+
+DEFAULT_POLL_INTERVAL = 5.0   # seconds
+
+
+class TariffWatcher:
+    """
+    Polls a tariff data directory and hot-swaps changed years.
+
+    A changed <year>.toml is parsed and compiled on the watcher thread
+    while requests keep using the current bundle; the finished bundle is
+    then published with TariffRegistry.swap(), whose listeners (every
+    TaxEngine) drop the results of the replaced version. Files that fail
+    to load are reported in errors and the current bundle stays in place.
+
+    Files present when the watcher is created are taken as already loaded.
+    """
+
+    def __init__(self, directory=DATA_DIR, registry: TariffRegistry = TARIFF_REGISTRY,
+                 cache_dir=CACHE_DIR, interval: float = DEFAULT_POLL_INTERVAL):
+        self.directory = Path(directory)
+        self.registry = registry
+        self.cache_dir = cache_dir
+        self.interval = interval
+
+        self.errors: Dict[int, Exception] = {}
+        self.reloads = 0
+        self._signatures: Dict[Path, Tuple[int, int]] = {}
+        self._hashes: Dict[Path, str] = {}
+        self._poll_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        for path in self._files():
+            self._signatures[path] = self._signature(path)
+            self._hashes[path] = hashlib.sha256(path.read_bytes()).hexdigest()
+
+    def _files(self):
+        return [path for path in sorted(self.directory.glob('*.toml')) if path.stem.isdigit()]
+
+    @staticmethod
+    def _signature(path: Path) -> Tuple[int, int]:
+        stat = path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def poll(self) -> Tuple[int, ...]:
+        """
+        Check every data file once and swap in the years whose content changed.
+
+        Returns:
+            The tax years swapped in
+        """
+        swapped = []
+        with self._poll_lock:
+            for path in self._files():
+                try:
+                    signature = self._signature(path)
+                except OSError:
+                    continue   # Removed between glob and stat
+                if self._signatures.get(path) == signature:
+                    continue
+                self._signatures[path] = signature
+
+                year = int(path.stem)
+                try:
+                    digest = hashlib.sha256(path.read_bytes()).hexdigest()
+                    if self._hashes.get(path) == digest:
+                        continue   # Touched, not changed
+                    bundle = load_bundle(path, self.cache_dir)
+                except Exception as error:   # Keep serving the current bundle
+                    self.errors[year] = error
+                    continue
+                self._hashes[path] = digest
+
+                # Cache keys carry the version: a corrected file must not reuse it
+                if year in self.registry and self.registry.is_built(year) and \
+                        self.registry.get(year).version == bundle.version:
+                    bundle = dataclasses.replace(bundle, version=f'{bundle.version}+{digest[:8]}')
+
+                self.registry.swap(year, bundle)
+                self.errors.pop(year, None)
+                self.reloads += 1
+                swapped.append(year)
+        return tuple(swapped)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def start(self) -> 'TariffWatcher':
+        """Start polling on a daemon thread (no-op if already running)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='tariff-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None):
+        """Stop polling and wait for the thread to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def __enter__(self) -> 'TariffWatcher':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+_default_watcher = None
+
+
+def start_default_watcher(interval: float = DEFAULT_POLL_INTERVAL) -> TariffWatcher:
+    """Process-wide watcher on data/tariffs (started once, survives Streamlit reruns)."""
+    global _default_watcher
+    if _default_watcher is None:
+        _default_watcher = TariffWatcher(interval=interval)
+    return _default_watcher.start()
@@ -1,11 +1,13 @@
 """
 Wealth Tax Calculation for Zurich Canton
 """
-from models.constants import (
-    WEALTH_TAX_BRACKETS_SINGLE,
-    WEALTH_TAX_BRACKETS_MARRIED,
-    WEALTH_DEDUCTION_PER_CHILD,
-    CANTONAL_STEUERFUSS
+import numpy as np
+from models.constants import TAXABLE_WEALTH_ROUNDING
+from calculations.registry import get_bundle
+from calculations.tariff import (
+    wealth_table,
+    round_down,
+    round_down_array,
 )
 
 
@@ -13,7 +15,9 @@ def calculate_wealth_tax(
     total_wealth: float,
     number_of_children: int,
     gemeinde_steuerfuss: int,
-    marital_status: str = 'single'
+    marital_status: str = 'single',
+    official_rounding: bool = False,
+    tax_year: int = None
 ) -> dict:
     """
     Calculate wealth tax for Zurich canton.
@@ -35,6 +39,9 @@ def calculate_wealth_tax(
         number_of_children: Number of children
         gemeinde_steuerfuss: Municipal tax multiplier
         marital_status: 'single' or 'married'
+        official_rounding: Round taxable wealth down to full CHF 1,000 and read
+                           the tax from the dense table
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
 
     Returns:
         Dictionary with wealth tax details
@@ -49,15 +56,15 @@ def calculate_wealth_tax(
             'deductions': 0.0
         }
 
-    # Select appropriate brackets
-    if marital_status == 'married':
-        brackets = WEALTH_TAX_BRACKETS_MARRIED
-    else:
-        brackets = WEALTH_TAX_BRACKETS_SINGLE
+    # Select appropriate (compiled) brackets
+    bundle = get_bundle(tax_year)
+    tariff = bundle.wealth(marital_status)
 
     # Calculate deductions (ONLY for children, no per-adult deductions)
-    deductions = number_of_children * WEALTH_DEDUCTION_PER_CHILD
+    deductions = number_of_children * bundle.wealth_deduction_per_child
     taxable_wealth = max(0, total_wealth - deductions)
+    if official_rounding:
+        taxable_wealth = round_down(taxable_wealth, TAXABLE_WEALTH_ROUNDING)
 
     if taxable_wealth == 0:
         return {
@@ -70,28 +77,89 @@ def calculate_wealth_tax(
         }
 
     # Calculate "einfache" wealth tax using progressive brackets
-    einfache_wealth_tax = 0
+    if official_rounding:
+        einfache_wealth_tax, _ = wealth_table(tariff).lookup(taxable_wealth)
+    else:
+        einfache_wealth_tax = tariff.evaluate(taxable_wealth)
 
-    for i, bracket in enumerate(brackets):
-        next_bracket = brackets[i + 1] if i + 1 < len(brackets) else None
+    # Apply Steuerfüsse
+    cantonal_wealth_tax = (einfache_wealth_tax * bundle.cantonal_steuerfuss) / 100
+    municipal_wealth_tax = (einfache_wealth_tax * gemeinde_steuerfuss) / 100
+    wealth_tax = cantonal_wealth_tax + municipal_wealth_tax
 
-        if taxable_wealth <= bracket['threshold']:
-            break
+    effective_rate = (wealth_tax / total_wealth * 100) if total_wealth > 0 else 0
 
-        taxable_in_bracket = (
-            min(taxable_wealth, next_bracket['threshold']) - bracket['threshold']
-            if next_bracket
-            else taxable_wealth - bracket['threshold']
-        )
+    return {
+        'taxable_wealth': taxable_wealth,
+        'wealth_tax': wealth_tax,
+        'cantonal_wealth_tax': cantonal_wealth_tax,
+        'municipal_wealth_tax': municipal_wealth_tax,
+        'effective_rate': effective_rate,
+        'deductions': deductions,
+        'einfache_wealth_tax': einfache_wealth_tax
+    }
 
-        einfache_wealth_tax += (taxable_in_bracket / 1000) * bracket['rate_per_thousand']
 
-    # Apply Steuerfüsse
-    cantonal_wealth_tax = (einfache_wealth_tax * CANTONAL_STEUERFUSS) / 100
+def calculate_wealth_tax_batch(
+    total_wealth,
+    number_of_children=0,
+    gemeinde_steuerfuss=119,
+    marital_status='single',
+    total_only: bool = False,
+    official_rounding: bool = False,
+    tax_year: int = None
+):
+    """
+    Vectorized version of calculate_wealth_tax for a whole client book.
+
+    Einfache wealth tax is read from the compiled cumulative tariffs
+    with one np.searchsorted per tariff; the Steuerfüsse are applied per row.
+
+    Args:
+        total_wealth: Array of total assets minus liabilities
+        number_of_children: Array of child counts (or a scalar)
+        gemeinde_steuerfuss: Array of municipal tax multipliers (or a scalar)
+        marital_status: Array of 'single'/'married' (or a scalar)
+        total_only: If True, return only the wealth_tax array and skip the
+                    other columns (memory-light mode for large runs)
+        official_rounding: Round taxable wealth down to full CHF 1,000 per row
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+
+    Returns:
+        Dictionary of arrays keyed like calculate_wealth_tax (taxable_wealth,
+        wealth_tax, cantonal_wealth_tax, municipal_wealth_tax, effective_rate,
+        deductions, einfache_wealth_tax), or just the wealth_tax array
+    """
+    total_wealth, number_of_children, gemeinde_steuerfuss, marital_status = np.broadcast_arrays(
+        np.asarray(total_wealth, dtype=float),
+        np.asarray(number_of_children, dtype=float),
+        np.asarray(gemeinde_steuerfuss, dtype=float),
+        np.asarray(marital_status),
+    )
+    married = marital_status == 'married'
+    has_wealth = total_wealth > 0
+    bundle = get_bundle(tax_year)
+
+    # Deductions (ONLY for children); rows without wealth report none, as in the scalar path
+    deductions = np.where(has_wealth, number_of_children * bundle.wealth_deduction_per_child, 0.0)
+    taxable_wealth = np.maximum(0.0, total_wealth - deductions)
+    if official_rounding:
+        taxable_wealth = round_down_array(taxable_wealth, TAXABLE_WEALTH_ROUNDING)
+
+    einfache_wealth_tax = np.where(married, bundle.wealth_married.evaluate_array(taxable_wealth),
+                                   bundle.wealth_single.evaluate_array(taxable_wealth))
+
+    if total_only:
+        # Combined multiplier applied in place; no per-column arrays are kept
+        einfache_wealth_tax *= (bundle.cantonal_steuerfuss + gemeinde_steuerfuss) / 100
+        return einfache_wealth_tax
+
+    cantonal_wealth_tax = (einfache_wealth_tax * bundle.cantonal_steuerfuss) / 100
     municipal_wealth_tax = (einfache_wealth_tax * gemeinde_steuerfuss) / 100
     wealth_tax = cantonal_wealth_tax + municipal_wealth_tax
 
-    effective_rate = (wealth_tax / total_wealth * 100) if total_wealth > 0 else 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        effective_rate = np.where(has_wealth, wealth_tax / total_wealth * 100, 0.0)
 
     return {
         'taxable_wealth': taxable_wealth,
@@ -100,5 +168,5 @@ def calculate_wealth_tax(
         'municipal_wealth_tax': municipal_wealth_tax,
         'effective_rate': effective_rate,
         'deductions': deductions,
-        'einfache_wealth_tax': einfache_wealth_tax
+        'einfache_wealth_tax': einfache_wealth_tax,
     }
@@ -0,0 +1,285 @@
+"""
+Quellensteuer (Withholding Tax) Tables
+Monthly withholding rates for tariff codes A/B/C/H, number of children and
+church tax across an income grid, evaluated as one vectorized grid and
+streamed to CSV or a compact .npy table
+"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Tuple
+import numpy as np
+import pandas as pd
+from calculations.registry import TARIFF_REGISTRY, TariffBundle, get_bundle
+from calculations.tariff_data import CACHE_DIR, write_atomic
+
+# Tariff codes: A single, B married sole earner, C married double earner,
+# H single living with children
+WITHHOLDING_CODES = ('A', 'B', 'C', 'H')
+MARRIED_TARIFF_CODES = ('B', 'C', 'H')
+
+# Bumped whenever the grid evaluation changes (invalidates cached components)
+WITHHOLDING_FORMAT = 1
+
+# Cached tariff components (one .npy per component and input hash)
+WITHHOLDING_CACHE_DIR = CACHE_DIR / 'withholding'
+
+# Columns of a CSV table (one row per code, children, church and income step)
+WITHHOLDING_COLUMNS = [
+    'code',
+    'children',
+    'church',
+    'income_from',
+    'income_to',
+    'rate',
+    'withholding',
+]
+
+
+def _taxable_incomes(bundle: TariffBundle, monthly_incomes: np.ndarray, max_children: int) -> np.ndarray:
+    """
+    (codes × children × incomes) taxable household income per year.
+
+    Flat withholding deductions: professional expenses, the insurance
+    deduction (with pension fund) and the child deductions; code C is
+    evaluated for a household with two equal incomes and the dual income
+    deduction.
+    """
+    limits = bundle.limits
+    insurance = limits['INSURANCE_LIMITS_ZH']
+    annual = 12 * monthly_incomes[None, None, :]
+    children = np.arange(max_children + 1, dtype=float)[None, :, None]
+    earners = np.array([1, 1, 2, 1], dtype=float)[:, None, None]
+
+    professional = np.minimum(annual * limits['PROFESSIONAL_EXPENSES_RATE'], limits['PROFESSIONAL_EXPENSES_MAX'])
+    base_insurance = np.array([
+        insurance['single_with_pension'],
+        insurance['married_with_pension'],
+        insurance['married_with_pension'],
+        insurance['single_with_pension'],
+    ], dtype=float)[:, None, None]
+    dual_income = np.array([0, 0, limits['DUAL_INCOME_DEDUCTION_ZH'], 0], dtype=float)[:, None, None]
+    deductions = (earners * professional + base_insurance + dual_income +
+                  children * (insurance['per_child'] + limits['CHILD_DEDUCTION_ZH']))
+    return np.maximum(earners * annual - deductions, 0.0)
+
+
+def _evaluate_component(bundle: TariffBundle, component: str, taxable: np.ndarray) -> np.ndarray:
+    """Yearly federal tax or Einfache Staatssteuer per earner on a (codes × children × incomes) grid."""
+    single, married = ((bundle.federal_single, bundle.federal_married) if component == 'federal'
+                       else (bundle.zurich_single, bundle.zurich_married))
+    tax = np.empty_like(taxable)
+    for i, code in enumerate(WITHHOLDING_CODES):
+        tariff = married if code in MARRIED_TARIFF_CODES else single
+        tax[i] = tariff.evaluate_array(taxable[i])
+    tax[WITHHOLDING_CODES.index('C')] /= 2   # Household tax split between the two earners
+    return tax
+
+
+def _component_hash(bundle: TariffBundle, component: str, monthly_incomes: np.ndarray, max_children: int) -> str:
+    """Hash of everything a component depends on: its tariffs, the deduction limits and the grid."""
+    digest = hashlib.sha256()
+    names = ('federal_single', 'federal_married') if component == 'federal' else ('zurich_single', 'zurich_married')
+    for name in names:
+        tariff = getattr(bundle, name)
+        for values in (tariff.threshold_array, tariff.base_tax_array, tariff.rate_array):
+            digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+        digest.update(repr(tariff.divisor).encode())
+    limits = {name: bundle.limits[name] for name in ('PROFESSIONAL_EXPENSES_RATE', 'PROFESSIONAL_EXPENSES_MAX',
+                                                      'DUAL_INCOME_DEDUCTION_ZH', 'CHILD_DEDUCTION_ZH')}
+    limits['INSURANCE_LIMITS_ZH'] = dict(bundle.limits['INSURANCE_LIMITS_ZH'])
+    digest.update(json.dumps([WITHHOLDING_FORMAT, component, max_children, limits], sort_keys=True).encode())
+    digest.update(np.ascontiguousarray(monthly_incomes, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def _component(bundle: TariffBundle, component: str, monthly_incomes: np.ndarray, max_children: int,
+               cache_dir, status: Dict[str, str]) -> np.ndarray:
+    """A tariff component grid, from the cache when its inputs are unchanged."""
+    path = None
+    if cache_dir is not None:
+        source_hash = _component_hash(bundle, component, monthly_incomes, max_children)
+        path = Path(cache_dir) / f'{component}-{source_hash[:16]}.npy'
+        try:
+            values = np.load(path, mmap_mode='r')
+            status[component] = 'cached'
+            return values
+        except (OSError, ValueError):
+            pass
+
+    values = _evaluate_component(bundle, component, _taxable_incomes(bundle, monthly_incomes, max_children))
+    status[component] = 'computed'
+    if path is not None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(path, lambda f: np.save(f, values))
+        except OSError:
+            pass   # Read-only deployment: serve the computed grid without caching
+    return values
+
+
+def withholding_grid(step: float = 5, max_monthly_income: float = 50000, max_children: int = 9,
+                     tax_year: int = None, gemeinde_steuerfuss: float = 119,
+                     church_affiliation: str = 'reformed', cache_dir=WITHHOLDING_CACHE_DIR) -> dict:
+    """
+    Monthly withholding for every code, child count, church option and income step.
+
+    The federal tax and the Einfache Staatssteuer are evaluated once each
+    as a (codes × children × incomes) grid and cached on disk under a hash
+    of their tariffs, the deduction limits and the grid. Regenerating after
+    a change to one tariff recomputes only that component; Steuerfuss and
+    church multiplier changes only repeat the final multiply.
+
+    Per earner and year: federal tax + einfache × ((cantonal + municipal
+    Steuerfuss) / 100 + church multiplier). The withholding of an income
+    step is evaluated at its lower bound; the Personalsteuer is not withheld.
+
+    Args:
+        step: Width of the monthly income steps (CHF 5 or CHF 50)
+        max_monthly_income: Upper end of the income grid
+        max_children: Highest number of children in the table
+        tax_year: Tariff year (default: DEFAULT_TAX_YEAR)
+        gemeinde_steuerfuss: Municipal Steuerfuss applied to every row
+        church_affiliation: Denomination whose multiplier applies to the church rows
+        cache_dir: Directory of the cached components (None: always compute, write nothing)
+
+    Returns:
+        Dictionary with the axes (codes, children, church, monthly_incomes),
+        the (codes × children × church × incomes) withholding and rate arrays
+        (rate in percent, rounded to 0.01%), and components: 'computed' or
+        'cached' per tariff component
+    """
+    monthly_incomes = np.arange(0.0, max_monthly_income + step / 2, step)
+    status: Dict[str, str] = {}
+    with TARIFF_REGISTRY.pinned():
+        bundle = get_bundle(tax_year)
+        federal = _component(bundle, 'federal', monthly_incomes, max_children, cache_dir, status)
+        einfache = _component(bundle, 'zurich', monthly_incomes, max_children, cache_dir, status)
+        steuerfuss = (bundle.cantonal_steuerfuss + gemeinde_steuerfuss) / 100
+        church = np.array([0.0, bundle.church_tax_multipliers.get(church_affiliation, 0)])
+
+    # One multiply over the whole grid: codes × children × church × incomes
+    annual = federal[:, :, None, :] + einfache[:, :, None, :] * (steuerfuss + church[None, None, :, None])
+    withholding = annual / 12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.where(monthly_incomes > 0, withholding / monthly_incomes * 100, 0.0)
+
+    return {
+        'tax_year': bundle.tax_year,
+        'version': bundle.version,
+        'codes': WITHHOLDING_CODES,
+        'children': np.arange(max_children + 1),
+        'church': (False, True),
+        'monthly_incomes': monthly_incomes,
+        'step': step,
+        'withholding': withholding,
+        'rate': np.round(rate, 2),
+        'components': status,
+    }
+
+
+def write_withholding_table(path, step: float = 5, max_monthly_income: float = 50000, max_children: int = 9,
+                            tax_year: int = None, gemeinde_steuerfuss: float = 119,
+                            church_affiliation: str = 'reformed', cache_dir=WITHHOLDING_CACHE_DIR) -> dict:
+    """
+    Write a withholding table to CSV or to a compact .npy file, block by block.
+
+    - .csv: WITHHOLDING_COLUMNS, one (code, children, church) block at a time
+    - .npy: uint16 rates in hundredths of a percent, shape (codes × children ×
+      church × incomes), header first, then one block at a time; the axes
+      go to a .json index next to it
+
+    Each file is written through a unique temporary file (write_atomic),
+    so concurrent generators never move a partial table into place.
+
+    Args:
+        path: Output file (.csv or .npy)
+        (other arguments as for withholding_grid)
+
+    Returns:
+        The withholding_grid result
+    """
+    path = Path(path)
+    if path.suffix not in ('.csv', '.npy'):
+        raise ValueError(f"Unsupported withholding table format: {path.suffix} (use .csv or .npy)")
+    grid = withholding_grid(step, max_monthly_income, max_children, tax_year, gemeinde_steuerfuss,
+                            church_affiliation, cache_dir)
+    incomes = grid['monthly_incomes']
+    blocks = [(i, code, k, j, church) for i, code in enumerate(grid['codes']) for k in grid['children']
+              for j, church in enumerate(grid['church'])]
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if path.suffix == '.csv':
+        def write_csv(f):
+            for n, (i, code, k, j, church) in enumerate(blocks):
+                pd.DataFrame({
+                    'code': code,
+                    'children': k,
+                    'church': 'Y' if church else 'N',
+                    'income_from': incomes,
+                    'income_to': incomes + step,
+                    'rate': grid['rate'][i, k, j],
+                    'withholding': np.round(grid['withholding'][i, k, j], 2),
+                }, columns=WITHHOLDING_COLUMNS).to_csv(f, header=n == 0, index=False)
+        write_atomic(path, write_csv, binary=False)
+        return grid
+
+    def write_npy(f):
+        # Blocks are in C order, so they follow the header back to back
+        np.lib.format.write_array_header_1_0(f, {'descr': np.dtype('<u2').str, 'fortran_order': False,
+                                                 'shape': grid['rate'].shape})
+        for i, _, k, j, _ in blocks:
+            f.write(np.rint(grid['rate'][i, k, j] * 100).astype('<u2').tobytes())
+    write_atomic(path, write_npy)
+
+    index = {
+        'format': WITHHOLDING_FORMAT,
+        'tax_year': grid['tax_year'],
+        'version': grid['version'],
+        'codes': list(grid['codes']),
+        'max_children': int(grid['children'][-1]),
+        'church': list(grid['church']),
+        'step': step,
+        'max_monthly_income': float(incomes[-1]),
+        'rate_unit': 0.01,
+        'gemeinde_steuerfuss': gemeinde_steuerfuss,
+        'church_affiliation': church_affiliation,
+    }
+    index_path = path.with_suffix('.json')
+    write_atomic(index_path, lambda f: json.dump(index, f, ensure_ascii=False), binary=False)
+    return grid
+
+
+def load_withholding_table(path) -> Tuple[np.ndarray, dict]:
+    """
+    A .npy withholding table (memory-mapped) and its index.
+
+    Returns:
+        Tuple of (uint16 rates in hundredths of a percent, index dictionary)
+    """
+    path = Path(path)
+    with open(path.with_suffix('.json'), encoding='utf-8') as f:
+        index = json.load(f)
+    return np.load(path, mmap_mode='r'), index
+
+
+def withholding_rate(table: np.ndarray, index: dict, code: str, children: int, church: bool,
+                     monthly_income: float) -> float:
+    """
+    Withholding rate in percent for one employee from a loaded table.
+
+    Args:
+        table: Rates as returned by load_withholding_table
+        index: Index as returned by load_withholding_table
+        code: Tariff code ('A', 'B', 'C', 'H')
+        children: Number of children (capped at the table's maximum)
+        church: Church tax withheld
+        monthly_income: Monthly income (capped at the table's maximum)
+
+    Returns:
+        Rate in percent
+    """
+    step = index['step']
+    column = int(min(max(monthly_income, 0), index['max_monthly_income']) // step)
+    row = table[index['codes'].index(code), min(children, index['max_children']), index['church'].index(church)]
+    return float(row[min(column, len(row) - 1)]) * index['rate_unit']
@@ -153,6 +153,26 @@ WEALTH_DEDUCTION_PER_CHILD = 41100   # CHF 41,100 per child
 # Personalsteuer (flat personal tax)
 PERSONALSTEUER = 24  # CHF 24 annual personal tax
 
+# ============================================================================
+# TARIFF VERSION
+# ============================================================================
+
+# Identifies the tariff tables in this module; part of every cached result key
+# (bump whenever a bracket, rate or multiplier changes)
+TARIFF_VERSION = '2025.1'
+
+# Tax year the tables in this module are registered under (calculators use
+# it when no tax_year is given)
+DEFAULT_TAX_YEAR = 2025
+
+# ============================================================================
+# OFFICIAL ROUNDING (as applied by the ZH and federal tax calculators)
+# ============================================================================
+
+TAXABLE_INCOME_ROUNDING = 100   # Taxable income rounded down to full CHF 100
+TAXABLE_WEALTH_ROUNDING = 1000  # Taxable wealth rounded down to full CHF 1,000
+TAX_AMOUNT_ROUNDING_RAPPEN = 5  # Each Steuerfuss application rounded to 5 Rappen (fixed-point mode)
+
 # ============================================================================
 # CHURCH TAX MULTIPLIERS (Zurich)
 # ============================================================================
@@ -164,6 +184,16 @@ CHURCH_TAX_MULTIPLIERS = {
     'christian-catholic': 0.15  # 15% of Einfache Staatssteuer (verify)
 }
 
+# ============================================================================
+# CAPITAL BENEFITS (Pillar 2 / Pillar 3a withdrawals)
+# ============================================================================
+
+# Taxed separately from other income; capital benefits of both spouses in the
+# same year are added together
+CAPITAL_BENEFIT_FEDERAL_FRACTION = 0.2   # 1/5 of the Art. 36 tariff (Art. 38 Abs. 2 DBG)
+CAPITAL_BENEFIT_RATE_DIVISOR_ZH = 10     # Rate of a yearly benefit of 1/10 of the capital (StG § 37 Abs. 2)
+CAPITAL_BENEFIT_MIN_RATE_ZH = 0.02       # Einfache Staatssteuer at least 2% of the capital
+
 # ============================================================================
 # DEDUCTION LIMITS AND CONSTANTS
 # ============================================================================
@@ -200,6 +230,7 @@ ASSET_MANAGEMENT_MAX = 6000         # Max CHF 6,000
 
 # Family deductions (Zurich)
 CHILD_DEDUCTION_ZH = 9000           # CHF 9,000 per child
+CHILD_DEDUCTION_MAX_AGE = 18        # Child deduction until the child turns 18 (education beyond not modelled)
 DUAL_INCOME_DEDUCTION_ZH = 5900     # CHF 5,900 for dual income
 
 # Childcare deduction
@@ -230,3 +261,11 @@ SUPPORT_PAYMENT_MIN_ZH = 2700       # Min CHF 2,700 (Zurich)
 
 # Medical costs
 MEDICAL_COSTS_DEDUCTIBLE_RATE = 0.05  # 5% deductible (Zurich)
+
+# ============================================================================
+# COLD PROGRESSION (INDEXATION OF THE TARIFFS)
+# ============================================================================
+
+INDEXED_INCOME_THRESHOLD_ROUNDING = 100    # Indexed income thresholds rounded to CHF 100
+INDEXED_WEALTH_THRESHOLD_ROUNDING = 1000   # Indexed wealth thresholds rounded to CHF 1,000
+FEDERAL_BASE_TAX_ROUNDING_RAPPEN = 5       # Federal base tax per threshold rounded down to 5 Rappen
@@ -1,8 +1,62 @@
 """
 Data models for Swiss tax calculations
 """
-from dataclasses import dataclass, field
-from typing import List, Optional, Dict
+import hashlib
+from collections.abc import Sequence
+from dataclasses import dataclass, field, fields, FrozenInstanceError
+from typing import Any, Callable, List, Optional, Dict
+import numpy as np
+import pandas as pd
+
+
+class LazyBreakdown(Sequence):
+    """
+    Read-only, list-like bracket breakdown computed on first access.
+
+    Calculators store the function and its inputs (taxable income, current
+    bracket, tariff) instead of building one dict per bracket up front, so
+    summary-only callers never pay for the breakdown.
+    """
+
+    __slots__ = ('_compute', '_args', '_items')
+
+    def __init__(self, compute: Callable[..., Any], *args):
+        self._compute = compute
+        self._args = args
+        self._items = None
+
+    @property
+    def is_computed(self) -> bool:
+        """True once the breakdown has been materialized."""
+        return self._compute is None
+
+    def _materialize(self):
+        if self._items is None:
+            self._items = self._compute(*self._args)
+            self._compute = None
+            self._args = None
+        return self._items
+
+    def __getitem__(self, index):
+        return self._materialize()[index]
+
+    def __len__(self) -> int:
+        return len(self._materialize())
+
+    def __iter__(self):
+        return iter(self._materialize())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Sequence):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        if self._items is None:
+            return 'LazyBreakdown(<not computed>)'
+        return f'LazyBreakdown({self._items!r})'
 
 
 @dataclass
@@ -15,6 +69,7 @@ class UserProfile:
     num_children: int = 0
     children_ages: List[int] = field(default_factory=list)
     religious_affiliation: str = 'none'  # 'none', 'reformed', 'catholic', 'christian-catholic'
+    spouse2_religious_affiliation: Optional[str] = None  # Married: spouse 2's denomination (None = same)
 
     # Employment
     employment_type: str = 'employed'  # 'employed', 'self_employed', 'both', 'retired', 'not_working'
@@ -98,7 +153,7 @@ class UserProfile:
 
     # Location
     municipality: str = 'Zürich'
-    gemeinde_steuerfuss: int = 119  # Default: Zürich
+    gemeinde_steuerfuss: Optional[int] = None  # Override; None: the municipality's Steuerfuss (tariff registry)
 
     # Optional deduction choices
     claim_actual_commuting: bool = False
@@ -108,8 +163,101 @@ class UserProfile:
     claim_actual_property_maintenance: bool = False
     actual_property_maintenance_costs: float = 0.0
 
+    def freeze(self) -> 'FrozenUserProfile':
+        """Immutable, hashable snapshot of this profile with a precomputed fingerprint."""
+        return FrozenUserProfile(self)
 
-@dataclass
+
+# UserProfile fields that never change a tax result: questionnaire switches
+# whose amounts live in other fields or in DeductionResult (the municipality
+# is tax-relevant: it selects the parish church Steuerfuss)
+NON_TAX_PROFILE_FIELDS = frozenset({
+    'commutes_to_work',
+    'property_age',
+    'is_disabled',
+    'supports_others',
+    'pays_alimony',
+    'claim_actual_commuting',
+})
+
+
+def _fingerprint_value(value: Any) -> Any:
+    """Normalize a field value so equal amounts hash equally (100000 == 100000.0)."""
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_fingerprint_value(v) for v in value)
+    return value
+
+
+class FrozenUserProfile:
+    """
+    Read-only snapshot of a UserProfile.
+
+    Reads like a UserProfile (profile.marital_status, ...) so it can be passed
+    to every calculator, but cannot be modified and can be shared between
+    threads. The fingerprint is a stable 64-bit BLAKE2b digest over the
+    tax-relevant fields only (see NON_TAX_PROFILE_FIELDS), computed once, so
+    caches and persistent stores can key on it directly.
+    """
+
+    __slots__ = ('_values', 'fingerprint')
+
+    def __init__(self, profile: UserProfile):
+        values = {}
+        for f in fields(UserProfile):
+            value = getattr(profile, f.name)
+            values[f.name] = tuple(value) if isinstance(value, list) else value
+        object.__setattr__(self, '_values', values)
+
+        relevant = tuple(
+            (name, _fingerprint_value(value)) for name, value in values.items()
+            if name not in NON_TAX_PROFILE_FIELDS
+        )
+        digest = hashlib.blake2b(repr(relevant).encode('utf-8'), digest_size=8).digest()
+        object.__setattr__(self, 'fingerprint', int.from_bytes(digest, 'big'))
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name: str, value: Any):
+        raise FrozenInstanceError(f"cannot assign to field '{name}' of a frozen profile")
+
+    def __delattr__(self, name: str):
+        raise FrozenInstanceError(f"cannot delete field '{name}' of a frozen profile")
+
+    def __hash__(self) -> int:
+        return self.fingerprint
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, FrozenUserProfile):
+            return self._values == other._values
+        return NotImplemented
+
+    def __reduce__(self):
+        return (FrozenUserProfile, (self.thaw(),))
+
+    def __repr__(self) -> str:
+        return f'FrozenUserProfile(fingerprint={self.fingerprint:016x})'
+
+    def freeze(self) -> 'FrozenUserProfile':
+        """Already frozen."""
+        return self
+
+    def thaw(self) -> UserProfile:
+        """Mutable UserProfile copy (e.g. to edit in the questionnaire)."""
+        values = {name: list(value) if isinstance(value, tuple) else value for name, value in self._values.items()}
+        return UserProfile(**values)
+
+
+@dataclass(slots=True)
 class DeductionResult:
     """
     Detailed breakdown of all deductions.
@@ -175,7 +323,7 @@ class DeductionResult:
         self.total_deductions = self.total_automatic + self.total_optional
 
 
-@dataclass
+@dataclass(slots=True)
 class TaxResult:
     """
     Complete tax calculation result.
@@ -211,9 +359,10 @@ class TaxResult:
     total_tax: float = 0.0
     total_effective_rate: float = 0.0
 
-    # Breakdown data for display
-    federal_breakdown: List[Dict] = field(default_factory=list)
-    cantonal_breakdown: List[Dict] = field(default_factory=list)
+    # Breakdown data for display (calculators store LazyBreakdown views,
+    # computed on first access; the shared empty default allocates nothing)
+    federal_breakdown: Sequence[Dict] = ()
+    cantonal_breakdown: Sequence[Dict] = ()
 
     # Progress in current bracket
     progress_in_bracket: float = 0.0
@@ -243,7 +392,7 @@ class TaxResult:
                 self.church_effective_rate = (self.church_tax / self.gross_income) * 100
 
 
-@dataclass
+@dataclass(slots=True)
 class ComparisonResult:
     """
     Comparison of tax scenarios (before deductions, after automatic, after all).
@@ -285,3 +434,137 @@ class ComparisonResult:
             self.total_savings_percent = (
                 self.total_savings / self.tax_before_deductions.total_tax * 100
             )
+
+
+# ============================================================================
+# STRUCT-OF-ARRAYS BATCHES
+# ============================================================================
+
+class ResultBatch:
+    """
+    Struct-of-arrays store for many results of one dataclass type.
+
+    Every numeric field is one contiguous float64 array (8 bytes per row and
+    field, no per-row object), read as batch.<field>. Rows convert back to
+    the dataclass on demand: batch[i], iteration or to_results().
+    """
+
+    record_type = None
+    columns: tuple = ()
+
+    __slots__ = ('_arrays', '_length')
+
+    def __init__(self, arrays: Dict[str, Any] = None, length: int = None, **kwargs):
+        arrays = dict(arrays or {}, **kwargs)
+        unknown = set(arrays) - set(self.columns)
+        if unknown:
+            raise ValueError(f"{type(self).__name__}: unknown fields {sorted(unknown)}")
+
+        converted = {name: np.ascontiguousarray(values, dtype=np.float64) for name, values in arrays.items()}
+        lengths = {len(values) for values in converted.values()}
+        if length is not None:
+            lengths.add(length)
+        if len(lengths) > 1:
+            raise ValueError(f"{type(self).__name__}: all fields must have the same length")
+        self._length = lengths.pop() if lengths else 0
+
+        # Missing fields take the dataclass default
+        defaults = self.record_type()
+        for name in self.columns:
+            if name not in converted:
+                converted[name] = np.full(self._length, float(getattr(defaults, name)))
+        self._arrays = converted
+
+    @classmethod
+    def from_results(cls, results) -> 'ResultBatch':
+        """Collect dataclass results into one array per field."""
+        results = list(results)
+        return cls({
+            name: np.fromiter((getattr(r, name) for r in results), dtype=np.float64, count=len(results))
+            for name in cls.columns
+        }, length=len(results))
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> 'ResultBatch':
+        """Build from a DataFrame (e.g. calculate_complete_taxes_batch); extra columns are ignored."""
+        return cls({name: frame[name].to_numpy() for name in cls.columns if name in frame.columns},
+                   length=len(frame))
+
+    def to_frame(self, index=None) -> pd.DataFrame:
+        """One column per field."""
+        return pd.DataFrame(self._arrays, index=index, columns=list(self.columns))
+
+    def to_results(self) -> list:
+        """One dataclass per row."""
+        return list(self)
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self._arrays[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        values = {}
+        for f in fields(self.record_type):
+            if f.name in self._arrays:
+                value = self._arrays[f.name][index]
+                values[f.name] = int(value) if f.type in (int, 'int') else float(value)
+        return self.record_type(**values)
+
+    def __iter__(self):
+        for i in range(self._length):
+            yield self[i]
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the field arrays."""
+        return sum(values.nbytes for values in self._arrays.values())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._length} rows)"
+
+
+class TaxResultBatch(ResultBatch):
+    """TaxResult fields as arrays (breakdowns are per-profile views and not stored)."""
+
+    __slots__ = ()
+    record_type = TaxResult
+    columns = tuple(f.name for f in fields(TaxResult) if f.name not in ('federal_breakdown', 'cantonal_breakdown'))
+
+
+class DeductionBatch(ResultBatch):
+    """DeductionResult fields as arrays."""
+
+    __slots__ = ()
+    record_type = DeductionResult
+    columns = tuple(f.name for f in fields(DeductionResult))
+
+    def calculate_totals(self):
+        """Vectorized DeductionResult.calculate_totals."""
+        arrays = self._arrays
+        arrays['total_automatic'] = sum(arrays[name] for name in _AUTOMATIC_DEDUCTION_FIELDS)
+        arrays['total_optional'] = sum(arrays[name] for name in _OPTIONAL_DEDUCTION_FIELDS)
+        arrays['total_deductions'] = arrays['total_automatic'] + arrays['total_optional']
+
+
+# Fields summed by DeductionResult.calculate_totals
+_AUTOMATIC_DEDUCTION_FIELDS = (
+    'commuting_pauschal', 'meal_costs_pauschal', 'professional_expenses', 'side_income_deduction',
+    'child_deductions', 'property_maintenance', 'asset_management', 'insurance_premiums',
+    'dual_income_deduction',
+)
+_OPTIONAL_DEDUCTION_FIELDS = (
+    'pillar_3a', 'pillar_2_buyins', 'ahv_contributions', 'mortgage_interest', 'other_debt_interest',
+    'medical_costs_deductible', 'childcare_costs', 'donations', 'political_contributions',
+    'alimony_payments', 'support_payments',
+)
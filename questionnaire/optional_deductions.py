@@ -300,6 +300,7 @@ def render_optional_deductions(profile: UserProfile, deductions: DeductionResult
                 from calculations.federal_tax import calculate_federal_tax
                 from calculations.cantonal_tax import calculate_zurich_tax
                 from calculations.deductions import calculate_automatic_deductions
+                from calculations.municipalities import profile_steuerfuss
 
                 # Get current automatic deductions
                 auto_deductions = calculate_automatic_deductions(profile)
@@ -311,8 +312,9 @@ def render_optional_deductions(profile: UserProfile, deductions: DeductionResult
                 fed_without = calculate_federal_tax(profile.net_salary, total_deductions_without)
                 fed_with = calculate_federal_tax(profile.net_salary, total_deductions_with)
 
-                cant_without = calculate_zurich_tax(profile.net_salary, profile.gemeinde_steuerfuss, total_deductions_without)
-                cant_with = calculate_zurich_tax(profile.net_salary, profile.gemeinde_steuerfuss, total_deductions_with)
+                gemeinde_steuerfuss = profile_steuerfuss(profile)
+                cant_without = calculate_zurich_tax(profile.net_salary, gemeinde_steuerfuss, total_deductions_without)
+                cant_with = calculate_zurich_tax(profile.net_salary, gemeinde_steuerfuss, total_deductions_with)
 
                 tax_savings = (fed_without.federal_tax - fed_with.federal_tax +
                               cant_without.total_cantonal_municipal - cant_with.total_cantonal_municipal)
@@ -4,7 +4,8 @@ Determines which deduction categories are relevant for the user
 """
 import streamlit as st
 from models.tax_data import UserProfile
-from models.constants import MUNICIPALITY_STEUERFUESSE
+from calculations.registry import get_bundle
+from calculations.municipalities import profile_steuerfuss
 
 
 def render_qualifying_questions(profile: UserProfile) -> UserProfile:
@@ -51,6 +52,23 @@ def render_qualifying_questions(profile: UserProfile) -> UserProfile:
             }[x],
             help="Determines church tax liability"
         )
+        if profile.marital_status == 'married':
+            profile.spouse2_religious_affiliation = st.selectbox(
+                "Spouse's Religious Affiliation",
+                options=['none', 'reformed', 'catholic', 'christian-catholic'],
+                index=['none', 'reformed', 'catholic', 'christian-catholic'].index(
+                    profile.spouse2_religious_affiliation or profile.religious_affiliation
+                ),
+                format_func=lambda x: {
+                    'none': 'None / No church tax',
+                    'reformed': 'Reformed Protestant',
+                    'catholic': 'Roman Catholic',
+                    'christian-catholic': 'Christian Catholic'
+                }[x],
+                help="Mixed-denomination couples pay half the church tax to each parish"
+            )
+        else:
+            profile.spouse2_religious_affiliation = None
 
     # Children
     col1, col2 = st.columns(2)
@@ -115,19 +133,22 @@ def render_qualifying_questions(profile: UserProfile) -> UserProfile:
 
     col1, col2 = st.columns(2)
 
+    # Read from the tariff registry, so hot-reloaded Steuerfüsse show up without a restart
+    municipalities = list(get_bundle().limits['MUNICIPALITY_STEUERFUESSE'].keys())
     with col1:
         profile.municipality = st.selectbox(
             "Municipality",
-            options=list(MUNICIPALITY_STEUERFUESSE.keys()),
-            index=0,
+            options=municipalities,
+            index=municipalities.index(profile.municipality) if profile.municipality in municipalities else 0,
             help="Your municipality determines the municipal tax rate"
         )
 
     with col2:
-        profile.gemeinde_steuerfuss = MUNICIPALITY_STEUERFUESSE[profile.municipality]
+        # No override: the Steuerfuss is resolved from the municipality at calculation time
+        profile.gemeinde_steuerfuss = None
         st.metric(
             "Municipal Tax Rate (Steuerfuss)",
-            f"{profile.gemeinde_steuerfuss}%",
+            f"{profile_steuerfuss(profile):g}%",
             help="This is the tax multiplier for your municipality"
         )
 
@@ -0,0 +1,210 @@
+"""
+Test the vectorized batch engines against the scalar calculators.
+
+Tests:
+1. Federal batch matches calculate_federal_tax row by row (single + married)
+2. Zurich batch matches calculate_zurich_tax with per-row Steuerfüsse
+3. Wealth batch matches calculate_wealth_tax (full and total-only modes)
+4. calculate_complete_taxes_batch matches calculate_complete_taxes per profile
+"""
+import time
+from dataclasses import asdict
+
+import numpy as np
+import pandas as pd
+
+from models.constants import (
+    FEDERAL_TAX_BRACKETS,
+    FEDERAL_TAX_BRACKETS_MARRIED,
+    ZURICH_TAX_BRACKETS,
+    ZURICH_TAX_BRACKETS_MARRIED,
+)
+from calculations.federal_tax import calculate_federal_tax, calculate_federal_tax_batch
+from calculations.cantonal_tax import calculate_zurich_tax, calculate_zurich_tax_batch
+from calculations.wealth_tax import calculate_wealth_tax, calculate_wealth_tax_batch
+from calculations.complete_tax import (
+    BATCH_RESULT_COLUMNS,
+    calculate_complete_taxes,
+    calculate_complete_taxes_batch,
+)
+from models.tax_data import UserProfile, DeductionResult
+
+
+def _sample_incomes():
+    """Random incomes plus every bracket threshold (and +/- 1 CHF around it)."""
+    rng = np.random.default_rng(42)
+    thresholds = [
+        b['threshold'] for b in
+        FEDERAL_TAX_BRACKETS + FEDERAL_TAX_BRACKETS_MARRIED + ZURICH_TAX_BRACKETS + ZURICH_TAX_BRACKETS_MARRIED
+    ]
+    edges = [t + d for t in thresholds for d in (-1, 0, 1)]
+    return np.concatenate([
+        rng.uniform(0, 1_200_000, 500),
+        np.array(edges, dtype=float),
+        np.array([0.0, -5000.0]),
+    ])
+
+
+def test_federal_batch_matches_scalar():
+    """Every output column must equal the scalar TaxResult fields."""
+    print("=" * 80)
+    print("TESTING FEDERAL BATCH ENGINE")
+    print("=" * 80)
+
+    incomes = _sample_incomes()
+    rng = np.random.default_rng(7)
+    deductions = rng.uniform(0, 20000, incomes.size)
+    statuses = np.where(rng.random(incomes.size) < 0.5, 'married', 'single')
+
+    batch = calculate_federal_tax_batch(incomes, deductions, statuses)
+
+    for i in range(incomes.size):
+        scalar = calculate_federal_tax(incomes[i], deductions[i], statuses[i])
+        for key, values in batch.items():
+            expected = getattr(scalar, key)
+            assert abs(values[i] - expected) < 1e-6, \
+                f"{key} mismatch for income {incomes[i]} ({statuses[i]}): {values[i]} != {expected}"
+
+    print(f"[OK] {incomes.size} rows match calculate_federal_tax")
+
+
+def test_federal_batch_scalar_broadcast():
+    """Scalar deductions / marital status are broadcast to every row."""
+    incomes = np.array([50000.0, 100000.0, 250000.0])
+    batch = calculate_federal_tax_batch(incomes, 5000, 'married')
+
+    for i, income in enumerate(incomes):
+        scalar = calculate_federal_tax(income, 5000, 'married')
+        assert abs(batch['federal_tax'][i] - scalar.federal_tax) < 1e-9
+
+    print("[OK] Scalar arguments broadcast correctly")
+
+
+def test_zurich_batch_matches_scalar():
+    """Einfache, cantonal, municipal and Personalsteuer columns equal the scalar path."""
+    print("=" * 80)
+    print("TESTING ZURICH BATCH ENGINE")
+    print("=" * 80)
+
+    incomes = _sample_incomes()
+    rng = np.random.default_rng(11)
+    deductions = rng.uniform(0, 20000, incomes.size)
+    statuses = np.where(rng.random(incomes.size) < 0.5, 'married', 'single')
+    steuerfuesse = rng.choice([72, 96, 119, 122], incomes.size)
+
+    batch = calculate_zurich_tax_batch(incomes, steuerfuesse, deductions, statuses)
+
+    for i in range(incomes.size):
+        scalar = calculate_zurich_tax(incomes[i], int(steuerfuesse[i]), deductions[i], statuses[i])
+        for key, values in batch.items():
+            expected = getattr(scalar, key)
+            assert abs(values[i] - expected) < 1e-6, \
+                f"{key} mismatch for income {incomes[i]} ({statuses[i]}): {values[i]} != {expected}"
+
+    print(f"[OK] {incomes.size} rows match calculate_zurich_tax")
+
+
+def test_zurich_batch_million_rows():
+    """1M rows must stay well under a second."""
+    rng = np.random.default_rng(3)
+    incomes = rng.uniform(0, 500000, 1_000_000)
+    steuerfuesse = rng.choice([72, 96, 119, 122], incomes.size)
+    statuses = np.where(rng.random(incomes.size) < 0.5, 'married', 'single')
+
+    start = time.perf_counter()
+    calculate_zurich_tax_batch(incomes, steuerfuesse, 0.0, statuses)
+    elapsed = time.perf_counter() - start
+
+    print(f"1M rows in {elapsed:.3f}s")
+    assert elapsed < 1.0, f"Zurich batch too slow: {elapsed:.3f}s"
+
+
+def test_wealth_batch_matches_scalar():
+    """All wealth columns equal calculate_wealth_tax; total_only returns the same totals."""
+    print("=" * 80)
+    print("TESTING WEALTH BATCH ENGINE")
+    print("=" * 80)
+
+    rng = np.random.default_rng(5)
+    wealth = np.concatenate([rng.uniform(-50000, 10_000_000, 500), [0.0, 80000.0, 159000.0, 41100.0]])
+    children = rng.integers(0, 4, wealth.size)
+    statuses = np.where(rng.random(wealth.size) < 0.5, 'married', 'single')
+    steuerfuesse = rng.choice([72, 96, 119, 122], wealth.size)
+
+    batch = calculate_wealth_tax_batch(wealth, children, steuerfuesse, statuses)
+    totals = calculate_wealth_tax_batch(wealth, children, steuerfuesse, statuses, total_only=True)
+
+    for i in range(wealth.size):
+        scalar = calculate_wealth_tax(wealth[i], int(children[i]), int(steuerfuesse[i]), statuses[i])
+        for key, expected in scalar.items():
+            assert abs(batch[key][i] - expected) < 1e-6, \
+                f"{key} mismatch for wealth {wealth[i]} ({statuses[i]}): {batch[key][i]} != {expected}"
+        assert abs(totals[i] - scalar['wealth_tax']) < 1e-6
+
+    print(f"[OK] {wealth.size} rows match calculate_wealth_tax")
+
+
+def _random_profiles(count, seed=13):
+    """Random profiles with deductions that exercise both commuting caps."""
+    rng = np.random.default_rng(seed)
+    profiles, deductions = [], []
+    for _ in range(count):
+        profile = UserProfile()
+        profile.marital_status = str(rng.choice(['single', 'married']))
+        profile.net_salary = float(rng.uniform(0, 400000))
+        profile.spouse1_net_salary = float(rng.uniform(0, 200000))
+        profile.spouse2_net_salary = float(rng.uniform(0, 150000))
+        profile.gemeinde_steuerfuss = int(rng.choice([72, 96, 119, 122]))
+        profile.religious_affiliation = str(rng.choice(['none', 'reformed', 'catholic', 'christian-catholic']))
+        profile.total_wealth = float(rng.choice([0.0, rng.uniform(0, 3_000_000)]))
+        profile.num_children = int(rng.integers(0, 4))
+
+        deduction = DeductionResult()
+        deduction.commuting_pauschal = float(rng.choice([0.0, 700.0, 4000.0, 6000.0]))
+        deduction.meal_costs_pauschal = 3200.0
+        deduction.pillar_3a = float(rng.uniform(0, 7258))
+        deduction.calculate_totals()
+
+        profiles.append(profile)
+        deductions.append(deduction)
+    return profiles, deductions
+
+
+def test_complete_batch_matches_scalar():
+    """Every batch column equals the scalar TaxResult, with and without deductions."""
+    print("=" * 80)
+    print("TESTING COMPLETE TAX BATCH")
+    print("=" * 80)
+
+    profiles, deductions = _random_profiles(300)
+    profile_frame = pd.DataFrame([asdict(p) for p in profiles])
+    deduction_frame = pd.DataFrame([asdict(d) for d in deductions])
+
+    with_deductions = calculate_complete_taxes_batch(profile_frame, deduction_frame)
+    without_deductions = calculate_complete_taxes_batch(profile_frame)
+
+    for i, (profile, deduction) in enumerate(zip(profiles, deductions)):
+        income = (
+            profile.spouse1_net_salary + profile.spouse2_net_salary
+            if profile.marital_status == 'married' else profile.net_salary
+        )
+        scalar_all = calculate_complete_taxes(income, deduction.total_deductions, profile, deduction_result=deduction)
+        scalar_none = calculate_complete_taxes(income, 0, profile)
+
+        for column in BATCH_RESULT_COLUMNS:
+            assert abs(with_deductions[column].iloc[i] - getattr(scalar_all, column)) < 1e-6, \
+                f"{column} mismatch (with deductions) in row {i}"
+            assert abs(without_deductions[column].iloc[i] - getattr(scalar_none, column)) < 1e-6, \
+                f"{column} mismatch (no deductions) in row {i}"
+
+    print(f"[OK] {len(profiles)} profiles match calculate_complete_taxes")
+
+
+if __name__ == "__main__":
+    test_federal_batch_matches_scalar()
+    test_federal_batch_scalar_broadcast()
+    test_zurich_batch_matches_scalar()
+    test_zurich_batch_million_rows()
+    test_wealth_batch_matches_scalar()
+    test_complete_batch_matches_scalar()
+    print("\n[SUCCESS] ALL BATCH ENGINE TESTS PASSED!\n")
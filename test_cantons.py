@@ -0,0 +1,142 @@
+"""
+Test the canton plugins and the cross-canton comparison.
+
+Tests:
+1. The Zurich plugin matches calculate_complete_taxes_batch in every municipality
+2. A second (test) canton is compared in the same pass, sharing the federal tax
+3. Plugin installation rules and the single-profile comparison
+"""
+import numpy as np
+import pandas as pd
+from calculations.cantons import (
+    CANTON_PLUGINS,
+    COMPARISON_COLUMNS,
+    CantonPlugin,
+    ZurichPlugin,
+    compare_cantons,
+    compare_profile,
+    installed_cantons,
+    register_canton,
+)
+from calculations.complete_tax import calculate_complete_taxes_batch
+from calculations.municipalities import load_municipalities
+from models.tax_data import UserProfile, DeductionResult
+
+
+def _profiles():
+    profiles = pd.DataFrame({
+        'income': [0.0, 65000.0, 140000.0, 420000.0],
+        'marital_status': ['single', 'single', 'married', 'married'],
+        'religious_affiliation': ['none', 'reformed', 'catholic', 'christian-catholic'],
+        'total_wealth': [0.0, 120000.0, 800000.0, 4000000.0],
+        'num_children': [0, 0, 2, 3],
+    }, index=['a', 'b', 'c', 'd'])
+    deductions = pd.DataFrame({
+        'total_deductions': [0.0, 9000.0, 32000.0, 60000.0],
+        'commuting_pauschal': [0.0, 4000.0, 6000.0, 0.0],
+    }, index=profiles.index)
+    return profiles, deductions
+
+
+class FlatCanton(CantonPlugin):
+    """Test canton: 5% flat simple tax, one municipality, no wealth tax."""
+
+    code = 'XX'
+    name = 'Flat'
+
+    def simple_income_tax(self, taxable_income, married, tax_year=None):
+        return taxable_income * 0.05
+
+    def simple_wealth_tax(self, total_wealth, num_children, married, tax_year=None):
+        return np.zeros(len(total_wealth))
+
+    def cantonal_steuerfuss(self, tax_year=None):
+        return 100.0
+
+    def municipalities(self, tax_year=None):
+        return pd.Index(['Flatville']), np.array([50.0])
+
+
+def test_zurich_plugin_matches_batch():
+    """Every (profile, municipality) row equals the Zurich batch at that Steuerfuss."""
+    print("=" * 80)
+    print("TESTING CANTON PLUGINS")
+    print("=" * 80)
+
+    profiles, deductions = _profiles()
+    comparison = compare_cantons(profiles, deductions, cantons=['ZH'])
+    municipalities = load_municipalities()
+    assert list(comparison.columns) == COMPARISON_COLUMNS
+    assert len(comparison) == len(profiles) * len(municipalities)
+
+    for name, steuerfuss in municipalities['steuerfuss'].items():
+        expected = calculate_complete_taxes_batch(profiles.assign(gemeinde_steuerfuss=steuerfuss), deductions)
+        rows = comparison.xs(('ZH', name), level=('canton', 'municipality'))
+        for column in ('federal_tax', 'cantonal_tax', 'municipal_tax', 'church_tax', 'wealth_tax', 'total_tax'):
+            assert np.allclose(rows[column], expected[column], rtol=0, atol=1e-6), (name, column)
+        assert np.allclose(rows['personal_tax'], expected['personalsteuer'])
+
+    print(f"   {len(comparison)} (profile, municipality) rows")
+    print("[OK] Zurich plugin matches calculate_complete_taxes_batch")
+
+
+def test_second_canton_shares_federal_tax():
+    """An installed test canton appears next to Zurich with the same federal tax."""
+    profiles, deductions = _profiles()
+    register_canton(FlatCanton())
+    try:
+        assert installed_cantons() == ('ZH', 'XX')
+        comparison = compare_cantons(profiles, deductions)
+        flat = comparison.xs(('XX', 'Flatville'), level=('canton', 'municipality'))
+        zurich = comparison.xs(('ZH', 'Zürich'), level=('canton', 'municipality'))
+        assert np.array_equal(flat['federal_tax'], zurich['federal_tax'])
+
+        # Default deduction rules: no commuting cap
+        taxable = np.maximum(profiles['income'] - deductions['total_deductions'], 0)
+        assert np.allclose(flat['total_tax'], taxable * 0.05 * 1.5)
+        assert np.allclose(flat['total_tax_incl_federal'], flat['total_tax'] + flat['federal_tax'])
+    finally:
+        del CANTON_PLUGINS['XX']
+
+    print("[OK] Second canton compared with a shared federal tax")
+
+
+def test_installation_and_single_profile():
+    """Duplicate codes and incomplete plugins are rejected; compare_profile sorts one profile's options."""
+    try:
+        register_canton(ZurichPlugin())
+        assert False, "Duplicate canton should raise"
+    except ValueError:
+        pass
+    class IncompleteCanton(CantonPlugin):
+        code = 'YY'
+
+        def simple_income_tax(self, taxable_income, married, tax_year=None):
+            return taxable_income * 0.05
+    try:
+        IncompleteCanton()
+        assert False, "A plugin without all required hooks should not instantiate"
+    except TypeError:
+        pass
+    try:
+        compare_cantons(pd.DataFrame({'income': [1.0]}), cantons=['ZG'])
+        assert False, "Unknown canton should raise"
+    except KeyError:
+        pass
+
+    profile = UserProfile(net_salary=150000, religious_affiliation='reformed', total_wealth=600000)
+    deductions = DeductionResult(commuting_pauschal=7000, pillar_3a=7258)
+    deductions.calculate_totals()
+    options = compare_profile(profile, deductions)
+    assert options.index.names == ['canton', 'municipality']
+    assert options.index[0] == ('ZH', 'Kilchberg')
+    assert np.all(np.diff(options['total_tax_incl_federal']) >= 0)
+
+    print("[OK] Plugin installation and single-profile comparison")
+
+
+if __name__ == "__main__":
+    test_zurich_plugin_matches_batch()
+    test_second_canton_shares_federal_tax()
+    test_installation_and_single_profile()
+    print("\n[SUCCESS] ALL CANTON PLUGIN TESTS PASSED!\n")
@@ -0,0 +1,138 @@
+"""
+Test the capital withdrawal tax and the staggered-withdrawal optimizer.
+
+Tests:
+1. Federal 1/5 tariff, Zurich rate at 1/10 of the capital with the 2% floor; batch equals scalar
+2. The optimizer finds the brute-force optimum and respects the account windows
+3. Invalid windows are rejected
+4. 10 accounts over 10 years (all windows open) in well under a second
+"""
+import itertools
+import time
+import numpy as np
+import pandas as pd
+from calculations.capital_withdrawal import (
+    SCHEDULE_COLUMNS,
+    calculate_capital_withdrawal_tax,
+    calculate_capital_withdrawal_tax_batch,
+    optimize_withdrawals,
+)
+from calculations.registry import get_bundle
+
+
+def test_capital_withdrawal_tax():
+    """Separate taxation at reduced rates; the batch matches the scalar path."""
+    print("=" * 80)
+    print("TESTING CAPITAL WITHDRAWAL TAX")
+    print("=" * 80)
+
+    bundle = get_bundle()
+    result = calculate_capital_withdrawal_tax(300000, 'single', 119, 'reformed')
+    assert abs(result['federal_tax'] - bundle.federal_single.evaluate(300000) / 5) < 1e-9
+    zurich_rate = bundle.zurich_single.evaluate(30000) / 30000
+    expected_einfache = 300000 * max(zurich_rate, 0.02)
+    assert abs(result['einfache_tax'] - expected_einfache) < 1e-9
+    assert abs(result['total_tax'] - (result['federal_tax'] + expected_einfache * (bundle.cantonal_steuerfuss + 119 + 10) / 100)) < 1e-6
+
+    # Small withdrawals pay the 2% minimum rate
+    small = calculate_capital_withdrawal_tax(20000)
+    assert small['zurich_rate'] == 2.0 and small['einfache_tax'] == 400.0
+    assert calculate_capital_withdrawal_tax(0)['total_tax'] == 0.0
+
+    amounts = np.array([0.0, 5000.0, 80000.0, 250000.0, 900000.0, 2500000.0])
+    status = np.array(['single', 'married', 'single', 'married', 'single', 'married'])
+    batch = calculate_capital_withdrawal_tax_batch(amounts, status, 100, 0.11)
+    for i, amount in enumerate(amounts):
+        scalar = calculate_capital_withdrawal_tax(amount, status[i], 100, 'catholic')
+        for key, value in scalar.items():
+            assert abs(batch[key][i] - value) < 1e-6, (amount, key)
+
+    # Progressive: one lump sum costs more than two halves in different years
+    assert calculate_capital_withdrawal_tax(800000)['total_tax'] > 2 * calculate_capital_withdrawal_tax(400000)['total_tax']
+
+    print(f"   CHF 300,000 single, Zurich: CHF {result['total_tax']:,.0f} ({result['effective_rate']:.2f}%)")
+    print("[OK] Capital withdrawal tax")
+
+
+def test_optimizer_matches_brute_force():
+    """Dynamic programming equals exhaustive search over all schedules."""
+    accounts = pd.DataFrame({
+        'amount': [420000.0, 95000.0, 60000.0, 180000.0, 35000.0],
+        'earliest_year': [2031, 2030, 2030, 2032, 2030],
+        'latest_year': [2031, 2035, 2034, 2036, 2036],
+    }, index=['pk1', '3a-a', '3a-b', 'pk2', '3a-c'])
+    years = list(range(2030, 2037))
+    result = optimize_withdrawals(accounts, years, 'married', 119, 'reformed', spouse2_religious_affiliation='none')
+
+    church = 0.05   # Reformed spouse 1, spouse 2 without church
+    best = np.inf
+    for combo in itertools.product(years, repeat=len(accounts)):
+        if not all(accounts['earliest_year'].iloc[i] <= y <= accounts['latest_year'].iloc[i] for i, y in enumerate(combo)):
+            continue
+        yearly = [sum(accounts['amount'].iloc[i] for i, y in enumerate(combo) if y == year) for year in years]
+        best = min(best, sum(calculate_capital_withdrawal_tax(a, 'married', 119, church_multiplier=church)['total_tax']
+                             for a in yearly))
+    assert abs(result['total_tax'] - best) < 1e-6
+
+    chosen = result['accounts']['withdrawal_year']
+    assert chosen['pk1'] == 2031
+    assert ((chosen >= accounts['earliest_year']) & (chosen <= accounts['latest_year'])).all()
+    assert list(result['schedule'].columns) == SCHEDULE_COLUMNS
+    assert abs(result['schedule']['amount'].sum() - accounts['amount'].sum()) < 1e-6
+    assert abs(result['schedule']['total_tax'].sum() - result['total_tax']) < 1e-6
+    assert result['savings'] > 0 and abs(result['baseline_tax'] - result['total_tax'] - result['savings']) < 1e-6
+
+    print(f"   Optimal: CHF {result['total_tax']:,.0f}, saves CHF {result['savings']:,.0f} vs. earliest years")
+    print("[OK] Optimizer matches brute force")
+
+
+def test_optimizer_windows_and_errors():
+    """Random windows are respected; impossible windows raise ValueError."""
+    rng = np.random.default_rng(24)
+    accounts = pd.DataFrame({
+        'amount': rng.uniform(20000, 500000, 10),
+        'earliest_year': rng.integers(2030, 2034, 10),
+        'latest_year': rng.integers(2034, 2040, 10),
+    })
+    result = optimize_withdrawals(accounts, range(2030, 2040), 'single', 100, 'catholic')
+    chosen = result['accounts']['withdrawal_year']
+    assert ((chosen >= accounts['earliest_year']) & (chosen <= accounts['latest_year'])).all()
+    assert result['total_tax'] <= result['baseline_tax']
+
+    for bad in (pd.DataFrame({'amount': [1.0], 'earliest_year': [2050]}),
+                pd.DataFrame({'amount': np.ones(13)})):
+        try:
+            optimize_withdrawals(bad, range(2030, 2040))
+            assert False, "Invalid accounts should raise"
+        except ValueError:
+            pass
+
+    print("[OK] Optimizer windows and errors")
+
+
+def test_optimizer_time_budget():
+    """10 accounts × 10 years, every account open in every year, in well under a second."""
+    rng = np.random.default_rng(10)
+    accounts = pd.DataFrame({'amount': rng.uniform(20000, 500000, 10)})
+    years = range(2030, 2040)
+    optimize_withdrawals(accounts.iloc[:2], years)   # Warm up imports and the tariff bundle
+
+    elapsed = np.inf
+    for _ in range(3):
+        start = time.perf_counter()
+        result = optimize_withdrawals(accounts, years, 'married', 119, 'reformed')
+        elapsed = min(elapsed, time.perf_counter() - start)
+    assert elapsed < 0.5, f"10 accounts × 10 years took {elapsed:.3f} s"
+    assert abs(result['schedule']['amount'].sum() - accounts['amount'].sum()) < 1e-6
+    assert result['savings'] > 0
+
+    print(f"   10 accounts × 10 years in {elapsed * 1000:.1f} ms")
+    print("[OK] Optimizer time budget")
+
+
+if __name__ == "__main__":
+    test_capital_withdrawal_tax()
+    test_optimizer_matches_brute_force()
+    test_optimizer_windows_and_errors()
+    test_optimizer_time_budget()
+    print("\n[SUCCESS] ALL CAPITAL WITHDRAWAL TESTS PASSED!\n")
@@ -0,0 +1,166 @@
+"""
+Test per-parish church tax multipliers.
+
+Tests:
+1. Parish Steuerfüsse from the municipality dataset, with the cantonal fallback
+2. Spouse split of mixed-denomination couples
+3. Batch multipliers equal the scalar path, also through calculate_complete_taxes_batch
+4. A dataset fixture with parish Steuerfüsse flows through ranking and canton comparison
+"""
+import tempfile
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from calculations.church_tax import (
+    calculate_church_tax,
+    church_multipliers_batch,
+    household_church_multiplier,
+    parish_multiplier,
+)
+from calculations.complete_tax import calculate_complete_taxes, calculate_complete_taxes_batch
+from calculations.tariff_data import load_municipalities
+from calculations.municipalities import rank_municipalities
+from calculations.cantons import ZurichPlugin
+from models.tax_data import UserProfile
+
+
+def test_parish_multipliers():
+    """Listed parish Steuerfüsse replace the cantonal multiplier; blank ones fall back."""
+    print("=" * 80)
+    print("TESTING PARISH CHURCH TAX")
+    print("=" * 80)
+
+    municipalities = load_municipalities().copy()
+    municipalities.loc['Meilen', 'church_reformed'] = 7
+    municipalities.loc['Uster', 'church_christian_catholic'] = 20
+
+    assert parish_multiplier('reformed', 'Meilen', municipalities=municipalities) == 0.07
+    assert parish_multiplier('christian-catholic', 'Uster', municipalities=municipalities) == 0.20
+    assert parish_multiplier('reformed', 'Zürich', municipalities=municipalities) == 0.10
+    assert parish_multiplier('catholic', 'Nowhere', municipalities=municipalities) == 0.11
+    assert parish_multiplier('reformed') == 0.10
+    assert parish_multiplier('none', 'Meilen', municipalities=municipalities) == 0
+
+    # The shipped dataset lists no parish Steuerfüsse: cantonal multipliers everywhere
+    assert household_church_multiplier('catholic', municipality='Uster') == 0.11
+
+    print("[OK] Parish Steuerfüsse with cantonal fallback")
+
+
+def test_spouse_split():
+    """Mixed couples pay half to each parish; single spouses are never split."""
+    assert household_church_multiplier('reformed', 'none', 'married') == 0.05
+    assert household_church_multiplier('none', 'catholic', 'married') == 0.055
+    assert abs(household_church_multiplier('reformed', 'catholic', 'married') - 0.105) < 1e-12
+    assert household_church_multiplier('reformed', 'reformed', 'married') == 0.10
+    assert household_church_multiplier('reformed', None, 'married') == 0.10
+    assert household_church_multiplier('reformed', 'none', 'single') == 0.10
+
+    result = calculate_church_tax(10000, 100, 'none', 150000, spouse2_religious_affiliation='catholic',
+                                  marital_status='married')
+    assert result['applied'] and abs(result['church_tax'] - 550) < 1e-9
+    assert not calculate_church_tax(10000, 100, 'none', 150000)['applied']
+
+    profile = UserProfile(marital_status='married', spouse1_net_salary=100000, spouse2_net_salary=60000,
+                          religious_affiliation='reformed')
+    both = calculate_complete_taxes(160000, 20000, profile)
+    profile.spouse2_religious_affiliation = 'none'
+    half = calculate_complete_taxes(160000, 20000, profile)
+    assert abs(half.church_tax - both.church_tax / 2) < 1e-6
+    assert half.cantonal_tax == both.cantonal_tax
+
+    print(f"   Reformed couple: CHF {both.church_tax:,.2f}, one member: CHF {half.church_tax:,.2f}")
+    print("[OK] Spouse split")
+
+
+def test_batch_matches_scalar():
+    """church_multipliers_batch and the batch engine equal the scalar path row by row."""
+    municipalities = load_municipalities().copy()
+    municipalities.loc['Meilen', 'church_catholic'] = 9
+    religions = ['none', 'reformed', 'catholic', 'christian-catholic', 'unknown']
+    rng = np.random.default_rng(23)
+    n = 400
+    religion = rng.choice(religions, n).astype(object)
+    spouse2 = rng.choice(religions + [None], n).astype(object)
+    status = rng.choice(['single', 'married'], n).astype(object)
+    municipality = rng.choice(list(municipalities.index) + ['Nowhere', None], n).astype(object)
+
+    batch = church_multipliers_batch(religion, spouse2, status, municipality, municipalities=municipalities)
+    for i in range(n):
+        rate = parish_multiplier(religion[i], municipality[i], municipalities=municipalities)
+        if status[i] == 'married' and spouse2[i] not in (None, religion[i]):
+            rate = (rate + parish_multiplier(spouse2[i], municipality[i], municipalities=municipalities)) / 2
+        assert abs(batch[i] - rate) < 1e-12, i
+
+    # Without spouse or municipality columns the batch engine is unchanged
+    frame = pd.DataFrame({
+        'income': rng.uniform(0, 300000, 50),
+        'marital_status': rng.choice(['single', 'married'], 50),
+        'religious_affiliation': rng.choice(religions[:4], 50),
+        'gemeinde_steuerfuss': 100,
+    })
+    plain = calculate_complete_taxes_batch(frame)
+    frame['spouse2_religious_affiliation'] = rng.choice(religions[:4], 50)
+    frame['municipality'] = rng.choice(list(municipalities.index), 50)
+    split = calculate_complete_taxes_batch(frame)
+    assert np.allclose(split['cantonal_tax'], plain['cantonal_tax'])
+    for i, row in frame.iterrows():
+        profile = UserProfile(marital_status=row['marital_status'], religious_affiliation=row['religious_affiliation'],
+                              spouse2_religious_affiliation=row['spouse2_religious_affiliation'],
+                              municipality=row['municipality'], gemeinde_steuerfuss=100)
+        expected = calculate_complete_taxes(row['income'], 0, profile)
+        assert abs(expected.church_tax - split['church_tax'][i]) < 1e-6, i
+
+    print("[OK] Batch multipliers match the scalar path")
+
+
+# Municipality dataset with parish Steuerfüsse (illustrative values, not official rates)
+PARISH_FIXTURE = """municipality,postal_code,steuerfuss,church_reformed,church_catholic,church_christian_catholic
+Alpha,8001,100,8,12,
+Beta,8002,110,,9.5,14
+Gamma,8003,90,11,,
+"""
+
+
+def test_parish_fixture():
+    """Parish Steuerfüsse read from a CSV reach the multipliers, the ranking and the canton plugin."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'municipalities.csv'
+        path.write_text(PARISH_FIXTURE, encoding='utf-8')
+        municipalities = load_municipalities(path)
+
+    assert parish_multiplier('reformed', 'Alpha', municipalities=municipalities) == 0.08
+    assert parish_multiplier('reformed', 'Beta', municipalities=municipalities) == 0.10     # Blank: cantonal
+    assert parish_multiplier('catholic', 'Beta', municipalities=municipalities) == 0.095
+    assert parish_multiplier('christian-catholic', 'Alpha', municipalities=municipalities) == 0.15
+
+    rates = church_multipliers_batch(['reformed'] * 3, ['catholic'] * 3, ['married'] * 3,
+                                     ['Alpha', 'Beta', 'Gamma'], municipalities=municipalities)
+    assert np.allclose(rates, [(0.08 + 0.12) / 2, (0.10 + 0.095) / 2, (0.11 + 0.11) / 2])
+
+    profile = UserProfile(marital_status='married', spouse1_net_salary=110000, spouse2_net_salary=40000,
+                          religious_affiliation='reformed', spouse2_religious_affiliation='catholic',
+                          municipality='Alpha', gemeinde_steuerfuss=100)
+    ranking = rank_municipalities(profile, municipalities=municipalities)
+    assert ranking.loc['Alpha', 'church_steuerfuss'] == 10
+    assert ranking.loc['Beta', 'church_steuerfuss'] == 9.75
+    assert ranking.loc['Alpha', 'savings'] == 0
+    einfache = ranking.loc['Alpha', 'church_tax'] / 0.10
+    assert abs(ranking.loc['Gamma', 'church_tax'] - einfache * 0.11) < 1e-6
+
+    names, taxes = ZurichPlugin(municipalities).evaluate(
+        np.array([150000.0]), np.array([0.0]), np.array([0.0]), np.array([True]), np.array(['reformed'], dtype=object),
+        np.array([0.0]), np.array([0.0]), spouse2_religious_affiliation=np.array(['catholic'], dtype=object),
+    )
+    church = dict(zip(names, taxes['church_tax'][0]))
+    assert church['Beta'] < church['Alpha'] < church['Gamma']   # 9.75% < 10% < 11%
+
+    print("[OK] Parish fixture flows through ranking and canton comparison")
+
+
+if __name__ == "__main__":
+    test_parish_multipliers()
+    test_spouse_split()
+    test_batch_matches_scalar()
+    test_parish_fixture()
+    print("\n[SUCCESS] ALL CHURCH TAX TESTS PASSED!\n")
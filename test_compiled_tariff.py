@@ -0,0 +1,146 @@
+"""
+Test compiled tariffs (prefix sums + bisect lookup) against a plain bracket walk.
+
+Tests:
+1. Zurich and wealth tariffs equal the bracket-by-bracket sum
+2. Federal tariff equals base_tax + excess formula from the DBG tables
+3. Compiled arrays are read-only
+4. Official rounding (dense CHF 100 / CHF 1,000 tables) in the scalar and batch calculators
+"""
+import numpy as np
+
+from models.constants import (
+    FEDERAL_TAX_BRACKETS,
+    ZURICH_TAX_BRACKETS,
+    ZURICH_TAX_BRACKETS_MARRIED,
+    WEALTH_TAX_BRACKETS_SINGLE,
+)
+from calculations.tariff import (
+    CompiledTariff,
+    FEDERAL_SINGLE,
+    ZURICH_SINGLE,
+    ZURICH_MARRIED,
+    WEALTH_SINGLE,
+    DENSE_INCOME_TABLE_LIMIT,
+    income_table,
+)
+from calculations.federal_tax import calculate_federal_tax, calculate_federal_tax_batch
+from calculations.cantonal_tax import calculate_zurich_tax, calculate_zurich_tax_batch
+from calculations.wealth_tax import calculate_wealth_tax, calculate_wealth_tax_batch
+
+
+def _walk_brackets(amount, brackets, rate_key, divisor):
+    """Reference implementation: sum tax over every bracket below amount."""
+    tax = 0.0
+    for i, bracket in enumerate(brackets):
+        upper = brackets[i + 1]['threshold'] if i + 1 < len(brackets) else float('inf')
+        if amount > bracket['threshold']:
+            tax += (min(amount, upper) - bracket['threshold']) / divisor * bracket[rate_key]
+    return tax
+
+
+def test_cumulative_tariffs_match_bracket_walk():
+    """Prefix-sum evaluation equals walking all lower brackets."""
+    print("=" * 80)
+    print("TESTING COMPILED TARIFFS")
+    print("=" * 80)
+
+    rng = np.random.default_rng(1)
+    cases = [
+        (ZURICH_SINGLE, ZURICH_TAX_BRACKETS, 'rate', 100, 600000),
+        (ZURICH_MARRIED, ZURICH_TAX_BRACKETS_MARRIED, 'rate', 100, 900000),
+        (WEALTH_SINGLE, WEALTH_TAX_BRACKETS_SINGLE, 'rate_per_thousand', 1000, 8_000_000),
+    ]
+    for tariff, brackets, rate_key, divisor, upper in cases:
+        amounts = np.concatenate([rng.uniform(0, upper, 300), [b['threshold'] for b in brackets]])
+        for amount in amounts:
+            expected = _walk_brackets(amount, brackets, rate_key, divisor)
+            assert abs(tariff.evaluate(amount) - expected) < 1e-6, \
+                f"{tariff.name}: {tariff.evaluate(amount)} != {expected} at {amount}"
+        vectorized = tariff.evaluate_array(amounts)
+        assert np.allclose(vectorized, [tariff.evaluate(a) for a in amounts], rtol=0, atol=1e-9)
+        print(f"[OK] {tariff.name} matches bracket walk")
+
+
+def test_federal_tariff_uses_stated_base_tax():
+    """Federal tax = base_tax + (excess / 100) × rate of the last threshold <= income."""
+    for amount in [15000, 32799, 32800, 100000, 783200, 783299, 783300, 1_000_000]:
+        bracket = [b for b in FEDERAL_TAX_BRACKETS if amount >= b['threshold']][-1]
+        expected = bracket['base_tax'] + (amount - bracket['threshold']) / 100 * bracket['rate_per_hundred']
+        assert abs(FEDERAL_SINGLE.evaluate(amount) - expected) < 1e-9
+    print("[OK] federal_single matches DBG base tax formula")
+
+
+def test_strict_locate_and_read_only_arrays():
+    """strict=True puts threshold amounts into the lower bracket; arrays are frozen."""
+    assert ZURICH_SINGLE.locate(6900) == 1
+    assert ZURICH_SINGLE.locate(6900, strict=True) == 0
+    assert ZURICH_SINGLE.locate(0, strict=True) == 0
+
+    try:
+        ZURICH_SINGLE.threshold_array[0] = 1.0
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Compiled tariff arrays must be read-only")
+
+    try:
+        CompiledTariff('bad', [10, 0], [0, 0], [1, 1], 100)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Unsorted thresholds must be rejected")
+    print("[OK] locate semantics and read-only arrays")
+
+
+def test_official_rounding_uses_dense_tables():
+    """Rounded results equal the exact formula at the rounded-down amount."""
+    print("=" * 80)
+    print("TESTING OFFICIAL ROUNDING")
+    print("=" * 80)
+
+    rng = np.random.default_rng(9)
+    incomes = np.concatenate([rng.uniform(0, 1_500_000, 300), [97550.0, 99.0, 1_000_000.0, 1_000_050.0]])
+
+    for income in incomes:
+        rounded = np.floor(income / 100) * 100
+        for status in ('single', 'married'):
+            fed = calculate_federal_tax(income, 0, status, official_rounding=True)
+            fed_exact = calculate_federal_tax(rounded, 0, status)
+            assert fed.taxable_income == rounded
+            assert abs(fed.federal_tax - fed_exact.federal_tax) < 1e-9
+            assert fed.federal_bracket_index == fed_exact.federal_bracket_index
+
+            cant = calculate_zurich_tax(income, 119, 0, status, official_rounding=True)
+            cant_exact = calculate_zurich_tax(rounded, 119, 0, status)
+            assert abs(cant.einfache_staatssteuer - cant_exact.einfache_staatssteuer) < 1e-9
+            assert cant.cantonal_bracket_index == cant_exact.cantonal_bracket_index
+
+    fed_batch = calculate_federal_tax_batch(incomes, 0, 'single', official_rounding=True)
+    cant_batch = calculate_zurich_tax_batch(incomes, 119, 0, 'single', official_rounding=True)
+    for i, income in enumerate(incomes):
+        assert abs(fed_batch['federal_tax'][i] - calculate_federal_tax(income, 0, official_rounding=True).federal_tax) < 1e-9
+        assert abs(cant_batch['cantonal_tax'][i] - calculate_zurich_tax(income, 119, 0, official_rounding=True).cantonal_tax) < 1e-9
+
+    wealth = calculate_wealth_tax(1_234_567, 1, 119, official_rounding=True)
+    wealth_exact = calculate_wealth_tax(1_193_000 + 41100, 1, 119)
+    assert wealth['taxable_wealth'] == 1_193_000
+    assert abs(wealth['wealth_tax'] - wealth_exact['wealth_tax']) < 1e-9
+    wealth_batch = calculate_wealth_tax_batch([1_234_567], 1, 119, official_rounding=True, total_only=True)
+    assert abs(wealth_batch[0] - wealth['wealth_tax']) < 1e-9
+
+    # The table stops at its limit; above it the formula takes over
+    table = income_table(FEDERAL_SINGLE)
+    assert len(table.tax) == DENSE_INCOME_TABLE_LIMIT // 100 + 1
+    tax, _ = table.lookup(2_000_000)
+    assert abs(tax - FEDERAL_SINGLE.evaluate(2_000_000)) < 1e-9
+
+    print("[OK] Official rounding matches the exact tariff at rounded amounts")
+
+
+if __name__ == "__main__":
+    test_cumulative_tariffs_match_bracket_walk()
+    test_federal_tariff_uses_stated_base_tax()
+    test_strict_locate_and_read_only_arrays()
+    test_official_rounding_uses_dense_tables()
+    print("\n[SUCCESS] ALL COMPILED TARIFF TESTS PASSED!\n")
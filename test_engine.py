@@ -0,0 +1,120 @@
+"""
+Test the memoizing TaxEngine.
+
+Tests:
+1. Cached results equal direct calculations; hit/miss counters
+2. LRU eviction and tariff version in the key
+3. Named key fields and one default engine across threads
+"""
+import threading
+from calculations import engine as engine_module
+from calculations.engine import CacheKey, TaxEngine, get_default_engine
+from calculations.complete_tax import calculate_complete_taxes, BATCH_RESULT_COLUMNS
+from ui.tax_comparison import calculate_complete_taxes as ui_calculate_complete_taxes
+from models.tax_data import UserProfile, DeductionResult
+from models.constants import DEFAULT_TAX_YEAR
+import pandas as pd
+
+
+def test_cache_hits_match_direct_calculation():
+    """Repeated calls are served from the cache and match calculate_complete_taxes."""
+    print("=" * 80)
+    print("TESTING TAX ENGINE CACHE")
+    print("=" * 80)
+
+    engine = TaxEngine(maxsize=8)
+    profile = UserProfile(marital_status='married', religious_affiliation='reformed', total_wealth=300000)
+    deductions = DeductionResult(commuting_pauschal=6000, pillar_3a=7258)
+    deductions.calculate_totals()
+
+    first = engine.calculate(120000, deductions.total_deductions, profile, deductions)
+    second = engine.calculate(120000, deductions.total_deductions, profile, deductions)
+    direct = calculate_complete_taxes(120000, deductions.total_deductions, profile, deductions)
+    for result in (first, second):
+        assert result.total_tax == direct.total_tax
+        assert result.federal_tax == direct.federal_tax
+    assert engine.stats()['hits'] == 1 and engine.stats()['misses'] == 1
+
+    # Callers get copies: modifying one does not poison the cache
+    second.total_tax = -1
+    assert engine.calculate(120000, deductions.total_deductions, profile, deductions).total_tax == direct.total_tax
+
+    # A different Steuerfuss is a different key
+    profile.gemeinde_steuerfuss = 96
+    assert engine.calculate(120000, deductions.total_deductions, profile, deductions).total_tax < direct.total_tax
+    assert engine.stats()['misses'] == 2
+
+    # The UI goes through the shared engine
+    before = get_default_engine().stats()['hits']
+    ui_calculate_complete_taxes(80000, 0, UserProfile())
+    ui_calculate_complete_taxes(80000, 0, UserProfile())
+    assert get_default_engine().stats()['hits'] == before + 1
+
+    batch = engine.calculate_batch(pd.DataFrame({'income': [50000, 90000]}))
+    assert list(batch.columns) == BATCH_RESULT_COLUMNS
+
+    print("[OK] Cached results match direct calculation")
+
+
+def test_lru_eviction_and_version():
+    """Least recently used entries go first; a new tariff version never reuses old results."""
+    engine = TaxEngine(maxsize=2)
+    profile = UserProfile()
+
+    engine.calculate(50000, 0, profile)
+    engine.calculate(60000, 0, profile)
+    engine.calculate(50000, 0, profile)   # 50k becomes most recent
+    engine.calculate(70000, 0, profile)   # evicts 60k
+    assert engine.stats()['evictions'] == 1 and len(engine) == 2
+
+    engine.calculate(50000, 0, profile)
+    assert engine.hits == 2
+    engine.calculate(60000, 0, profile)
+    assert engine.misses == 4
+
+    other_version = TaxEngine(tariff_version='test')
+    assert other_version.cache_key(50000, 0, profile) != engine.cache_key(50000, 0, profile)
+
+    engine.clear()
+    assert len(engine) == 0
+
+    print("[OK] LRU eviction and tariff version key")
+
+
+def test_named_key_and_default_engine_threads():
+    """Keys expose their fields by name; concurrent first calls share one default engine."""
+    engine = TaxEngine()
+    profile = UserProfile(religious_affiliation='catholic', municipality='Uster')
+    key = engine.cache_key(90000, 5000, profile)
+    assert isinstance(key, CacheKey) and key.mode == 'float'
+    assert (key.tax_year, key.municipality, key.religious_affiliation) == (DEFAULT_TAX_YEAR, 'Uster', 'catholic')
+    engine.calculate_fixed(90000, 5000, profile)
+    assert [k.mode for k in engine._cache] == ['centimes']
+    assert engine.invalidate(key.tax_year, key.version) == 1
+
+    saved = engine_module._default_engine
+    engine_module._default_engine = None
+    try:
+        barrier = threading.Barrier(8)
+        engines = []
+
+        def first_call():
+            barrier.wait()
+            engines.append(get_default_engine())
+        threads = [threading.Thread(target=first_call) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(engines) == 8 and len({id(e) for e in engines}) == 1
+    finally:
+        engine_module._default_engine = saved
+
+    print("[OK] Named cache keys and a single default engine")
+
+
+if __name__ == "__main__":
+    test_cache_hits_match_direct_calculation()
+    test_lru_eviction_and_version()
+    test_named_key_and_default_engine_threads()
+    print("\n[SUCCESS] ALL TAX ENGINE TESTS PASSED!\n")
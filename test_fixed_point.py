@@ -0,0 +1,139 @@
+"""
+Test the fixed-point (integer centime) calculation mode.
+
+Tests:
+1. Integer tariffs match the float tariffs at officially rounded amounts
+2. Batch path equals the scalar path bit for bit and is not slower than floats
+3. Mixed-denomination couples (church Steuerfuss in basis points) in both paths
+"""
+import time
+import numpy as np
+
+from calculations.fixed_point import (
+    ZURICH_SINGLE,
+    FEDERAL_MARRIED,
+    apply_steuerfuss,
+    apply_steuerfuss_basis_points,
+    calculate_taxes_fixed,
+    calculate_taxes_fixed_batch,
+    calculate_complete_taxes_fixed,
+    to_centimes_array,
+)
+from calculations.federal_tax import calculate_federal_tax
+from calculations.cantonal_tax import calculate_zurich_tax
+from calculations.wealth_tax import calculate_wealth_tax
+from calculations.complete_tax import calculate_complete_taxes_batch
+from calculations.engine import TaxEngine
+from models.tax_data import UserProfile
+import pandas as pd
+
+
+def test_fixed_point_matches_official_rounding():
+    """Einfache Steuer is exact; each Steuerfuss application is within 2.5 Rappen."""
+    print("=" * 80)
+    print("TESTING FIXED-POINT MODE")
+    print("=" * 80)
+
+    assert ZURICH_SINGLE.rates[1] == 200          # 2% = 200 parts per 10,000
+    assert FEDERAL_MARRIED.rates[1] == 100        # 1.00 per hundred
+    assert apply_steuerfuss(10, 119) == 10        # 11.9 Rappen -> 10 Rappen
+    assert apply_steuerfuss(13, 119) == 15        # 15.47 Rappen -> 15 Rappen
+
+    rng = np.random.default_rng(5)
+    for income in rng.uniform(0, 1_200_000, 300).round(2):
+        for status in ('single', 'married'):
+            fixed = calculate_taxes_fixed(int(round(income * 100)), 500000, 500000, status, 119)
+            fed = calculate_federal_tax(income, 5000, status, official_rounding=True)
+            cant = calculate_zurich_tax(income, 119, 5000, status, official_rounding=True)
+
+            assert fixed['taxable_income'] == round(cant.taxable_income * 100)
+            assert abs(fixed['einfache_staatssteuer'] - cant.einfache_staatssteuer * 100) < 1e-6
+            assert abs(fixed['federal_tax'] - fed.federal_tax * 100) < 1      # floor to the centime
+            assert fixed['cantonal_tax'] % 5 == 0 and fixed['municipal_tax'] % 5 == 0
+            assert abs(fixed['cantonal_tax'] - cant.cantonal_tax * 100) <= 2.5 + 1e-6
+            assert abs(fixed['municipal_tax'] - cant.municipal_tax * 100) <= 2.5 + 1e-6
+
+    wealth = calculate_wealth_tax(1_234_567, 1, 119, official_rounding=True)
+    fixed = calculate_taxes_fixed(0, total_wealth=123_456_700, number_of_children=1)
+    assert abs(fixed['wealth_tax'] - wealth['wealth_tax'] * 100) <= 5 + 1e-6
+
+    # Profile entry point applies the commuting caps like calculate_complete_taxes
+    profile = UserProfile(religious_affiliation='reformed')
+    complete = calculate_complete_taxes_fixed(95000.55, 12000, profile)
+    assert complete['church_tax'] % 5 == 0 and complete['total_tax'] > 0
+
+    # Engine mode, cached next to the float results
+    engine = TaxEngine()
+    assert engine.calculate_fixed(95000.55, 12000, profile) == complete
+    assert engine.calculate_fixed(95000.55, 12000, profile) == complete
+    assert engine.hits == 1
+
+    print("[OK] Fixed-point taxes reconcile with the rounded float calculation")
+
+
+def test_fixed_point_batch():
+    """int64 batch equals the scalar path exactly and keeps pace with the float batch."""
+    rng = np.random.default_rng(6)
+    n = 1_000_000
+    income = to_centimes_array(rng.uniform(0, 500_000, n))
+    deductions = to_centimes_array(rng.uniform(0, 30_000, n))
+    status = np.where(rng.random(n) < 0.5, 'married', 'single')
+
+    start = time.perf_counter()
+    batch = calculate_taxes_fixed_batch(income, deductions, deductions, status, 119, 'catholic', 0, 0)
+    fixed_elapsed = time.perf_counter() - start
+    assert batch['total_tax'].dtype == np.int64
+
+    for i in rng.integers(0, n, 200):
+        scalar = calculate_taxes_fixed(int(income[i]), int(deductions[i]), int(deductions[i]), status[i], 119, 'catholic')
+        for key, value in scalar.items():
+            assert batch[key][i] == value, key
+
+    frame = pd.DataFrame({'income': income / 100, 'marital_status': status, 'religious_affiliation': 'catholic'})
+    start = time.perf_counter()
+    calculate_complete_taxes_batch(frame, pd.DataFrame({'total_deductions': deductions / 100}))
+    float_elapsed = time.perf_counter() - start
+
+    print(f"  fixed-point: {fixed_elapsed:.3f}s, float: {float_elapsed:.3f}s for {n:,} rows")
+    assert fixed_elapsed < float_elapsed * 1.5
+
+    print("[OK] int64 batch matches the scalar path")
+
+
+def test_fixed_point_mixed_couple():
+    """The spouse-split church Steuerfuss (10.5%) is exact in basis points, scalar and batch alike."""
+    assert apply_steuerfuss_basis_points(13, 11900) == apply_steuerfuss(13, 119)
+    assert apply_steuerfuss_basis_points(1_000_000, 1050) == 105_000
+
+    profile = UserProfile(marital_status='married', spouse1_net_salary=120000, spouse2_net_salary=60000,
+                          religious_affiliation='reformed', spouse2_religious_affiliation='catholic')
+    engine = TaxEngine()
+    fixed = engine.calculate_fixed(180000, 15000, profile)
+    result = engine.calculate(180000, 15000, profile)
+    assert abs(fixed['church_tax'] / 100 - result.church_tax) <= 0.5 + 1e-9   # CHF 100 rounding of taxable income
+    einfache = fixed['einfache_staatssteuer']
+    assert fixed['church_tax'] == apply_steuerfuss_basis_points(einfache, 1050)
+
+    income = to_centimes_array([180000, 95000, 0, 240000])
+    deductions = to_centimes_array([15000, 9000, 0, 30000])
+    status = np.array(['married', 'married', 'married', 'single'])
+    religion = np.array(['reformed', 'none', 'catholic', 'reformed'], dtype=object)
+    spouse2 = np.array(['catholic', 'christian-catholic', None, 'catholic'], dtype=object)
+    batch = calculate_taxes_fixed_batch(income, deductions, deductions, status, 119, religion, 0, 0,
+                                        spouse2_religious_affiliation=spouse2)
+    for i in range(len(income)):
+        couple = UserProfile(marital_status=status[i], religious_affiliation=religion[i],
+                             spouse2_religious_affiliation=spouse2[i])
+        scalar = engine.calculate_fixed(income[i] / 100, deductions[i] / 100, couple)
+        for key, value in scalar.items():
+            assert batch[key][i] == value, (i, key)
+
+    print(f"   Reformed + catholic couple: church tax CHF {fixed['church_tax'] / 100:,.2f} at 10.5%")
+    print("[OK] Mixed-denomination couples in fixed point")
+
+
+if __name__ == "__main__":
+    test_fixed_point_matches_official_rounding()
+    test_fixed_point_batch()
+    test_fixed_point_mixed_couple()
+    print("\n[SUCCESS] ALL FIXED-POINT TESTS PASSED!\n")
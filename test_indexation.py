@@ -0,0 +1,109 @@
+"""
+Test the cold-progression indexation generator.
+
+Tests:
+1. Factor 1.0 reproduces the published tables exactly
+2. Indexed tables: legal rounding, federal cap and flat top bracket
+3. Projected years are built once and evaluate like any other year
+"""
+import numpy as np
+from calculations.indexation import (
+    index_federal_brackets,
+    indexed_bundle,
+    indexed_source,
+    register_indexed_year,
+    register_projection,
+)
+from calculations.registry import TariffRegistry, get_bundle
+from calculations.federal_tax import calculate_federal_tax_batch
+from calculations.fixed_point import calculate_taxes_fixed
+from models import constants
+
+
+TABLES = (
+    'FEDERAL_TAX_BRACKETS',
+    'FEDERAL_TAX_BRACKETS_MARRIED',
+    'ZURICH_TAX_BRACKETS',
+    'ZURICH_TAX_BRACKETS_MARRIED',
+    'WEALTH_TAX_BRACKETS_SINGLE',
+    'WEALTH_TAX_BRACKETS_MARRIED',
+)
+
+
+def test_identity_reproduces_published_tables():
+    """Indexing by 1.0 recomputes every base tax, cap and top bracket of constants.py."""
+    print("=" * 80)
+    print("TESTING COLD PROGRESSION INDEXATION")
+    print("=" * 80)
+
+    source = indexed_source(get_bundle(), 1.0)
+    for name in TABLES:
+        published = getattr(constants, name)
+        generated = source[name]
+        assert len(generated) == len(published), name
+        for ours, theirs in zip(generated, published):
+            for key, value in theirs.items():
+                assert abs(ours[key] - value) < 1e-9, (name, ours, theirs)
+
+    print("[OK] Factor 1.0 reproduces the published tables")
+
+
+def test_indexed_tables():
+    """Thresholds are rounded to CHF 100 / CHF 1,000; the top bracket stays a flat 11.5%."""
+    factor = 1.033
+    source = indexed_source(get_bundle(), factor)
+
+    for name in TABLES:
+        step = 1000 if name.startswith('WEALTH') else 100
+        assert all(b['threshold'] % step == 0 for b in source[name]), name
+
+    for brackets in (source['FEDERAL_TAX_BRACKETS'], source['FEDERAL_TAX_BRACKETS_MARRIED']):
+        cap, top = brackets[-2], brackets[-1]
+        assert cap['rate_per_hundred'] == 0 and top['threshold'] == cap['threshold'] + 100
+        assert abs(top['base_tax'] - top['threshold'] * 0.115) < 1e-9
+        # Progressive tax has not yet reached the flat rate at the cap, but does within CHF 100
+        assert cap['base_tax'] <= cap['threshold'] * 0.115 < top['base_tax']
+        assert all(round(b['base_tax'] * 100) % 5 == 0 for b in brackets)
+
+    # Same real income, (almost) the same real tax
+    base = get_bundle()
+    indexed = indexed_bundle(base, factor, 2040)
+    incomes = np.array([40000.0, 90000.0, 150000.0, 400000.0])
+    ratio = indexed.federal_single.evaluate_array(incomes * factor) / base.federal_single.evaluate_array(incomes)
+    assert np.all(np.abs(ratio - factor) < 0.01)
+
+    print(f"   Federal top bracket at {factor}: CHF {source['FEDERAL_TAX_BRACKETS'][-1]['threshold']:,}")
+    print("[OK] Legal rounding, cap and flat top bracket")
+
+
+def test_projection_years():
+    """Projected years are compiled once, on first use, and work with every calculator."""
+    registry = TariffRegistry()
+    registry.register(2025, get_bundle)
+    years = register_projection(0.015, range(2026, 2051), base_year=2025, registry=registry)
+    assert registry.years() == (2025,) + years
+    assert not any(registry.is_built(year) for year in years)
+
+    bundle = registry.get(2040)
+    assert registry.get(2040) is bundle
+    assert indexed_bundle(registry.get(2025), 1.015 ** 15, 2040) is bundle
+    assert bundle.federal_single.threshold_array[1] > get_bundle().federal_single.threshold_array[1]
+
+    # Projected years through the calculators (default registry)
+    register_indexed_year(2098, 1.05, replace=True)
+    incomes = np.linspace(0, 500000, 1001)
+    current = calculate_federal_tax_batch(incomes, tax_year=2025)['federal_tax']
+    future = calculate_federal_tax_batch(incomes, tax_year=2098)['federal_tax']
+    assert np.all(future <= current)
+    fixed = calculate_taxes_fixed(10_000_000, tax_year=2098)
+    assert fixed['federal_tax'] > 0 and fixed['federal_tax'] < calculate_taxes_fixed(10_000_000)['federal_tax']
+
+    print(f"   {len(years)} projected years registered, {sum(registry.is_built(y) for y in years)} compiled")
+    print("[OK] Projected years built once and evaluated")
+
+
+if __name__ == "__main__":
+    test_identity_reproduces_published_tables()
+    test_indexed_tables()
+    test_projection_years()
+    print("\n[SUCCESS] ALL INDEXATION TESTS PASSED!\n")
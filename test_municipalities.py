@@ -0,0 +1,92 @@
+"""
+Test the municipality dataset and relocation ranking.
+
+Tests:
+1. The dataset agrees with MUNICIPALITY_STEUERFUESSE
+2. Every ranked total equals calculate_complete_taxes at that Steuerfuss
+3. Church Steuerfüsse from the dataset, savings and a large dataset
+"""
+import time
+import numpy as np
+import pandas as pd
+from calculations.municipalities import load_municipalities, rank_municipalities, RANKING_COLUMNS
+from calculations.complete_tax import calculate_complete_taxes
+from models.tax_data import UserProfile, DeductionResult
+from models.constants import MUNICIPALITY_STEUERFUESSE
+
+
+def test_dataset_matches_constants():
+    """Every municipality of the dataset has the Steuerfuss of constants.py and a postal code."""
+    print("=" * 80)
+    print("TESTING MUNICIPALITY RANKING")
+    print("=" * 80)
+
+    municipalities = load_municipalities()
+    assert set(municipalities.index) == set(MUNICIPALITY_STEUERFUESSE)
+    for name, steuerfuss in MUNICIPALITY_STEUERFUESSE.items():
+        assert municipalities.loc[name, 'steuerfuss'] == steuerfuss, name
+    assert municipalities['postal_code'].str.fullmatch(r'8\d{3}').all()
+
+    print(f"   {len(municipalities)} municipalities")
+    print("[OK] Dataset matches MUNICIPALITY_STEUERFUESSE")
+
+
+def test_ranking_matches_complete_taxes():
+    """One einfache computation times the Steuerfüsse equals the full calculation per municipality."""
+    profile = UserProfile(marital_status='married', spouse1_net_salary=110000, spouse2_net_salary=50000,
+                          religious_affiliation='catholic', total_wealth=900000, num_children=2,
+                          municipality='Uster', gemeinde_steuerfuss=108)
+    deductions = DeductionResult(commuting_pauschal=6000, pillar_3a=14516, child_deductions=18000)
+    deductions.calculate_totals()
+
+    ranking = rank_municipalities(profile, deductions)
+    assert list(ranking.columns) == RANKING_COLUMNS
+    assert list(ranking['rank']) == list(range(1, len(ranking) + 1))
+    assert np.all(np.diff(ranking['total_tax']) >= 0)
+
+    for name, row in ranking.iterrows():
+        moved = UserProfile(**{**profile.__dict__, 'municipality': name, 'gemeinde_steuerfuss': row['steuerfuss']})
+        expected = calculate_complete_taxes(160000, deductions.total_deductions, moved, deductions)
+        assert abs(expected.total_tax - row['total_tax']) < 1e-6, name
+        assert abs(expected.municipal_tax - row['municipal_tax']) < 1e-6, name
+        assert abs(expected.church_tax - row['church_tax']) < 1e-6, name
+
+    assert ranking.loc['Uster', 'savings'] == 0
+    assert ranking.index[0] == 'Kilchberg' and ranking['savings'].iloc[0] > 0
+
+    print(f"   Cheapest: {ranking.index[0]}, saves CHF {ranking['savings'].iloc[0]:,.0f} vs. Uster")
+    print("[OK] Ranking matches calculate_complete_taxes")
+
+
+def test_church_steuerfuss_and_large_dataset():
+    """Listed church Steuerfüsse replace the default multiplier; many municipalities stay fast."""
+    municipalities = load_municipalities().copy()
+    municipalities.loc['Meilen', 'church_reformed'] = 7
+    profile = UserProfile(net_salary=95000, religious_affiliation='reformed', municipality='Meilen',
+                          gemeinde_steuerfuss=80)
+
+    ranking = rank_municipalities(profile, municipalities=municipalities)
+    assert ranking.loc['Meilen', 'church_steuerfuss'] == 7
+    assert ranking.loc['Zürich', 'church_steuerfuss'] == 10
+    assert ranking.loc['Meilen', 'savings'] == 0
+    assert rank_municipalities(UserProfile(net_salary=95000), municipalities=municipalities)['church_tax'].sum() == 0
+
+    # 1,600 municipalities in one step
+    large = pd.DataFrame({
+        'postal_code': [f'{8000 + i}' for i in range(1600)],
+        'steuerfuss': np.linspace(70, 130, 1600),
+    }, index=pd.Index([f'Gemeinde {i}' for i in range(1600)], name='municipality'))
+    start = time.perf_counter()
+    ranking = rank_municipalities(profile, municipalities=large)
+    elapsed = time.perf_counter() - start
+    assert ranking.index[0] == 'Gemeinde 0' and len(ranking) == 1600
+
+    print(f"   1,600 municipalities ranked in {elapsed * 1000:.1f} ms")
+    print("[OK] Church Steuerfüsse and large dataset")
+
+
+if __name__ == "__main__":
+    test_dataset_matches_constants()
+    test_ranking_matches_complete_taxes()
+    test_church_steuerfuss_and_large_dataset()
+    print("\n[SUCCESS] ALL MUNICIPALITY RANKING TESTS PASSED!\n")
@@ -0,0 +1,112 @@
+"""
+Test the multi-year tax projection.
+
+Tests:
+1. Every projected row matches a scalar calculate_complete_taxes call
+   (mixed-denomination couple outside the city of Zurich included)
+2. Children age out, Pillar 3a is capped, wealth compounds
+3. Rows use the tariff year registered for their calendar year
+"""
+import numpy as np
+import pandas as pd
+from calculations.projection import project_taxes, scenario_from_profile, tariff_years, PROJECTION_COLUMNS
+from calculations.complete_tax import calculate_complete_taxes
+from calculations.indexation import register_indexed_year
+from models.tax_data import UserProfile, DeductionResult
+from models.constants import CHILD_DEDUCTION_ZH, PILLAR_3A_MAX_EMPLOYED, DEFAULT_TAX_YEAR
+
+
+def _family():
+    family = UserProfile(marital_status='married', spouse1_net_salary=90000, spouse2_net_salary=40000,
+                         num_children=2, children_ages=[12, 16], total_wealth=250000,
+                         religious_affiliation='catholic', spouse2_religious_affiliation='reformed',
+                         municipality='Uster')
+    deductions = DeductionResult(commuting_pauschal=6000, child_deductions=2 * CHILD_DEDUCTION_ZH, pillar_3a=7258)
+    deductions.calculate_totals()
+    return family, deductions
+
+
+def _scenarios() -> pd.DataFrame:
+    family, deductions = _family()
+    return pd.DataFrame([
+        scenario_from_profile(family, deductions, salary_growth=0.02, wealth_return=0.03, annual_savings=12000),
+        {'income': 80000, 'pillar_3a': 9000, 'other_deductions': 4000, 'gemeinde_steuerfuss': 100},
+    ])
+
+
+def test_rows_match_scalar_calculation():
+    """Each (year, scenario) row equals the scalar calculation on the grown inputs."""
+    print("=" * 80)
+    print("TESTING MULTI-YEAR PROJECTION")
+    print("=" * 80)
+
+    scenarios = _scenarios()
+    projection = project_taxes(scenarios, range(DEFAULT_TAX_YEAR, DEFAULT_TAX_YEAR + 10))
+    assert list(projection.columns) == PROJECTION_COLUMNS
+    assert len(projection) == 10 * len(scenarios)
+
+    for (year, scenario), row in projection.iloc[::3].iterrows():
+        source = scenarios.loc[scenario]
+        profile = UserProfile(marital_status=source['marital_status'] if scenario == 0 else 'single',
+                              gemeinde_steuerfuss=source['gemeinde_steuerfuss'],
+                              religious_affiliation=source['religious_affiliation'] if scenario == 0 else 'none',
+                              total_wealth=row['total_wealth'], num_children=row['num_children'])
+        if scenario == 0:
+            profile.spouse2_religious_affiliation = source['spouse2_religious_affiliation']
+            profile.municipality = source['municipality']
+        deductions = DeductionResult(commuting_pauschal=source['commuting_pauschal'] if scenario == 0 else 0.0)
+        expected = calculate_complete_taxes(row['gross_income'], row['total_deductions'], profile, deductions)
+        assert abs(expected.total_tax - row['total_tax']) < 1e-6, (year, scenario)
+        assert abs(expected.federal_tax - row['federal_tax']) < 1e-6, (year, scenario)
+        assert abs(row['net_income'] - (row['gross_income'] - expected.total_tax - expected.federal_tax)) < 1e-6
+
+    # Year 0 of a profile's scenario is the profile's own complete tax
+    family, deductions = _family()
+    first = projection.loc[(DEFAULT_TAX_YEAR, 0)]
+    expected = calculate_complete_taxes(first['gross_income'], deductions.total_deductions, family, deductions)
+    assert first['total_deductions'] == deductions.total_deductions
+    assert abs(expected.church_tax - first['church_tax']) < 1e-6
+    assert abs(expected.total_tax - first['total_tax']) < 1e-6
+
+    print(f"   {len(projection)} rows, scalar spot checks match")
+    print("[OK] Projection rows match calculate_complete_taxes")
+
+
+def test_children_pillar_3a_and_wealth():
+    """Children drop out at 18, Pillar 3a is capped per year, wealth compounds with savings."""
+    projection = project_taxes(_scenarios(), range(2025, 2035))
+    family = projection.xs(0, level='scenario')
+    single = projection.xs(1, level='scenario')
+
+    # Ages 12 and 16: two children until 2026, one until 2030, none after
+    assert family.loc[2026, 'num_children'] == 2 and family.loc[2027, 'num_children'] == 1
+    assert family.loc[2030, 'num_children'] == 1 and family.loc[2031, 'num_children'] == 0
+    assert family.loc[2027, 'total_deductions'] == family.loc[2026, 'total_deductions'] - CHILD_DEDUCTION_ZH
+
+    assert np.all(single['pillar_3a'] == PILLAR_3A_MAX_EMPLOYED)
+    assert single.loc[2029, 'pillar_3a_balance'] == 5 * PILLAR_3A_MAX_EMPLOYED
+
+    expected_wealth = 250000 * 1.03 ** 9 + 12000 * (1.03 ** 9 - 1) / 0.03
+    assert abs(family.loc[2034, 'total_wealth'] - expected_wealth) < 1e-6
+    assert np.all(np.diff(family['gross_income']) > 0)
+
+    print("[OK] Children age out, Pillar 3a capped, wealth compounds")
+
+
+def test_tariff_year_per_row():
+    """Calendar years map to the latest registered tariff year; indexed years lower the tax."""
+    register_indexed_year(2097, 1.10, replace=True)
+    assert list(tariff_years([2020, 2025, 2030, 2097])) == [2025, 2025, 2025, 2097]
+
+    projection = project_taxes(pd.DataFrame({'income': [120000.0]}), [2096, 2097])
+    assert list(projection['tax_year']) == [2025, 2097]
+    assert projection['total_tax'].iloc[1] < projection['total_tax'].iloc[0]
+
+    print("[OK] Tariff year per row")
+
+
+if __name__ == "__main__":
+    test_rows_match_scalar_calculation()
+    test_children_pillar_3a_and_wealth()
+    test_tariff_year_per_row()
+    print("\n[SUCCESS] ALL PROJECTION TESTS PASSED!\n")
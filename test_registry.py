@@ -0,0 +1,107 @@
+"""
+Test the versioned tariff registry.
+
+Tests:
+1. Bundles are built lazily, once, and are read-only
+2. Two tax years evaluated side by side
+"""
+from dataclasses import FrozenInstanceError
+from calculations.registry import TariffRegistry, TARIFF_REGISTRY, get_bundle, constants_source
+from calculations.complete_tax import calculate_complete_taxes
+from calculations.deductions import validate_pillar_3a
+from calculations.engine import TaxEngine
+from calculations import tariff
+from models.constants import DEFAULT_TAX_YEAR
+from models.tax_data import UserProfile, DeductionResult
+
+
+def _assign(container, key, value):
+    container[key] = value
+
+
+def test_lazy_read_only_bundles():
+    """A year is compiled on first use only; bundles and their tables cannot be changed."""
+    print("=" * 80)
+    print("TESTING TARIFF REGISTRY")
+    print("=" * 80)
+
+    builds = []
+    registry = TariffRegistry()
+    registry.register_source(2030, constants_source())
+    registry.register(2031, lambda: builds.append(2031) or get_bundle())
+
+    assert registry.years() == (2030, 2031) and 2030 in registry
+    assert not registry.is_built(2030)
+    bundle = registry.get(2030)
+    assert registry.is_built(2030) and registry.get(2030) is bundle
+    assert not registry.is_built(2031) and builds == []
+    registry.get(2031)
+    registry.get(2031)
+    assert builds == [2031]
+
+    try:
+        registry.get(1999)
+        assert False, "unregistered year should raise"
+    except KeyError:
+        pass
+    try:
+        registry.register(2030, get_bundle)
+        assert False, "duplicate year should raise"
+    except ValueError:
+        pass
+
+    # Read-only: frozen bundle, mapping proxies, tuples, non-writeable arrays
+    default = get_bundle()
+    assert default.tax_year == DEFAULT_TAX_YEAR
+    assert default.federal_single is tariff.FEDERAL_SINGLE
+    for mutate in (
+        lambda: setattr(default, 'cantonal_steuerfuss', 1),
+        lambda: _assign(default.limits, 'CHILDCARE_MAX', 0),
+        lambda: _assign(default.church_tax_multipliers, 'reformed', 0),
+        lambda: _assign(default.federal_brackets_single, 0, {}),
+        lambda: _assign(default.federal_brackets_single[0], 'threshold', 1),
+    ):
+        try:
+            mutate()
+            assert False, "bundle should be read-only"
+        except (FrozenInstanceError, TypeError):
+            pass
+    assert not default.zurich_single.rate_array.flags.writeable
+
+    print("[OK] Lazy, single build and read-only bundles")
+
+
+def test_two_years_side_by_side():
+    """A second year with other tables computes differently; the default year is untouched."""
+    source = constants_source()
+    source['CANTONAL_STEUERFUSS'] = 95
+    source['PILLAR_3A_MAX_EMPLOYED'] = 7500
+    source['COMMUTING_MAX_FEDERAL'] = 3400
+    TARIFF_REGISTRY.register_source(2099, source, replace=True)
+
+    profile = UserProfile(religious_affiliation='catholic', total_wealth=250000)
+    deductions = DeductionResult(commuting_pauschal=5000)
+    deductions.calculate_totals()
+
+    current = calculate_complete_taxes(100000, 5000, profile, deductions)
+    future = calculate_complete_taxes(100000, 5000, profile, deductions, tax_year=2099)
+    assert abs(future.cantonal_tax - current.cantonal_tax * 95 / 98) < 1e-6
+    assert future.municipal_tax == current.municipal_tax
+    assert future.federal_tax < current.federal_tax   # higher federal commuting cap
+    assert calculate_complete_taxes(100000, 5000, profile, deductions).total_tax == current.total_tax
+
+    assert validate_pillar_3a(7400, profile, tax_year=2099)['is_valid']
+    assert not validate_pillar_3a(7400, profile)['is_valid']
+
+    engine = TaxEngine()
+    assert engine.cache_key(100000, 5000, profile) != engine.cache_key(100000, 5000, profile, tax_year=2099)
+    assert engine.calculate(100000, 5000, profile, deductions, tax_year=2099).total_tax == future.total_tax
+
+    print(f"   {DEFAULT_TAX_YEAR}: CHF {current.total_tax:,.2f}   2099: CHF {future.total_tax:,.2f}")
+    print("[OK] Two tax years side by side")
+
+
+if __name__ == "__main__":
+    test_lazy_read_only_bundles()
+    test_two_years_side_by_side()
+    print("\n[SUCCESS] ALL TARIFF REGISTRY TESTS PASSED!\n")
@@ -0,0 +1,99 @@
+"""
+Test marginal rates and deduction sensitivities against finite differences.
+
+Tests:
+1. Marginal rates and derivatives match calculate_complete_taxes
+2. Commuting caps and the medical 5% threshold
+"""
+import copy
+
+from calculations.sensitivity import calculate_tax_sensitivity, DEDUCTION_LEVERS
+from calculations.complete_tax import calculate_complete_taxes
+from calculations.deductions import get_adjusted_deductions_for_tax_type
+from models.tax_data import UserProfile, DeductionResult
+
+
+def _total_tax(income, deduction_result, profile):
+    """Federal + cantonal/municipal/church tax from the full calculator."""
+    result = calculate_complete_taxes(income, deduction_result.total_deductions, profile, deduction_result)
+    return result.total_tax + result.federal_tax
+
+
+def _with_lever(deduction_result, lever, amount, income):
+    """Copy of deduction_result with lever raised by amount (medical threshold applied)."""
+    changed = copy.copy(deduction_result)
+    setattr(changed, lever, getattr(changed, lever) + amount)
+    if lever == 'medical_costs':
+        changed.medical_costs_deductible = max(0.0, changed.medical_costs - income * 0.05)
+    changed.calculate_totals()
+    return changed
+
+
+def test_derivatives_match_finite_differences():
+    """Every lever's CHF 100 saving equals recomputing the full tax."""
+    print("=" * 80)
+    print("TESTING TAX SENSITIVITY")
+    print("=" * 80)
+
+    profile = UserProfile(marital_status='married', num_children=1, gemeinde_steuerfuss=119,
+                          religious_affiliation='catholic')
+    income = 148000
+    deductions = DeductionResult(commuting_pauschal=3150, professional_expenses=4000, pillar_3a=7258,
+                                 medical_costs=8000, child_deductions=9000)
+    deductions.medical_costs_deductible = max(0.0, deductions.medical_costs - income * 0.05)
+    deductions.calculate_totals()
+
+    sensitivity = calculate_tax_sensitivity(income, deductions.total_deductions, profile, deductions)
+    base = _total_tax(income, deductions, profile)
+
+    for lever in DEDUCTION_LEVERS:
+        stepped = _total_tax(income, _with_lever(deductions, lever, 100, income), profile)
+        assert abs((base - stepped) - sensitivity['savings_per_step'][lever]) < 1e-6, lever
+
+    # Inside one segment the derivative is the CHF 1 change
+    stepped = _total_tax(income, _with_lever(deductions, 'pillar_3a', 1, income), profile)
+    assert abs((stepped - base) - sensitivity['deduction_derivatives']['pillar_3a']) < 1e-6
+    assert abs(-sensitivity['deduction_derivatives']['pillar_3a'] * 100 - sensitivity['combined_marginal_rate']) < 1e-9
+
+    print("[OK] CHF 100 savings match recomputing every lever")
+
+
+def test_caps_and_thresholds():
+    """Commuting stops counting at the caps; medical costs count only above 5% of income."""
+    profile = UserProfile()
+    income = 90000
+
+    # Between the federal (3,200) and cantonal (5,000) caps only cantonal tax falls
+    deductions = DeductionResult(commuting_pauschal=4000)
+    deductions.calculate_totals()
+    sensitivity = calculate_tax_sensitivity(income, deductions.total_deductions, profile, deductions)
+    cantonal_only = -sensitivity['cantonal_marginal_rate'] / 100
+    assert abs(sensitivity['deduction_derivatives']['commuting_pauschal'] - cantonal_only) < 1e-12
+    assert get_adjusted_deductions_for_tax_type(deductions, 'federal') == 3200
+
+    deductions = DeductionResult(commuting_pauschal=6000, medical_costs=1000)
+    deductions.calculate_totals()
+    sensitivity = calculate_tax_sensitivity(income, deductions.total_deductions, profile, deductions)
+    assert sensitivity['deduction_derivatives']['commuting_pauschal'] == 0
+    assert sensitivity['savings_per_step']['medical_costs'] == 0
+
+    # With the threshold binding, CHF 100 more income also costs CHF 5 of deduction
+    deductions = DeductionResult(medical_costs=9000)
+    deductions.medical_costs_deductible = 9000 - income * 0.05
+    deductions.calculate_totals()
+    sensitivity = calculate_tax_sensitivity(income, deductions.total_deductions, profile, deductions)
+    assert abs(sensitivity['income_derivative'] - sensitivity['combined_marginal_rate'] / 100 * 1.05) < 1e-12
+
+    raised = copy.copy(deductions)
+    raised.medical_costs_deductible = 9000 - (income + 100) * 0.05
+    raised.calculate_totals()
+    expected = _total_tax(income + 100, raised, profile) - _total_tax(income, deductions, profile)
+    assert abs(sensitivity['tax_per_step_income'] - expected) < 1e-6
+
+    print("[OK] Commuting caps and medical threshold handled")
+
+
+if __name__ == "__main__":
+    test_derivatives_match_finite_differences()
+    test_caps_and_thresholds()
+    print("\n[SUCCESS] ALL SENSITIVITY TESTS PASSED!\n")
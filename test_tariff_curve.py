@@ -0,0 +1,137 @@
+"""
+Test piecewise-linear tariff curves against the scalar calculators.
+
+Tests:
+1. Curve algebra (add, scale, shift, steps, breakpoint merging)
+2. One merged profile curve equals calculate_complete_taxes at any income
+3. Inverse solver: gross income for a target tax or net income
+"""
+import numpy as np
+
+from calculations.tariff import FEDERAL_SINGLE, ZURICH_MARRIED
+from calculations.tariff_curve import TariffCurve, build_tax_curve, build_profile_tax_curve
+from calculations.inverse import solve_curve, gross_income_for_tax, gross_income_for_net_income
+from calculations.complete_tax import calculate_complete_taxes
+from calculations.deductions import calculate_automatic_deductions
+from models.tax_data import UserProfile
+
+
+def test_curve_algebra():
+    """Sums, scalings and shifts evaluate like the pointwise operations."""
+    print("=" * 80)
+    print("TESTING TARIFF CURVE ALGEBRA")
+    print("=" * 80)
+
+    federal = TariffCurve.from_tariff(FEDERAL_SINGLE)
+    zurich = TariffCurve.from_tariff(ZURICH_MARRIED)
+    combined = federal.shift(5000) + zurich.scale(2.19) + TariffCurve.step(20000, 24) + 100
+
+    xs = np.concatenate([np.linspace(-1000, 1_200_000, 2000), federal.breakpoints + 5000, zurich.breakpoints])
+    expected = (
+        [FEDERAL_SINGLE.evaluate(max(x - 5000, 0)) for x in xs]
+        + 2.19 * ZURICH_MARRIED.evaluate_array(np.maximum(xs, 0))
+        + np.where(xs >= 20000, 24, 0)
+        + 100
+    )
+    assert np.allclose(combined.evaluate_array(xs), expected, rtol=0, atol=1e-6)
+    assert all(abs(combined(x) - e) < 1e-6 for x, e in zip(xs[::50], expected[::50]))
+
+    # The federal cap bracket is a jump: 0% up to 783,300, then 11.5% flat
+    assert combined.slope_at(783299 + 5000) == 2.19 * 0.13
+    assert abs(federal(783300) - 90079.5) < 1e-9
+
+    # Merging removes only redundant breakpoints
+    assert (federal - federal).merge_breakpoints().evaluate_array(xs).max() == 0
+    merged = combined.merge_breakpoints()
+    assert len(merged) <= len(combined)
+    assert np.allclose(merged.evaluate_array(xs), expected, rtol=0, atol=1e-6)
+
+    try:
+        combined.breakpoints[0] = 0
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Curve arrays must be read-only")
+
+    print("[OK] Curve algebra matches pointwise evaluation")
+
+
+def test_profile_curve_matches_complete_taxes():
+    """curve(income - extra) equals the full calculator with the extra deduction added."""
+    print("=" * 80)
+    print("TESTING PROFILE CURVES")
+    print("=" * 80)
+
+    profiles = [
+        UserProfile(),
+        UserProfile(marital_status='married', num_children=2, gemeinde_steuerfuss=96,
+                    religious_affiliation='catholic', total_wealth=850000),
+        UserProfile(religious_affiliation='reformed', gemeinde_steuerfuss=72, uses_public_transport_car=True, actual_commuting_costs=7000, net_salary=90000),
+    ]
+    incomes = [0, 5000, 25000, 73000, 150000, 420000, 900000]
+
+    for profile in profiles:
+        deduction_result = calculate_automatic_deductions(profile)
+        deductions = deduction_result.total_deductions
+        curve = build_profile_tax_curve(profile, deductions, deduction_result)
+        cantonal_only = build_profile_tax_curve(profile, deductions, deduction_result, include_federal=False)
+
+        for income in incomes:
+            for extra in (0, 7258):
+                result = calculate_complete_taxes(income - extra, deductions, profile, deduction_result)
+                total = result.total_tax + result.federal_tax
+                assert abs(curve(income - extra) - total) < 1e-6, f"{income}: {curve(income - extra)} != {total}"
+                assert abs(cantonal_only(income - extra) - result.total_tax) < 1e-6
+
+    # Personalsteuer starts with the first franc of taxable income
+    curve = build_tax_curve('single', 119, 'none', 10000, 10000, include_federal=False)
+    assert curve(10000) == 0
+    assert curve(10000.01) == 24
+
+    print("[OK] Profile curves match calculate_complete_taxes")
+
+
+def test_inverse_solver():
+    """Solutions hit the target exactly and no lower income does."""
+    print("=" * 80)
+    print("TESTING INVERSE SOLVER")
+    print("=" * 80)
+
+    profile = UserProfile(marital_status='married', gemeinde_steuerfuss=119, religious_affiliation='reformed')
+    deductions = 12000
+
+    def total_tax(income):
+        result = calculate_complete_taxes(income, deductions, profile)
+        return result.total_tax + result.federal_tax
+
+    targets = np.array([100.0, 5000.0, 20000.0, 80000.0, 400000.0])
+    incomes = gross_income_for_tax(targets, profile, deductions)
+    for target, income in zip(targets, incomes):
+        assert abs(total_tax(income) - target) < 1e-4, f"{target}: tax at {income} is {total_tax(income)}"
+        assert total_tax(income - 0.01) < target
+
+    net_targets = [30000.0, 95000.0, 250000.0, 1_000_000.0]
+    for target, income in zip(net_targets, gross_income_for_net_income(net_targets, profile, deductions)):
+        assert abs(income - total_tax(income) - target) < 1e-4
+        assert income - 0.01 - total_tax(income - 0.01) < target
+
+    # Scalar in, scalar out; Personalsteuer is reached with the first franc of taxable income
+    assert gross_income_for_tax(24, UserProfile(), 0, include_federal=False) == np.nextafter(0, 1)
+    assert isinstance(gross_income_for_net_income(50000, UserProfile()), float)
+
+    # Targets inside the federal cap jump land on the jump (CHF 783,300)
+    federal = TariffCurve.from_tariff(FEDERAL_SINGLE)
+    assert solve_curve(federal, 90070.0) == 783300
+    assert solve_curve(federal, 0.0) == 0
+
+    # Unreachable targets are NaN (a flat curve never reaches more)
+    assert np.isnan(solve_curve(TariffCurve.constant(10.0), 11.0))
+
+    print("[OK] Inverse solver matches calculate_complete_taxes")
+
+
+if __name__ == "__main__":
+    test_curve_algebra()
+    test_profile_curve_matches_complete_taxes()
+    test_inverse_solver()
+    print("\n[SUCCESS] ALL TARIFF CURVE TESTS PASSED!\n")
@@ -0,0 +1,157 @@
+"""
+Test the tariff data files and their compiled snapshots.
+
+Tests:
+1. data/tariffs/2025.toml holds exactly the tables of models/constants.py
+2. A bundle loaded from a file evaluates like the in-code bundle
+3. Snapshots are memory-mapped, and rebuilt when the source file changes
+4. Data files register years in a registry, loaded on first use, and take
+   over from the in-code fallback tables
+"""
+import tempfile
+import threading
+from pathlib import Path
+import numpy as np
+from calculations.tariff_data import (
+    DATA_DIR,
+    dump_tariff_source,
+    load_bundle,
+    load_snapshot,
+    load_tariff_file,
+    parse_tariff_toml,
+    register_data_files,
+    write_snapshot,
+)
+from calculations.registry import TariffRegistry, constants_source, get_bundle
+from models.constants import DEFAULT_TAX_YEAR, TARIFF_VERSION
+
+DATA_FILE = DATA_DIR / f'{DEFAULT_TAX_YEAR}.toml'
+TARIFFS = ('federal_single', 'federal_married', 'zurich_single', 'zurich_married', 'wealth_single', 'wealth_married')
+
+
+def _assert_same_bundle(bundle, expected):
+    """Same tariffs, fields and limits."""
+    amounts = np.linspace(0, 5_000_000, 5001)
+    for name in TARIFFS:
+        ours, theirs = getattr(bundle, name), getattr(expected, name)
+        assert ours.thresholds == theirs.thresholds and ours.rates == theirs.rates, name
+        assert np.allclose(ours.evaluate_array(amounts), theirs.evaluate_array(amounts), rtol=0, atol=1e-9), name
+    assert bundle.cantonal_steuerfuss == expected.cantonal_steuerfuss
+    assert bundle.personalsteuer == expected.personalsteuer
+    assert bundle.wealth_deduction_per_child == expected.wealth_deduction_per_child
+    assert dict(bundle.church_tax_multipliers) == dict(expected.church_tax_multipliers)
+    assert {k: v for k, v in bundle.limits.items()} == {k: v for k, v in expected.limits.items()}
+
+
+def test_data_file_matches_constants():
+    """The shipped data file and the in-code tables agree; dump and parse round-trip."""
+    print("=" * 80)
+    print("TESTING TARIFF DATA FILES")
+    print("=" * 80)
+
+    tax_year, version, source = load_tariff_file(DATA_FILE)
+    constants = constants_source()
+    assert (tax_year, version) == (DEFAULT_TAX_YEAR, TARIFF_VERSION)
+    for name, value in source.items():
+        assert value == constants[name], name
+
+    assert parse_tariff_toml(dump_tariff_source(tax_year, version, source)) == (tax_year, version, source)
+
+    print(f"   {DATA_FILE.name}: {len(source)} tables and limits")
+    print("[OK] Data file matches models/constants.py")
+
+
+def test_loaded_bundle_matches_default():
+    """Parsed and snapshot bundles evaluate exactly like the in-code bundle."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        parsed = load_bundle(DATA_FILE, cache_dir)
+        snapshot = load_bundle(DATA_FILE, cache_dir)
+        assert load_bundle(DATA_FILE, None).version == TARIFF_VERSION
+
+        _assert_same_bundle(parsed, get_bundle())
+        _assert_same_bundle(snapshot, get_bundle())
+        assert snapshot.federal_brackets_single[5]['base_tax'] == get_bundle().federal_brackets_single[5]['base_tax']
+
+    print("[OK] Loaded bundles match the default bundle")
+
+
+def test_snapshot_memory_mapped_and_rebuilt():
+    """Snapshot arrays are memory-mapped; a changed source file invalidates the snapshot."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cache_dir = tmp / 'compiled'
+        path = tmp / '2099.toml'
+        tax_year, version, source = load_tariff_file(DATA_FILE)
+        path.write_text(dump_tariff_source(2099, '2099.1', source), encoding='utf-8')
+
+        first = load_bundle(path, cache_dir)
+        assert (cache_dir / '2099.npy').exists() and (cache_dir / '2099.json').exists()
+        assert not isinstance(first.zurich_single.threshold_array, np.memmap)
+
+        cached = load_bundle(path, cache_dir)
+        assert isinstance(cached.zurich_single.threshold_array, np.memmap)
+        assert not cached.zurich_single.threshold_array.flags.writeable
+        assert cached.version == '2099.1'
+
+        # Edit the source: the old snapshot no longer matches its hash
+        source['CANTONAL_STEUERFUSS'] = 95
+        path.write_text(dump_tariff_source(2099, '2099.2', source), encoding='utf-8')
+        assert load_snapshot(cache_dir / '2099', 'stale') is None
+        rebuilt = load_bundle(path, cache_dir)
+        assert rebuilt.version == '2099.2' and rebuilt.cantonal_steuerfuss == 95
+        assert load_bundle(path, cache_dir).cantonal_steuerfuss == 95
+
+        # Concurrent cold starts write through unique temporary files
+        threads = [threading.Thread(target=write_snapshot, args=(rebuilt, cache_dir / 'race', 'race'))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert load_snapshot(cache_dir / 'race', 'race').cantonal_steuerfuss == 95
+        assert not list(cache_dir.glob('*.tmp'))
+
+    print("[OK] Snapshot memory-mapped and rebuilt on change")
+
+
+def test_register_data_files():
+    """Data files register their years and replace fallbacks; other existing years are kept unless replaced."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        tax_year, version, source = load_tariff_file(DATA_FILE)
+        source['PILLAR_3A_MAX_EMPLOYED'] = 7500
+        (tmp / '2026.toml').write_text(dump_tariff_source(2026, '2026.1', source), encoding='utf-8')
+        (tmp / f'{DEFAULT_TAX_YEAR}.toml').write_text(DATA_FILE.read_text(encoding='utf-8'), encoding='utf-8')
+        (tmp / 'notes.toml').write_text('', encoding='utf-8')
+
+        registry = TariffRegistry()
+        registry.register(DEFAULT_TAX_YEAR, get_bundle)
+        assert register_data_files(tmp, registry, tmp / 'compiled') == (2026,)
+        assert not registry.is_built(2026)
+        assert registry.get(2026).limits['PILLAR_3A_MAX_EMPLOYED'] == 7500
+        assert registry.get(DEFAULT_TAX_YEAR) is get_bundle()
+
+        assert register_data_files(tmp, registry, tmp / 'compiled', replace=True) == (DEFAULT_TAX_YEAR, 2026)
+        _assert_same_bundle(registry.get(DEFAULT_TAX_YEAR), get_bundle())
+
+        # In-code tables registered as a fallback: the data file takes over, once
+        registry = TariffRegistry()
+        registry.register(DEFAULT_TAX_YEAR, get_bundle, fallback=True)
+        assert registry.is_fallback(DEFAULT_TAX_YEAR)
+        assert register_data_files(tmp, registry, tmp / 'compiled') == (DEFAULT_TAX_YEAR, 2026)
+        assert not registry.is_fallback(DEFAULT_TAX_YEAR)
+        loaded = registry.get(DEFAULT_TAX_YEAR)
+        assert loaded is not get_bundle()
+        _assert_same_bundle(loaded, get_bundle())
+        assert register_data_files(tmp, registry, tmp / 'compiled') == ()
+        assert registry.get(DEFAULT_TAX_YEAR) is loaded
+
+    print("[OK] Data files registered per tax year")
+
+
+if __name__ == "__main__":
+    test_data_file_matches_constants()
+    test_loaded_bundle_matches_default()
+    test_snapshot_memory_mapped_and_rebuilt()
+    test_register_data_files()
+    print("\n[SUCCESS] ALL TARIFF DATA TESTS PASSED!\n")
@@ -0,0 +1,220 @@
+"""
+Test hot reload of tariff data files.
+
+Tests:
+1. Changed files are compiled and swapped in; touched or broken files are not
+2. Engines drop only the results of the replaced bundle version
+3. Requests never mix two versions while bundles are swapped
+4. A corrected municipal Steuerfuss reaches profiles built before the swap
+5. Derived-data caches release replaced bundles
+6. The watcher thread picks up a changed file
+"""
+import gc
+import os
+import tempfile
+import weakref
+import threading
+import time
+from pathlib import Path
+from calculations.tariff_data import DATA_DIR, dump_tariff_source, load_tariff_file
+from calculations.tariff_watcher import TariffWatcher
+from calculations.registry import TariffRegistry, TARIFF_REGISTRY, bundle_from_source, constants_source
+from calculations.engine import TaxEngine
+from calculations.complete_tax import calculate_complete_taxes
+from calculations.municipalities import profile_steuerfuss
+from calculations.tariff_curve import build_component_curves
+from calculations.fixed_point import fixed_tariffs
+from calculations.indexation import indexed_bundle
+from models.tax_data import UserProfile
+from models.constants import DEFAULT_TAX_YEAR
+
+HOT_YEAR = 2096   # Registered in the global registry by these tests only
+
+
+def _write(path: Path, tax_year: int, version: str, **changes):
+    """Write a data file with the 2025 tables and some entries changed."""
+    _, _, source = load_tariff_file(DATA_DIR / f'{DEFAULT_TAX_YEAR}.toml')
+    for name, value in changes.items():
+        if isinstance(value, dict):
+            source[name] = {**source[name], **value}
+        else:
+            source[name] = value
+    path.write_text(dump_tariff_source(tax_year, version, source), encoding='utf-8')
+
+
+def _hot_bundle(version: str, steuerfuss: float):
+    source = constants_source()
+    source['CANTONAL_STEUERFUSS'] = steuerfuss
+    return bundle_from_source(HOT_YEAR, version, source)
+
+
+def test_poll_swaps_changed_files():
+    """Only a real content change is swapped in; a broken file keeps the current bundle."""
+    print("=" * 80)
+    print("TESTING TARIFF HOT RELOAD")
+    print("=" * 80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        path = tmp / '2026.toml'
+        _write(path, 2026, '2026.1')
+        registry = TariffRegistry()
+        watcher = TariffWatcher(tmp, registry, tmp / 'compiled')
+        assert watcher.poll() == ()
+
+        # Corrected Steuerfuss for one municipality
+        _write(path, 2026, '2026.2', MUNICIPALITY_STEUERFUESSE={'Zürich': 118})
+        assert watcher.poll() == (2026,)
+        bundle = registry.get(2026)
+        assert bundle.version == '2026.2' and bundle.limits['MUNICIPALITY_STEUERFUESSE']['Zürich'] == 118
+        assert watcher.poll() == ()
+
+        # Touched but unchanged
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+        assert watcher.poll() == () and registry.get(2026) is bundle
+
+        # Changed without a new version: the swapped bundle still gets a distinct version
+        _write(path, 2026, '2026.2', MUNICIPALITY_STEUERFUESSE={'Zürich': 117})
+        assert watcher.poll() == (2026,)
+        assert registry.get(2026).version.startswith('2026.2+')
+
+        # Broken file: error recorded, bundle kept
+        current = registry.get(2026)
+        path.write_text('[meta\n', encoding='utf-8')
+        assert watcher.poll() == ()
+        assert 2026 in watcher.errors and registry.get(2026) is current
+
+        # New year dropped into the directory
+        _write(tmp / '2027.toml', 2027, '2027.1')
+        assert watcher.poll() == (2027,) and registry.get(2027).version == '2027.1'
+
+    print(f"   {watcher.reloads} reloads, errors for {sorted(watcher.errors)}")
+    print("[OK] Changed files swapped in, touched and broken files ignored")
+
+
+def test_engine_invalidates_old_version():
+    """A swap drops the engine entries of the old version only."""
+    TARIFF_REGISTRY.swap(HOT_YEAR, _hot_bundle('hot.1', 98))
+    engine = TaxEngine()
+    profile = UserProfile()
+
+    old = engine.calculate(100000, 0, profile, tax_year=HOT_YEAR)
+    engine.calculate(100000, 0, profile)
+    engine.calculate_fixed(100000, 0, profile, tax_year=HOT_YEAR)
+    assert len(engine) == 3
+
+    TARIFF_REGISTRY.swap(HOT_YEAR, _hot_bundle('hot.2', 90))
+    assert len(engine) == 1 and engine.stats()['invalidations'] == 2
+
+    new = engine.calculate(100000, 0, profile, tax_year=HOT_YEAR)
+    assert new.cantonal_tax < old.cantonal_tax
+    assert engine.calculate(100000, 0, profile).total_tax == engine.calculate(100000, 0, profile).total_tax
+    assert engine.stats()['hits'] == 2
+
+    print("[OK] Only entries of the old version invalidated")
+
+
+def test_no_mixed_versions_during_swaps():
+    """Pinned reads keep one bundle per request; concurrent swaps never mix versions."""
+    low, high = _hot_bundle('hot.low', 80), _hot_bundle('hot.high', 120)
+    TARIFF_REGISTRY.swap(HOT_YEAR, low)
+    with TARIFF_REGISTRY.pinned():
+        assert TARIFF_REGISTRY.get(HOT_YEAR) is low
+        TARIFF_REGISTRY.swap(HOT_YEAR, high)
+        assert TARIFF_REGISTRY.get(HOT_YEAR) is low
+    assert TARIFF_REGISTRY.get(HOT_YEAR) is high
+
+    profile = UserProfile()
+    expected = {}
+    for bundle in (low, high):
+        TARIFF_REGISTRY.swap(HOT_YEAR, bundle)
+        result = TaxEngine().calculate(150000, 0, profile, tax_year=HOT_YEAR)
+        expected[round(result.cantonal_tax, 6)] = round(result.municipal_tax + result.cantonal_tax, 6)
+
+    stop = threading.Event()
+
+    def swapper():
+        while not stop.is_set():
+            TARIFF_REGISTRY.swap(HOT_YEAR, low)
+            TARIFF_REGISTRY.swap(HOT_YEAR, high)
+
+    thread = threading.Thread(target=swapper)
+    thread.start()
+    engine = TaxEngine(maxsize=4)
+    try:
+        for _ in range(300):
+            result = engine.calculate(150000, 0, profile, tax_year=HOT_YEAR)
+            assert expected.get(round(result.cantonal_tax, 6)) == round(result.municipal_tax + result.cantonal_tax, 6)
+    finally:
+        stop.set()
+        thread.join()
+
+    print("[OK] No mixed versions during concurrent swaps")
+
+
+def test_swapped_municipal_steuerfuss():
+    """Profiles resolve their Steuerfuss from the registry, so a correction needs no new profile."""
+    source = constants_source()
+    source['MUNICIPALITY_STEUERFUESSE'] = {**source['MUNICIPALITY_STEUERFUESSE'], 'Uster': 108}
+    TARIFF_REGISTRY.swap(HOT_YEAR, bundle_from_source(HOT_YEAR, 'hot.sf1', source))
+    engine = TaxEngine()
+    profile = UserProfile(municipality='Uster', net_salary=100000)
+    assert profile_steuerfuss(profile, HOT_YEAR) == 108
+    before = engine.calculate(100000, 0, profile, tax_year=HOT_YEAR)
+
+    source['MUNICIPALITY_STEUERFUESSE'] = {**source['MUNICIPALITY_STEUERFUESSE'], 'Uster': 100}
+    TARIFF_REGISTRY.swap(HOT_YEAR, bundle_from_source(HOT_YEAR, 'hot.sf2', source))
+    assert profile_steuerfuss(profile, HOT_YEAR) == 100
+    after = engine.calculate(100000, 0, profile, tax_year=HOT_YEAR)
+    assert after.municipal_tax == before.einfache_staatssteuer * 100 / 100
+    assert after.total_tax == calculate_complete_taxes(100000, 0, profile, tax_year=HOT_YEAR).total_tax
+
+    # An explicit override still wins
+    profile.gemeinde_steuerfuss = 90
+    assert engine.calculate(100000, 0, profile, tax_year=HOT_YEAR).municipal_tax == before.einfache_staatssteuer * 0.9
+
+    print("[OK] Swapped Steuerfuss applies to existing profiles")
+
+
+def test_swapped_bundles_released():
+    """Curve, fixed-point and indexation caches do not keep a replaced bundle alive."""
+    TARIFF_REGISTRY.swap(HOT_YEAR, _hot_bundle('hot.leak1', 98))
+    build_component_curves('married', 119, 'reformed', tax_year=HOT_YEAR)
+    fixed_tariffs(TARIFF_REGISTRY.get(HOT_YEAR))
+    indexed_bundle(TARIFF_REGISTRY.get(HOT_YEAR), 1.02, HOT_YEAR + 1)
+    old = weakref.ref(TARIFF_REGISTRY.get(HOT_YEAR))
+
+    TARIFF_REGISTRY.swap(HOT_YEAR, _hot_bundle('hot.leak2', 98))
+    gc.collect()
+    assert old() is None
+
+    print("[OK] Replaced bundles released by the derived-data caches")
+
+
+def test_watcher_thread():
+    """The background thread swaps in a changed file and stops cleanly."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        path = tmp / '2026.toml'
+        _write(path, 2026, '2026.1')
+        registry = TariffRegistry()
+        with TariffWatcher(tmp, registry, tmp / 'compiled', interval=0.02) as watcher:
+            assert watcher.running
+            _write(path, 2026, '2026.2', PILLAR_3A_MAX_EMPLOYED=7500)
+            deadline = time.monotonic() + 10
+            while watcher.reloads == 0 and time.monotonic() < deadline:
+                time.sleep(0.02)
+        assert not watcher.running
+        assert registry.get(2026).limits['PILLAR_3A_MAX_EMPLOYED'] == 7500
+
+    print("[OK] Watcher thread reloads changed files")
+
+
+if __name__ == "__main__":
+    test_poll_swaps_changed_files()
+    test_engine_invalidates_old_version()
+    test_no_mixed_versions_during_swaps()
+    test_swapped_municipal_steuerfuss()
+    test_swapped_bundles_released()
+    test_watcher_thread()
+    print("\n[SUCCESS] ALL TARIFF HOT RELOAD TESTS PASSED!\n")
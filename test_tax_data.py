@@ -0,0 +1,196 @@
+"""
+Test the data models in models/tax_data.py.
+
+Tests:
+1. TaxResult breakdowns are lazy views, computed on first access from the
+   bundle of the totals (also after a tariff swap)
+2. Single-pass cantonal breakdown for the single and married tariffs
+3. Frozen profile snapshots and their fingerprints
+4. Slotted result types and struct-of-arrays batches
+"""
+from models.tax_data import LazyBreakdown
+from calculations.federal_tax import calculate_federal_tax, get_federal_bracket_breakdown
+from calculations.cantonal_tax import calculate_zurich_tax, evaluate_zurich_brackets, get_cantonal_bracket_breakdown
+from calculations.complete_tax import calculate_complete_taxes
+from models.tax_data import UserProfile, FrozenUserProfile, TaxResult, DeductionResult, TaxResultBatch, DeductionBatch
+from calculations.complete_tax import calculate_complete_taxes_batch
+import numpy as np
+import pandas as pd
+from dataclasses import FrozenInstanceError
+import pickle
+from models.constants import FEDERAL_TAX_BRACKETS
+from calculations.registry import TARIFF_REGISTRY, bundle_from_source, constants_source
+
+SWAP_YEAR = 2094   # Registered in the global registry by these tests only
+
+
+def test_breakdowns_are_lazy():
+    """Summary-only callers never build the per-bracket dicts."""
+    print("=" * 80)
+    print("TESTING LAZY BRACKET BREAKDOWNS")
+    print("=" * 80)
+
+    fed = calculate_federal_tax(120000, 10000)
+    cant = calculate_zurich_tax(120000, 119, 10000)
+    assert isinstance(fed.federal_breakdown, LazyBreakdown)
+    assert not fed.federal_breakdown.is_computed
+    assert not cant.cantonal_breakdown.is_computed
+
+    # Copying into a complete result does not force them either
+    profile = UserProfile()
+    complete = calculate_complete_taxes(120000, 10000, profile)
+    assert not complete.federal_breakdown.is_computed
+    assert not complete.cantonal_breakdown.is_computed
+
+    # First access computes the same rows as the eager function
+    expected = get_federal_bracket_breakdown(110000, fed.federal_bracket_index, FEDERAL_TAX_BRACKETS)
+    assert fed.federal_breakdown == expected
+    assert fed.federal_breakdown.is_computed
+    assert len(fed.federal_breakdown) == len(expected)
+    assert fed.federal_breakdown[-1]['is_active']
+
+    active = [b for b in cant.cantonal_breakdown if b['is_active']]
+    assert len(active) == 1 and active[0]['bracket_index'] == cant.cantonal_bracket_index
+    assert abs(sum(b['einfache_tax_paid'] for b in cant.cantonal_breakdown) - cant.einfache_staatssteuer) < 1e-6
+
+    # A swap between the calculation and the first access does not change the breakdown
+    source = constants_source()
+    TARIFF_REGISTRY.swap(SWAP_YEAR, bundle_from_source(SWAP_YEAR, 'swap.1', source))
+    fed = calculate_federal_tax(120000, 10000, 'married', tax_year=SWAP_YEAR)
+    cant = calculate_zurich_tax(120000, 119, 10000, 'married', tax_year=SWAP_YEAR)
+    source['ZURICH_TAX_BRACKETS_MARRIED'] = [{**b, 'rate': b['rate'] * 2} for b in source['ZURICH_TAX_BRACKETS_MARRIED']]
+    source['FEDERAL_TAX_BRACKETS_MARRIED'] = [{**b, 'rate_per_hundred': b['rate_per_hundred'] * 2}
+                                             for b in source['FEDERAL_TAX_BRACKETS_MARRIED']]
+    TARIFF_REGISTRY.swap(SWAP_YEAR, bundle_from_source(SWAP_YEAR, 'swap.2', source))
+    assert abs(sum(b['einfache_tax_paid'] for b in cant.cantonal_breakdown) - cant.einfache_staatssteuer) < 1e-6
+    assert abs(sum(b['municipal_tax'] for b in cant.cantonal_breakdown) - cant.municipal_tax) < 1e-6
+    assert abs(sum(b['tax_paid'] for b in fed.federal_breakdown) - fed.federal_tax) < 1.0   # Base tax is rounded
+    assert calculate_zurich_tax(120000, 119, 10000, 'married', tax_year=SWAP_YEAR).einfache_staatssteuer > \
+        1.5 * cant.einfache_staatssteuer
+
+    print("[OK] Breakdowns are computed only on first access")
+
+
+def test_cantonal_breakdown_single_pass():
+    """Einfache, cantonal and municipal columns add up to the calculator totals, married included."""
+    print("=" * 80)
+    print("TESTING CANTONAL BREAKDOWN")
+    print("=" * 80)
+
+    for status in ('single', 'married'):
+        for income in (5000, 6900, 52000, 150800, 300000, 800000):
+            result = calculate_zurich_tax(income, 96, 0, status)
+            einfache, breakdown = evaluate_zurich_brackets(income, 96, status)
+
+            assert abs(einfache - result.einfache_staatssteuer) < 1e-6
+            assert abs(breakdown['einfache_tax_paid'].sum() - result.einfache_staatssteuer) < 1e-6
+            assert abs(breakdown['cantonal_tax'].sum() - result.cantonal_tax) < 1e-6
+            assert abs(breakdown['municipal_tax'].sum() - result.municipal_tax) < 1e-6
+            assert breakdown['is_active'].sum() == (1 if einfache > 0 else 0)
+
+            # The lazy view on TaxResult serves the same structured rows
+            assert len(result.cantonal_breakdown) == len(breakdown)
+            if len(breakdown):
+                assert result.cantonal_breakdown[-1]['bracket_index'] == result.cantonal_bracket_index
+
+    # Married incomes use the married tariff (first taxed bracket at CHF 13,800)
+    married = get_cantonal_bracket_breakdown(20000, 119, 'married')
+    assert married['range_start'][0] == 13800 and married['rate'][0] == 1
+
+    print("[OK] Cantonal breakdown matches calculate_zurich_tax for both tariffs")
+
+
+def test_frozen_profile_fingerprint():
+    """Snapshots are immutable, hashable and fingerprinted on tax-relevant fields only."""
+    print("=" * 80)
+    print("TESTING FROZEN PROFILES")
+    print("=" * 80)
+
+    profile = UserProfile(marital_status='married', num_children=2, children_ages=[4, 9],
+                          spouse1_net_salary=95000, gemeinde_steuerfuss=96)
+    frozen = profile.freeze()
+    assert isinstance(frozen, FrozenUserProfile)
+    assert frozen.marital_status == 'married' and frozen.children_ages == (4, 9)
+
+    try:
+        frozen.net_salary = 1
+    except FrozenInstanceError:
+        pass
+    else:
+        raise AssertionError("Frozen profiles must reject assignment")
+
+    # Later questionnaire edits do not leak into the snapshot
+    profile.children_ages.append(12)
+    assert frozen.children_ages == (4, 9)
+
+    # Stable: equal inputs give the same 64-bit value (int and float amounts alike)
+    same = UserProfile(marital_status='married', num_children=2, children_ages=[4, 9],
+                       spouse1_net_salary=95000.0, gemeinde_steuerfuss=96).freeze()
+    assert frozen.fingerprint == same.fingerprint == hash(same)
+    assert 0 <= frozen.fingerprint < 2 ** 64
+    assert len({frozen, same}) == 1
+
+    # Questionnaire switches do not change the fingerprint, tax inputs do
+    relabelled = frozen.thaw()
+    relabelled.is_disabled = True
+    assert relabelled.freeze().fingerprint == frozen.fingerprint
+    moved = frozen.thaw()
+    moved.municipality = 'Somewhere'   # Selects the parish church Steuerfuss
+    assert moved.freeze().fingerprint != frozen.fingerprint
+    changed = frozen.thaw()
+    changed.gemeinde_steuerfuss = 119
+    assert changed.freeze().fingerprint != frozen.fingerprint
+
+    # Round trips
+    assert frozen.thaw().freeze() == frozen
+    assert pickle.loads(pickle.dumps(frozen)) == frozen
+    assert calculate_complete_taxes(120000, 0, frozen).total_tax == calculate_complete_taxes(120000, 0, frozen.thaw()).total_tax
+
+    print("[OK] Frozen profiles are immutable with stable fingerprints")
+
+
+def test_result_batches():
+    """Batches hold one float64 array per field and convert both ways."""
+    print("=" * 80)
+    print("TESTING RESULT BATCHES")
+    print("=" * 80)
+
+    assert not hasattr(TaxResult(), '__dict__')
+    assert not hasattr(DeductionResult(), '__dict__')
+
+    profile = UserProfile(religious_affiliation='reformed', total_wealth=250000)
+    incomes = [30000, 85000, 140000, 600000]
+    results = [calculate_complete_taxes(income, 8000, profile) for income in incomes]
+
+    batch = TaxResultBatch.from_results(results)
+    assert len(batch) == 4 and batch.federal_tax.dtype == np.float64
+    assert batch.nbytes == 8 * len(TaxResultBatch.columns) * len(batch)
+    for original, restored in zip(results, batch):
+        assert restored.total_tax == original.total_tax
+        assert restored.cantonal_bracket_index == original.cantonal_bracket_index
+        assert isinstance(restored.cantonal_bracket_index, int)
+
+    # Frames from the vectorized engine round-trip as well
+    frame = calculate_complete_taxes_batch(pd.DataFrame({
+        'income': incomes, 'religious_affiliation': 'reformed', 'total_wealth': 250000.0,
+    }), pd.DataFrame({'total_deductions': [8000.0] * 4}))
+    from_frame = TaxResultBatch.from_frame(frame)
+    assert np.allclose(from_frame.total_tax, batch.total_tax, rtol=0, atol=1e-6)
+    assert list(from_frame.to_frame().columns) == list(TaxResultBatch.columns)
+
+    deductions = DeductionBatch(pillar_3a=[7258, 0], commuting_pauschal=[700, 3000])
+    deductions.calculate_totals()
+    expected = DeductionResult(pillar_3a=7258, commuting_pauschal=700)
+    expected.calculate_totals()
+    assert deductions[0] == expected
+    assert deductions.total_deductions[1] == 3000
+
+    print("[OK] Struct-of-arrays batches convert both ways")
+
+
+if __name__ == "__main__":
+    test_breakdowns_are_lazy()
+    test_cantonal_breakdown_single_pass()
+    test_frozen_profile_fingerprint()
+    test_result_batches()
+    print("\n[SUCCESS] ALL TAX DATA TESTS PASSED!\n")
@@ -0,0 +1,154 @@
+"""
+Test the Quellensteuer (withholding tax) table generator.
+
+Tests:
+1. Grid rows equal the scalar federal, Zurich and church tax calculators
+2. Components are cached and only a changed tariff component is recomputed
+3. CSV and .npy tables are streamed to disk and read back
+"""
+import tempfile
+import threading
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from calculations.withholding import (
+    WITHHOLDING_CODES,
+    WITHHOLDING_COLUMNS,
+    load_withholding_table,
+    withholding_grid,
+    withholding_rate,
+    write_withholding_table,
+)
+from calculations.federal_tax import calculate_federal_tax
+from calculations.cantonal_tax import calculate_zurich_tax
+from calculations.church_tax import calculate_church_tax
+from calculations.registry import TARIFF_REGISTRY, get_bundle, constants_source
+
+
+def _scalar_withholding(code, children, church, monthly_income, gemeinde_steuerfuss=119):
+    """Monthly withholding of one row from the scalar calculators."""
+    limits = get_bundle().limits
+    insurance = limits['INSURANCE_LIMITS_ZH']
+    married = code in ('B', 'C', 'H')
+    earners = 2 if code == 'C' else 1
+    annual = 12 * monthly_income
+    deductions = (earners * min(annual * limits['PROFESSIONAL_EXPENSES_RATE'], limits['PROFESSIONAL_EXPENSES_MAX']) +
+                  insurance['married_with_pension' if code in ('B', 'C') else 'single_with_pension'] +
+                  (limits['DUAL_INCOME_DEDUCTION_ZH'] if code == 'C' else 0) +
+                  children * (insurance['per_child'] + limits['CHILD_DEDUCTION_ZH']))
+    status = 'married' if married else 'single'
+    federal = calculate_federal_tax(earners * annual, deductions, status).federal_tax
+    zurich = calculate_zurich_tax(earners * annual, gemeinde_steuerfuss, deductions, status)
+    church_tax = calculate_church_tax(zurich.einfache_staatssteuer, gemeinde_steuerfuss,
+                                      'reformed' if church else 'none', earners * annual)['church_tax']
+    return (federal + zurich.cantonal_tax + zurich.municipal_tax + church_tax) / earners / 12
+
+
+def test_grid_matches_scalar_calculators():
+    """Sampled grid cells equal the scalar calculators."""
+    print("=" * 80)
+    print("TESTING WITHHOLDING TABLES")
+    print("=" * 80)
+
+    start = time.perf_counter()
+    grid = withholding_grid(step=5, max_monthly_income=30000, max_children=6, cache_dir=None)
+    elapsed = time.perf_counter() - start
+    n_rows = grid['withholding'].size
+    assert grid['withholding'].shape == (4, 7, 2, 6001)
+    assert grid['components'] == {'federal': 'computed', 'zurich': 'computed'}
+
+    rng = np.random.default_rng(25)
+    for _ in range(200):
+        i, k, j = rng.integers(4), rng.integers(7), rng.integers(2)
+        column = rng.integers(len(grid['monthly_incomes']))
+        expected = _scalar_withholding(WITHHOLDING_CODES[i], k, bool(j), grid['monthly_incomes'][column])
+        assert abs(grid['withholding'][i, k, j, column] - expected) < 1e-6, (i, k, j, column)
+
+    # Church rows pay more, children less, and rates rise with income
+    w = grid['withholding']
+    assert np.all(w[:, :, 1] >= w[:, :, 0]) and np.all(w[:, 1:] <= w[:, :-1] + 1e-9)
+    assert np.all(np.diff(grid['rate'][0, 0, 0, 1000:]) >= 0)
+    assert grid['rate'][0, 0, 0, 0] == 0
+
+    print(f"   {n_rows:,} table cells in {elapsed * 1000:.1f} ms")
+    print("[OK] Grid matches the scalar calculators")
+
+
+def test_incremental_regeneration():
+    """Unchanged components come from the cache; a changed tariff recomputes only its component."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        first = withholding_grid(step=50, max_monthly_income=20000, max_children=3, cache_dir=cache_dir)
+        assert first['components'] == {'federal': 'computed', 'zurich': 'computed'}
+
+        again = withholding_grid(step=50, max_monthly_income=20000, max_children=3, cache_dir=cache_dir)
+        assert again['components'] == {'federal': 'cached', 'zurich': 'cached'}
+        assert np.array_equal(again['withholding'], first['withholding'])
+
+        # Steuerfuss changes only repeat the final multiply
+        cheaper = withholding_grid(step=50, max_monthly_income=20000, max_children=3, gemeinde_steuerfuss=80,
+                                   cache_dir=cache_dir)
+        assert cheaper['components'] == {'federal': 'cached', 'zurich': 'cached'}
+        assert np.all(cheaper['withholding'] <= first['withholding'])
+
+        # New federal tariff: the Zurich component is reused
+        source = constants_source()
+        source['FEDERAL_TAX_BRACKETS'] = [dict(b, rate_per_hundred=b['rate_per_hundred'] * 1.1,
+                                               base_tax=b['base_tax'] * 1.1) for b in source['FEDERAL_TAX_BRACKETS']]
+        TARIFF_REGISTRY.register_source(2095, source, replace=True)
+        changed = withholding_grid(step=50, max_monthly_income=20000, max_children=3, tax_year=2095,
+                                   cache_dir=cache_dir)
+        assert changed['components'] == {'federal': 'computed', 'zurich': 'cached'}
+        assert np.all(changed['withholding'][0] >= first['withholding'][0])
+        assert np.array_equal(changed['withholding'][1], first['withholding'][1])   # B: married federal tariff unchanged
+
+    print("[OK] Incremental regeneration")
+
+
+def test_streamed_tables():
+    """CSV and .npy outputs hold the grid; rates are looked up from the memory-mapped table."""
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = Path(directory) / 'qst.csv'
+        grid = write_withholding_table(csv_path, step=50, max_monthly_income=10000, max_children=2, cache_dir=None)
+        table = pd.read_csv(csv_path)
+        assert list(table.columns) == WITHHOLDING_COLUMNS
+        assert len(table) == 4 * 3 * 2 * 201
+        row = table[(table['code'] == 'C') & (table['children'] == 1) & (table['church'] == 'Y') &
+                    (table['income_from'] == 8000)].iloc[0]
+        assert row['rate'] == grid['rate'][2, 1, 1, 160]
+        assert row['income_to'] == 8050
+
+        npy_path = Path(directory) / 'qst.npy'
+        write_withholding_table(npy_path, step=50, max_monthly_income=10000, max_children=2, cache_dir=None)
+        rates, index = load_withholding_table(npy_path)
+        assert rates.dtype == np.uint16 and rates.shape == (4, 3, 2, 201)
+        assert withholding_rate(rates, index, 'C', 1, True, 8020) == grid['rate'][2, 1, 1, 160]
+        assert withholding_rate(rates, index, 'A', 9, False, 1e9) == grid['rate'][0, 2, 0, -1]
+        assert npy_path.stat().st_size < table.memory_usage(deep=True).sum() / 10
+
+        # Concurrent generators (tables and cached components) do not collide
+        cache_dir = Path(directory) / 'cache'
+        threads = [threading.Thread(target=write_withholding_table, args=(npy_path,),
+                                    kwargs={'step': 50, 'max_monthly_income': 10000, 'max_children': 2,
+                                            'cache_dir': cache_dir}) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert np.array_equal(load_withholding_table(npy_path)[0], rates)
+        assert not list(Path(directory).rglob('*.tmp'))
+
+        try:
+            write_withholding_table(Path(directory) / 'qst.xlsx')
+            assert False, "Unsupported format should raise"
+        except ValueError:
+            pass
+
+    print("[OK] Streamed CSV and .npy tables")
+
+
+if __name__ == "__main__":
+    test_grid_matches_scalar_calculators()
+    test_incremental_regeneration()
+    test_streamed_tables()
+    print("\n[SUCCESS] ALL WITHHOLDING TABLE TESTS PASSED!\n")
@@ -5,8 +5,9 @@ Real-time sliders for optimizing tax deductions
 import streamlit as st
 from models.tax_data import UserProfile, DeductionResult
 from ui.tax_comparison import calculate_complete_taxes
+from calculations.sensitivity import calculate_tax_sensitivity
 from utils.formatters import format_currency, format_percent
-from models.constants import PILLAR_3A_MAX_EMPLOYED, PILLAR_3A_MAX_SELF_EMPLOYED
+from calculations.registry import get_bundle
 
 
 def render_optimization_tools(profile: UserProfile, current_deductions: DeductionResult):
@@ -19,7 +20,10 @@ def render_optimization_tools(profile: UserProfile, current_deductions: Deductio
     # Pillar 3a Optimizer
     st.subheader("💡 Pillar 3a Optimizer")
 
-    max_3a = PILLAR_3A_MAX_EMPLOYED if profile.employment_type != 'self_employed' else PILLAR_3A_MAX_SELF_EMPLOYED
+    # Same caps as calculate_tax_sensitivity (tariff registry, follows hot reloads)
+    limits = get_bundle().limits
+    max_3a = (limits['PILLAR_3A_MAX_EMPLOYED'] if profile.employment_type != 'self_employed'
+              else limits['PILLAR_3A_MAX_SELF_EMPLOYED'])
     current_3a = current_deductions.pillar_3a
 
     col1, col2 = st.columns([3, 1])
@@ -53,6 +57,18 @@ def render_optimization_tools(profile: UserProfile, current_deductions: Deductio
     st.progress(optimized_3a / max_3a)
     st.caption(f"Remaining contribution room: {format_currency(max_3a - optimized_3a)}")
 
+    # Value of the next CHF 100, or of the remaining room if smaller
+    # (same basis as the savings above: federal tax excluded)
+    if optimized_3a < max_3a:
+        step = min(100, max_3a - optimized_3a)
+        sensitivity = calculate_tax_sensitivity(income, temp_deductions_with_3a, profile, include_federal=False,
+                                                step=step)
+        st.caption(
+            f"Another CHF {step:,.0f} of Pillar 3a saves "
+            f"{format_currency(sensitivity['savings_per_step']['pillar_3a'])} "
+            f"(cantonal/municipal marginal rate {format_percent(sensitivity['cantonal_marginal_rate'])})"
+        )
+
     # Pillar 2 Buy-In Impact
     st.divider()
     st.subheader("💡 Pillar 2 Buy-In Impact")
@@ -124,6 +140,7 @@ def render_optimization_tools(profile: UserProfile, current_deductions: Deductio
     st.subheader("💡 Wealth Tax Optimizer")
 
     from calculations.wealth_tax import calculate_wealth_tax
+    from calculations.municipalities import profile_steuerfuss
     from models.constants import WEALTH_DEDUCTION_PER_CHILD, WEALTH_TAX_BRACKETS_SINGLE, WEALTH_TAX_BRACKETS_MARRIED
 
     total_wealth = profile.total_wealth
@@ -135,7 +152,7 @@ def render_optimization_tools(profile: UserProfile, current_deductions: Deductio
         wealth_tax_result = calculate_wealth_tax(
             total_wealth,
             profile.num_children,
-            profile.gemeinde_steuerfuss
+            profile_steuerfuss(profile)
         )
 
         taxable_wealth = total_wealth - wealth_deduction
@@ -4,95 +4,15 @@ Shows taxes before any deductions, after automatic, and after all deductions
 """
 import streamlit as st
 import pandas as pd
-from models.tax_data import TaxResult, ComparisonResult, DeductionResult, UserProfile
-from calculations.federal_tax import calculate_federal_tax
-from calculations.cantonal_tax import calculate_zurich_tax
-from calculations.church_tax import calculate_church_tax
-from calculations.wealth_tax import calculate_wealth_tax
-from calculations.deductions import get_adjusted_deductions_for_tax_type
+from models.tax_data import ComparisonResult, DeductionResult, UserProfile, TaxResult
+from calculations.engine import get_default_engine
 from utils.formatters import format_currency, format_percent
 
 
 def calculate_complete_taxes(income: float, deductions: float, profile: UserProfile,
-                            deduction_result: DeductionResult = None) -> TaxResult:
-    """
-    Calculate all taxes for a given income and deductions.
-
-    Args:
-        income: Gross income
-        deductions: Total deductions (used for display purposes)
-        profile: User profile
-        deduction_result: Optional DeductionResult object for applying different caps
-                         for federal vs cantonal commuting costs
-
-    Returns:
-        TaxResult with all taxes calculated
-    """
-    result = TaxResult()
-    result.gross_income = income
-    result.total_deductions = deductions
-
-    # Calculate adjusted deductions for federal vs cantonal if deduction_result provided
-    if deduction_result is not None:
-        federal_deductions = get_adjusted_deductions_for_tax_type(
-            deduction_result, 'federal', total_to_adjust=deductions
-        )
-        cantonal_deductions = get_adjusted_deductions_for_tax_type(
-            deduction_result, 'cantonal', total_to_adjust=deductions
-        )
-    else:
-        # Use same deductions for both (e.g., when deductions=0)
-        federal_deductions = deductions
-        cantonal_deductions = deductions
-
-    # Federal tax (with federal commuting cap: CHF 3,200)
-    fed_result = calculate_federal_tax(income, federal_deductions, profile.marital_status)
-    result.federal_tax = fed_result.federal_tax
-    result.federal_effective_rate = fed_result.federal_effective_rate
-    result.federal_marginal_rate = fed_result.federal_marginal_rate
-    result.federal_bracket_index = fed_result.federal_bracket_index
-    result.federal_breakdown = fed_result.federal_breakdown
-    result.taxable_income = fed_result.taxable_income
-
-    # Cantonal tax (with cantonal commuting cap: CHF 5,000)
-    cant_result = calculate_zurich_tax(income, profile.gemeinde_steuerfuss, cantonal_deductions, profile.marital_status)
-    result.einfache_staatssteuer = cant_result.einfache_staatssteuer
-    result.cantonal_tax = cant_result.cantonal_tax
-    result.municipal_tax = cant_result.municipal_tax
-    result.personalsteuer = cant_result.personalsteuer
-    result.total_cantonal_municipal = cant_result.total_cantonal_municipal
-    result.cantonal_effective_rate = cant_result.cantonal_effective_rate
-    result.cantonal_marginal_rate = cant_result.cantonal_marginal_rate
-    result.cantonal_bracket_index = cant_result.cantonal_bracket_index
-    result.cantonal_breakdown = cant_result.cantonal_breakdown
-    result.progress_in_bracket = cant_result.progress_in_bracket
-    result.amount_to_next_bracket = cant_result.amount_to_next_bracket
-
-    # Church tax
-    church_result = calculate_church_tax(
-        result.einfache_staatssteuer,
-        profile.gemeinde_steuerfuss,
-        profile.religious_affiliation,
-        income
-    )
-    result.church_tax = church_result['church_tax']
-    result.church_effective_rate = church_result['effective_rate']
-
-    # Wealth tax
-    if profile.total_wealth > 0:
-        wealth_result = calculate_wealth_tax(
-            profile.total_wealth,
-            profile.num_children,
-            profile.gemeinde_steuerfuss,
-            profile.marital_status
-        )
-        result.wealth_tax = wealth_result['wealth_tax']
-        result.wealth_effective_rate = wealth_result['effective_rate']
-
-    # Calculate totals
-    result.calculate_totals()
-
-    return result
+                            deduction_result: DeductionResult = None, tax_year: int = None) -> TaxResult:
+    """Calculate all taxes through the shared TaxEngine cache (see TaxEngine.calculate)."""
+    return get_default_engine().calculate(income, deductions, profile, deduction_result, tax_year)
 
 
 def render_tax_comparison(profile: UserProfile, deductions: DeductionResult):